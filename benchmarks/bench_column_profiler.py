@@ -0,0 +1,146 @@
+"""
+Microbenchmark do perfil de colunas
+
+Compara o resumo por coluna antigo de `eda_utils` (Parquet materializado em
+pandas e, por coluna, `isna().sum()`, `nunique()`, `min()` e `max()`) com o
+`src.column_profiler` em uma passada sobre lotes Arrow, nos modos
+aproximado (HyperLogLog) e exato, e confere ausentes, mínimos/máximos e o
+erro de `n_unique`. Antes, confere que o HyperLogLog conta o mesmo texto uma
+vez só, chegue ele em lotes de largura fixa ou variável.
+
+Por padrão usa um Parquet sintético com colunas como as do BDQueimadas
+(inclusive `foco_id` textual, de alta cardinalidade); com `--dados` usa a
+saída da ingestão.
+
+Uso:
+    python -m benchmarks.bench_column_profiler
+    python -m benchmarks.bench_column_profiler --linhas 5000000
+    python -m benchmarks.bench_column_profiler --dados
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from src.column_profiler import ColumnStats, profile_focos
+from src.focos_loader import PARQUET_NAME, ROW_GROUP_SIZE, load_focos
+from src.utils import PROCESSED_DIR
+
+
+def make_focos(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """Focos sintéticos: ids e datas de alta cardinalidade, categorias pequenas."""
+    rng = np.random.default_rng(seed)
+    seconds = rng.integers(
+        np.datetime64("2019-01-01T00:00:00", "s").astype(np.int64),
+        np.datetime64("2025-01-01T00:00:00", "s").astype(np.int64),
+        n_rows,
+    )
+    date = pd.Series(seconds.astype("datetime64[s]"))
+    biomas = np.array(["Amazônia", "Cerrado", "Caatinga", "Mata Atlântica", "Pantanal", "Pampa"])
+    ufs = np.array(["PA", "MT", "AM", "RO", "MA", "TO", "BA", "PI", "MS", "AC"])
+    lat = rng.uniform(-33.8, 5.3, n_rows)
+    lat[rng.random(n_rows) < 0.01] = np.nan
+    return pd.DataFrame({
+        "id_bdq": rng.permutation(n_rows).astype(np.int64) + 790_000_000,
+        "foco_id": [f"{value:032x}" for value in rng.integers(0, 2**62, n_rows)],
+        "lat": lat,
+        "lon": rng.uniform(-74.1, -34.8, n_rows),
+        "data_pas": date.dt.strftime("%Y-%m-%d %H:%M:%S"),
+        "estado": pd.Categorical(ufs[rng.integers(0, len(ufs), n_rows)]),
+        "bioma": pd.Categorical(biomas[rng.integers(0, len(biomas), n_rows)]),
+        "date": date,
+        "year": date.dt.year.astype(np.int32),
+    })
+
+
+def summary_pandas(df: pd.DataFrame) -> pd.DataFrame:
+    """Resumo antigo de `generate_summary_stats()`, coluna a coluna."""
+    info_list = []
+    for col in df.columns:
+        n_missing = df[col].isna().sum()
+        numeric = pd.api.types.is_numeric_dtype(df[col])
+        info_list.append({
+            "coluna": col,
+            "tipo": str(df[col].dtype),
+            "n_missing": n_missing,
+            "pct_missing": round(n_missing / len(df) * 100, 2),
+            "n_unique": df[col].nunique(),
+            "min": df[col].min() if numeric else None,
+            "max": df[col].max() if numeric else None,
+        })
+    return pd.DataFrame(info_list)
+
+
+def check_distinct_strings(n_values: int = 100_000) -> None:
+    """Mesmos textos em lotes de largura fixa e variável contam uma vez só."""
+    values = np.array([str(value) for value in range(n_values)], dtype=object)
+    lengths = np.array([len(value) for value in values])
+    stats = ColumnStats("texto", "str", numeric=False, exact=False, quantiles=False)
+    # O lote misto passa do limite exato; os seguintes já vão para o HyperLogLog
+    stats.update(pa.array(values, pa.large_string()))
+    for width in np.unique(lengths):
+        stats.update(pa.array(values[lengths == width], pa.large_string()))
+    assert stats.hll is not None
+    assert abs(stats.n_unique / n_values - 1) < 0.03, stats.n_unique
+    # Estimativa limitada ao total de valores presentes
+    ids = ColumnStats("id", "int64", numeric=True, exact=False, quantiles=False)
+    ids.update(pa.array(np.arange(n_values, dtype=np.int64)))
+    assert ids.n_unique <= n_values, ids.n_unique
+    print(f"Distintos em lotes mistos: {stats.n_unique:,} (esperado {n_values:,})")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--linhas", type=int, default=2_000_000)
+    parser.add_argument("--dados", action="store_true", help="Usa a saída da ingestão")
+    args = parser.parse_args(argv)
+
+    check_distinct_strings()
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.dados:
+            processed_dir = PROCESSED_DIR
+        else:
+            processed_dir = Path(tmp)
+            make_focos(args.linhas).to_parquet(
+                processed_dir / PARQUET_NAME, index=False, row_group_size=ROW_GROUP_SIZE,
+            )
+
+        start = time.perf_counter()
+        df = load_focos(None, processed_dir)
+        load_s = time.perf_counter() - start
+        start = time.perf_counter()
+        reference = summary_pandas(df)
+        summary_s = time.perf_counter() - start
+        n_rows = len(df)
+        del df
+        print(f"{n_rows:,} linhas, {len(reference)} colunas; "
+              f"pandas: leitura {load_s:.2f}s + resumo {summary_s:.2f}s = {load_s + summary_s:.2f}s")
+
+        for label, exact in (("aproximado (HLL)", False), ("exato", True)):
+            start = time.perf_counter()
+            profiler = profile_focos(processed_dir, exact=exact)
+            summary = profiler.summary()
+            elapsed = time.perf_counter() - start
+            assert summary[["coluna", "tipo", "n_missing"]].equals(reference[["coluna", "tipo", "n_missing"]])
+            same_bounds = summary[["min", "max"]].astype(float).fillna(0).equals(
+                reference[["min", "max"]].astype(float).fillna(0)
+            )
+            assert same_bounds, label
+            error = (summary["n_unique"] / reference["n_unique"] - 1).abs()
+            worst = error.idxmax()
+            print(
+                f"  perfil {label:<17} {elapsed:6.2f}s ({(load_s + summary_s) / elapsed:4.1f}x)"
+                f"   maior erro em n_unique: {error[worst]:.2%} ({reference['coluna'][worst]})"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
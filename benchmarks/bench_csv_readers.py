@@ -0,0 +1,90 @@
+"""
+Benchmark dos backends de leitura de CSV (src.csv_readers)
+
+Mede, para cada arquivo anual, o tempo de leitura de cada backend (melhor
+de N repetições) e a memória do DataFrame resultante, incluindo a detecção
+de encoding por amostra e a projeção/dtypes do schema, e compara com o
+fallback antigo (todas as colunas, tipos inferidos, releitura em latin1).
+
+Uso:
+    python -m benchmarks.bench_csv_readers
+    python -m benchmarks.bench_csv_readers --dir data/raw/queimadas --repeticoes 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from src.csv_readers import BACKENDS, read_csv
+from src.pipeline_ingestao import RAW_DIR
+
+
+def read_legacy(file_path: Path) -> pd.DataFrame:
+    """Leitura anterior: UTF-8 com engine C e releitura em latin1 no erro."""
+    try:
+        return pd.read_csv(file_path, encoding="utf-8", low_memory=False)
+    except UnicodeDecodeError:
+        return pd.read_csv(file_path, encoding="latin1", low_memory=False)
+
+
+def best_of(func, repeats: int) -> tuple[float, int, float]:
+    best = float("inf")
+    rows = 0
+    memory_mb = 0.0
+    for _ in range(repeats):
+        start = time.perf_counter()
+        df = func()
+        best = min(best, time.perf_counter() - start)
+        rows = len(df)
+        memory_mb = df.memory_usage(deep=True).sum() / 1024**2
+        del df
+    return best, rows, memory_mb
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--dir", type=Path, default=RAW_DIR, help="Diretório com os CSVs anuais")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    csv_files = sorted(args.dir.glob("*.csv"))
+    if not csv_files:
+        print(f"Nenhum CSV encontrado em {args.dir}", file=sys.stderr)
+        return 1
+
+    results = []
+    for path in csv_files:
+        size_mb = path.stat().st_size / 1024**2
+        candidates = {"legado": lambda p=path: read_legacy(p)}
+        for backend in BACKENDS:
+            candidates[backend] = lambda p=path, b=backend: read_csv(p, backend=b)[0]
+        for name, func in candidates.items():
+            seconds, rows, memory_mb = best_of(func, args.repeticoes)
+            results.append({
+                "arquivo": path.name,
+                "backend": name,
+                "linhas": rows,
+                "segundos": round(seconds, 3),
+                "mb_por_s": round(size_mb / seconds, 1),
+                "memoria_mb": round(memory_mb, 1),
+            })
+            print(
+                f"  {path.name:<28} {name:<8} {seconds:7.3f}s  "
+                f"{size_mb / seconds:7.1f} MB/s  {memory_mb:7.1f} MB em memória"
+            )
+
+    table = pd.DataFrame(results)
+    total = table.groupby("backend")["segundos"].sum().sort_values()
+    print("\nTempo total por backend:")
+    for backend, seconds in total.items():
+        print(f"  {backend:<8} {seconds:7.3f}s  ({total['legado'] / seconds:.2f}x vs legado)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,102 @@
+"""
+Microbenchmark do agrupamento de focos em eventos de fogo
+
+Confere `src.fire_events.cluster_events` contra uma ligação de força bruta
+(haversine e intervalo em dias entre todos os pares, componentes conexos
+pelo mesmo union-find) em uma amostra pequena e mede o tempo em uma
+amostra grande. As duas amostras incluem focos sem coordenadas (lat/lon
+nulos, como os que a limpeza mantém), que precisam ficar fora dos eventos.
+
+Uso:
+    python -m benchmarks.bench_fire_events
+    python -m benchmarks.bench_fire_events --linhas 5000000 --conferir 3000
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.fire_events import DEFAULT_GAP_DAYS, DEFAULT_RADIUS_KM, cluster_events, connected_labels
+from src.pipeline_ingestao import LAT_MAX, LAT_MIN, LON_MAX, LON_MIN
+from src.spatial_index import haversine_km
+
+# Fração dos focos sem coordenadas nas amostras
+UNLOCATED_RATE = 0.002
+
+
+def make_points(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """Focos em torno de incêndios sintéticos (a poucos km e dias uns dos outros)."""
+    rng = np.random.default_rng(seed)
+    n_fires = max(1, n_rows // 20)
+    fire_lat = rng.uniform(LAT_MIN, LAT_MAX, n_fires)
+    fire_lon = rng.uniform(LON_MIN, LON_MAX, n_fires)
+    fire_day = rng.integers(17897, 20089, n_fires)  # 2019-01-01 .. 2024-12-31
+    which = rng.integers(0, n_fires, n_rows)
+    lat = (fire_lat[which] + rng.normal(0, 0.02, n_rows)).astype(np.float32)
+    lon = (fire_lon[which] + rng.normal(0, 0.02, n_rows)).astype(np.float32)
+    unlocated = rng.random(n_rows) < UNLOCATED_RATE
+    lat[unlocated & (rng.random(n_rows) < 0.5)] = np.nan
+    lon[unlocated] = np.nan
+    return pd.DataFrame({
+        "id_bdq": np.arange(n_rows, dtype=np.int64),
+        "lat": lat,
+        "lon": lon,
+        "day_idx": (fire_day[which] + rng.integers(0, 3, n_rows)).astype(np.int32),
+    })
+
+
+def brute_events(points: pd.DataFrame, radius_km: float, gap_days: int) -> np.ndarray:
+    """Rótulo do componente de cada foco localizado, ligando todos os pares."""
+    lat, lon = points["lat"].to_numpy(), points["lon"].to_numpy()
+    day_idx = points["day_idx"].to_numpy(dtype=np.int64)
+    i, j = np.triu_indices(len(points), k=1)
+    keep = np.abs(day_idx[i] - day_idx[j]) <= gap_days
+    i, j = i[keep], j[keep]
+    keep = haversine_km(lat[i], lon[i], lat[j], lon[j]) <= radius_km
+    return connected_labels(len(points), i[keep], j[keep])
+
+
+def same_partition(a: np.ndarray, b: np.ndarray) -> bool:
+    """Mesmos grupos, independentemente da numeração."""
+    pairs = pd.DataFrame({"a": a, "b": b}).drop_duplicates()
+    return not pairs["a"].duplicated().any() and not pairs["b"].duplicated().any()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--linhas", type=int, default=2_000_000)
+    parser.add_argument("--conferir", type=int, default=4_000, help="Focos da conferência com força bruta")
+    parser.add_argument("--raio-km", type=float, default=DEFAULT_RADIUS_KM)
+    parser.add_argument("--intervalo-dias", type=int, default=DEFAULT_GAP_DAYS)
+    args = parser.parse_args(argv)
+
+    sample = make_points(args.conferir, seed=1)
+    events, mapping = cluster_events(sample, args.raio_km, args.intervalo_dias)
+    located = sample["lat"].notna() & sample["lon"].notna()
+    assert (mapping["event_id"] == -1).equals(~located), "focos sem coordenadas fora dos eventos"
+    assert int(events["n_focos"].sum()) == int(located.sum())
+    assert np.isfinite(events[["lat", "lon", "area_km2"]].to_numpy()).all()
+    expected = brute_events(sample[located], args.raio_km, args.intervalo_dias)
+    assert same_partition(mapping["event_id"].to_numpy()[located], expected), "eventos diferentes da força bruta"
+    print(
+        f"Conferência: {args.conferir:,} focos ({int((~located).sum())} sem coordenadas), "
+        f"{len(events):,} eventos iguais aos da força bruta"
+    )
+
+    points = make_points(args.linhas)
+    start = time.perf_counter()
+    events, _ = cluster_events(points, args.raio_km, args.intervalo_dias)
+    elapsed = time.perf_counter() - start
+    print(
+        f"{args.linhas:,} focos → {len(events):,} eventos em {elapsed:.2f}s "
+        f"({args.raio_km:g} km, {args.intervalo_dias} dia(s))"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
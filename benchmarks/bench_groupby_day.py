@@ -0,0 +1,97 @@
+"""
+Microbenchmark do agrupamento por dia
+
+Compara a coluna `day` antiga (objetos `datetime.date` por linha, vindos de
+`dt.date`) com os tipos nativos gravados hoje pela ingestão: `day` como
+datetime64 e `day_idx` como int32 (dias desde 1970-01-01), este último
+também contado direto com `np.bincount`.
+
+Uso:
+    python -m benchmarks.bench_groupby_day
+    python -m benchmarks.bench_groupby_day --linhas 5000000 --repeticoes 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.pipeline_ingestao import day_ordinal
+
+
+def make_dates(n_rows: int, seed: int = 0) -> pd.Series:
+    """Datas-hora aleatórias entre 2019 e 2024, como as de `data_pas`."""
+    rng = np.random.default_rng(seed)
+    start = np.datetime64("2019-01-01T00:00:00", "s").astype(np.int64)
+    end = np.datetime64("2025-01-01T00:00:00", "s").astype(np.int64)
+    seconds = rng.integers(start, end, n_rows)
+    return pd.Series(seconds.astype("datetime64[s]"))
+
+
+def best_of(func, repeats: int) -> tuple[float, object]:
+    best, out = float("inf"), None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        out = func()
+        best = min(best, time.perf_counter() - start)
+    return best, out
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--linhas", type=int, default=2_000_000)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    dates = make_dates(args.linhas)
+    legacy_day = dates.dt.date
+    day = dates.dt.floor("D")
+    day_idx = day_ordinal(day)
+    print(f"{args.linhas:,} linhas, {day.nunique():,} dias distintos")
+
+    memory = {
+        "objeto (dt.date)": legacy_day.memory_usage(deep=True),
+        "datetime64": day.memory_usage(deep=True),
+        "int32 (day_idx)": day_idx.memory_usage(deep=True),
+    }
+
+    derive_legacy_s, _ = best_of(lambda: dates.dt.date, args.repeticoes)
+    derive_native_s, _ = best_of(lambda: day_ordinal(dates.dt.floor("D")), args.repeticoes)
+
+    legacy_s, legacy = best_of(
+        lambda: legacy_day.groupby(legacy_day).size(), args.repeticoes
+    )
+    native_s, native = best_of(lambda: day.groupby(day).size(), args.repeticoes)
+    idx_s, by_idx = best_of(lambda: day_idx.groupby(day_idx).size(), args.repeticoes)
+
+    def bincount():
+        offset = int(day_idx.min())
+        counts = np.bincount(day_idx.to_numpy() - offset)
+        return offset, counts
+
+    bincount_s, (offset, counts) = best_of(bincount, args.repeticoes)
+
+    # Mesmas contagens, na mesma ordem, em todas as variantes
+    assert legacy.to_numpy().tolist() == native.to_numpy().tolist() == by_idx.to_numpy().tolist()
+    assert counts[counts > 0].tolist() == native.to_numpy().tolist()
+    assert offset == int(day_ordinal(pd.Series(native.index[:1])).iloc[0])
+
+    print("Derivação da coluna:")
+    print(f"  dt.date (objetos):           {derive_legacy_s:7.3f}s")
+    print(f"  floor('D') + day_idx:        {derive_native_s:7.3f}s  ({derive_legacy_s / derive_native_s:.1f}x)")
+    print("groupby('day').size():")
+    print(f"  objeto (dt.date):            {legacy_s:7.3f}s")
+    print(f"  datetime64:                  {native_s:7.3f}s  ({legacy_s / native_s:.1f}x)")
+    print(f"  int32 (day_idx):             {idx_s:7.3f}s  ({legacy_s / idx_s:.1f}x)")
+    print(f"  np.bincount(day_idx):        {bincount_s:7.3f}s  ({legacy_s / bincount_s:.1f}x)")
+    print("Memória da coluna:")
+    for label, nbytes in memory.items():
+        print(f"  {label:<28} {nbytes / 1e6:8.1f} MB")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
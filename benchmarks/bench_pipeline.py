@@ -0,0 +1,358 @@
+"""
+Benchmark do pipeline completo, etapa por etapa
+
+Roda ingestão, carga, agregações e figuras sobre CSVs sintéticos
+(`benchmarks.synthetic_focos`) ou sobre uma pasta de CSVs brutos, em uma
+pasta temporária, e mede cada etapa:
+- tempo de parede e de CPU
+- RSS no início e pico de RSS durante a etapa (amostrado em paralelo)
+- linhas de entrada e de saída
+e também as etapas internas instrumentadas (ver `src.instrumentation`).
+
+O resultado vai para um JSON com o commit, as versões das bibliotecas e o
+tamanho dos dados; `--comparar` confronta a execução com um JSON anterior e
+aponta as etapas que ficaram mais lentas que a tolerância (código de saída 1).
+Com `--pais`, a leitura descarta os focos de outros países; comparar com uma
+execução sem o filtro mostra o tempo e as linhas economizados por etapa.
+
+Uso:
+    python -m benchmarks.bench_pipeline
+    python -m benchmarks.bench_pipeline --linhas 10000000 --leitor pyarrow
+    python -m benchmarks.bench_pipeline --brutos data/raw/queimadas
+    python -m benchmarks.bench_pipeline --comparar benchmarks/resultados/pipeline_abc1234_1000000.json
+    python -m benchmarks.bench_pipeline --pais Brasil --comparar benchmarks/resultados/pipeline_abc1234_1000000.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from benchmarks.synthetic_focos import generate
+from src import eda_utils, municipio_ranking, pipeline_ingestao, storytelling_viz
+from src.anomalies import score_anomalies
+from src.column_profiler import profile_focos
+from src.csv_readers import BACKENDS, DEFAULT_BACKEND
+from src.daily_cube import build_cube, load_cube, write_cube
+from src.focos_loader import load_focos
+from src.instrumentation import RunReport
+from src.pipeline_ingestao import SPATIAL_GRID
+from src.spatial_index import build_index, write_index
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+RESULTS_DIR = PROJECT_ROOT / "benchmarks" / "resultados"
+
+# Intervalo de amostragem do RSS durante uma etapa
+SAMPLE_INTERVAL_S = 0.005
+# Etapas mais curtas que isso ficam fora da comparação (ruído)
+MIN_COMPARE_S = 0.05
+
+
+@dataclass
+class StageResult:
+    """Medidas de uma etapa."""
+
+    grupo: str
+    etapa: str
+    segundos: float
+    cpu_segundos: float
+    rss_inicio_mb: Optional[float]
+    rss_pico_mb: Optional[float]
+    linhas_entrada: Optional[int]
+    linhas_saida: Optional[int]
+
+
+class StageTimer:
+    """Executa e mede etapas no relatório `report`, acumulando os resultados em ordem."""
+
+    def __init__(self, report: RunReport, verbose: bool = True):
+        self.report = report
+        self.results: list[StageResult] = []
+        self.verbose = verbose
+
+    def run(self, group: str, name: str, func: Callable[[], Any], rows_in: Any = None) -> Any:
+        """Mede `func()` e devolve o resultado; a saída impressa pela etapa é descartada."""
+        with contextlib.redirect_stdout(io.StringIO()), self.report.stage(name, rows_in, detail=group) as record:
+            out = func()
+            record.rows_out = out
+        result = StageResult(
+            grupo=group,
+            etapa=name,
+            segundos=round(record.segundos, 4),
+            cpu_segundos=round(record.cpu_segundos, 4),
+            rss_inicio_mb=_round(record.rss_inicio_mb),
+            rss_pico_mb=_round(record.rss_pico_mb),
+            linhas_entrada=record.linhas_entrada,
+            linhas_saida=record.linhas_saida,
+        )
+        self.results.append(result)
+        if self.verbose:
+            peak = f"{result.rss_pico_mb:8,.0f} MB" if result.rss_pico_mb is not None else "       —"
+            print(f"  {group:<11} {name:<36} {result.segundos:8.2f}s {result.cpu_segundos:8.2f}s {peak}")
+        return out
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value, 1)
+
+
+@contextlib.contextmanager
+def redirect_dirs(raw_dir: Path, processed_dir: Path):
+    """Aponta as pastas dos módulos do pipeline para a execução do benchmark."""
+    targets = [
+        (pipeline_ingestao, "RAW_DIR", raw_dir),
+        (pipeline_ingestao, "PROCESSED_DIR", processed_dir),
+        (eda_utils, "PROCESSED_DIR", processed_dir),
+        (storytelling_viz, "PROCESSED_DIR", processed_dir),
+        (municipio_ranking, "PROCESSED_DIR", processed_dir),
+    ]
+    saved = [(module, name, getattr(module, name)) for module, name, _ in targets]
+    for module, name, value in targets:
+        setattr(module, name, value)
+    try:
+        yield
+    finally:
+        for module, name, value in saved:
+            setattr(module, name, value)
+
+
+def run_pipeline(
+    raw_dir: Path,
+    work_dir: Path,
+    backend: str,
+    timer: StageTimer,
+    countries: Optional[list[str]] = None,
+) -> None:
+    """Todas as etapas, na ordem dos scripts (ingestão → EDA → storytelling)."""
+    processed_dir = work_dir / "processed"
+    figs_dir = work_dir / "figs"
+    processed_dir.mkdir(parents=True, exist_ok=True)
+    figs_dir.mkdir(parents=True, exist_ok=True)
+
+    with redirect_dirs(raw_dir, processed_dir):
+        # Ingestão (modo em memória de `pipeline_ingestao.main`)
+        raw = timer.run("ingestao", "leitura", lambda: pipeline_ingestao.load_and_concatenate(backend, countries=countries))
+        raw = timer.run("ingestao", "normalizacao_colunas", lambda: pipeline_ingestao.normalize_columns(raw), raw)
+        clean = timer.run("ingestao", "limpeza",
+                          lambda: pipeline_ingestao.clean_and_standardize(raw, verbose=False), raw)
+        del raw
+        timer.run("ingestao", "exportacao_parquet", lambda: pipeline_ingestao.export_parquet(clean), clean)
+        cube = timer.run("ingestao", "cubo_diario", lambda: build_cube(clean), clean)
+        timer.run("ingestao", "gravacao_cubo", lambda: write_cube(cube, processed_dir), cube)
+        timer.run("ingestao", "indice_espacial",
+                  lambda: write_index(build_index(clean, SPATIAL_GRID), processed_dir), clean)
+        del clean, cube
+
+        # Carga
+        focos = timer.run("carga", "focos_todas_colunas", lambda: load_focos(None, processed_dir))
+        del focos
+        counts = timer.run("carga", "cubo_diario", lambda: load_cube(processed_dir))
+
+        # Agregações (sobre o cubo, como nos scripts)
+        timer.run("agregacao", "perfil_colunas", lambda: profile_focos(processed_dir).summary())
+        timer.run("agregacao", "estatisticas_gerais", lambda: eda_utils.generate_general_stats(counts), counts)
+        by_day_bioma = timer.run("agregacao", "eda.daily_by_bioma",
+                                 lambda: eda_utils.daily_by_bioma(counts, "bioma"), counts)
+        top_uf = timer.run("agregacao", "eda.top_ufs", lambda: eda_utils.top_ufs(counts, "estado"), counts)
+        by_day = timer.run("agregacao", "anomalias.score_anomalies", lambda: score_anomalies(counts), counts)
+        timeline = timer.run("agregacao", "story.timeline_scores",
+                             lambda: storytelling_viz.timeline_scores(counts, by_day), by_day)
+        valid = timer.run("agregacao", "story.valid_biomas", lambda: storytelling_viz.valid_biomas(counts), counts)
+        by_month_bioma = timer.run("agregacao", "story.monthly_by_bioma",
+                                   lambda: storytelling_viz.monthly_by_bioma(valid), valid)
+        heatmap = timer.run("agregacao", "story.heatmap_by_month_year",
+                            lambda: storytelling_viz.heatmap_by_month_year(valid), valid)
+        ranking = timer.run("agregacao", "ranking.rank_municipios",
+                            lambda: municipio_ranking.rank_municipios(counts), counts)
+        top15 = timer.run("agregacao", "story.top_municipios", lambda: storytelling_viz.top_municipios(counts), counts)
+        bioma_scores = timer.run("agregacao", "story.bioma_scores",
+                                 lambda: storytelling_viz.bioma_scores(valid), valid)
+        del ranking
+
+        # Figuras, uma a uma no próprio processo (mesmos dados de `figure_jobs`)
+        figures = [
+            ("series_bioma.png", eda_utils.render_series_by_bioma,
+             {"by_day_bioma": by_day_bioma, "bioma_col": "bioma"}),
+            ("boxplot_bioma.png", eda_utils.render_boxplot_by_bioma,
+             {"by_day_bioma": by_day_bioma, "bioma_col": "bioma"}),
+            ("top10_uf.png", eda_utils.render_top_uf, {"top_uf": top_uf}),
+            ("timeline_anomalies.png", storytelling_viz.render_timeline_anomalies, {"by_day": timeline}),
+            ("series_envelope_bioma.png", storytelling_viz.render_series_with_envelope,
+             {"by_month_bioma": by_month_bioma}),
+            ("heatmap_temporal.png", storytelling_viz.render_heatmap_temporal, {"heatmap_pivot": heatmap}),
+            ("ranking_criticidade_municipios.png", storytelling_viz.render_ranking_criticidade, {"top15": top15}),
+            ("anomalies_by_bioma.png", storytelling_viz.render_anomalies_by_bioma, {"by_day_bioma": bioma_scores}),
+        ]
+        for name, render, data in figures:
+            timer.run("figura", name, lambda: render(figs_dir / name, **data))
+
+
+def git_commit() -> dict[str, Any]:
+    """Commit atual e se há mudanças não commitadas (None fora de um repositório)."""
+    def git(*args: str) -> Optional[str]:
+        try:
+            out = subprocess.run(["git", *args], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True)
+        except (OSError, subprocess.CalledProcessError):
+            return None
+        return out.stdout.strip()
+
+    status = git("status", "--porcelain", "--untracked-files=no")
+    return {"commit": git("rev-parse", "HEAD"), "alteracoes_locais": None if status is None else bool(status)}
+
+
+def environment() -> dict[str, Any]:
+    return {
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "pyarrow": pa.__version__,
+        "numpy": np.__version__,
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def best_runs(runs: list[list[StageResult]]) -> list[StageResult]:
+    """Por etapa, a repetição mais rápida."""
+    return [min(stage_runs, key=lambda result: result.segundos) for stage_runs in zip(*runs)]
+
+
+def _stage_rows(stage: dict) -> Optional[int]:
+    """Linhas processadas pela etapa (as de saída para a leitura, que não tem entrada)."""
+    return stage["linhas_entrada"] if stage["linhas_entrada"] is not None else stage["linhas_saida"]
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Imprime a comparação por etapa; retorna as etapas que regrediram."""
+    before = {(stage["grupo"], stage["etapa"]): stage for stage in baseline["etapas"]}
+    print(f"\nComparação com {(baseline.get('commit') or '?')[:10]} ({baseline.get('data', '?')}):")
+    if baseline.get("paises") != current.get("paises"):
+        print(f"  ⚠ filtros de países diferentes: {baseline.get('paises')} × {current.get('paises')}")
+    elif baseline.get("linhas_brutas") != current.get("linhas_brutas"):
+        print(f"  ⚠ tamanhos diferentes: {baseline.get('linhas_brutas')} × {current.get('linhas_brutas')} linhas")
+    regressions = []
+    for stage in current["etapas"]:
+        key = (stage["grupo"], stage["etapa"])
+        if key not in before:
+            print(f"  {key[0]:<11} {key[1]:<36} (nova)")
+            continue
+        old = before[key]
+        ratio = stage["segundos"] / old["segundos"] if old["segundos"] > 0 else float("inf")
+        flag = ""
+        if max(stage["segundos"], old["segundos"]) >= MIN_COMPARE_S and ratio > 1 + tolerance:
+            flag = "  ⚠ regressão"
+            regressions.append(f"{key[0]}/{key[1]}")
+        rss = ""
+        if stage["rss_pico_mb"] is not None and old["rss_pico_mb"] is not None:
+            rss = f"{stage['rss_pico_mb'] - old['rss_pico_mb']:+8,.0f} MB"
+        rows = ""
+        old_rows, new_rows = _stage_rows(old), _stage_rows(stage)
+        if old_rows is not None and new_rows is not None and old_rows != new_rows:
+            rows = f"  linhas {old_rows:,} → {new_rows:,}"
+        print(f"  {key[0]:<11} {key[1]:<36} {old['segundos']:8.2f}s → {stage['segundos']:8.2f}s"
+              f" ({ratio:5.2f}x) {rss}{rows}{flag}")
+    return regressions
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--linhas", type=int, default=1_000_000, help="Focos sintéticos (padrão: 1M)")
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--brutos", type=Path, default=None, help="Usa os CSVs desta pasta em vez dos sintéticos")
+    parser.add_argument("--leitor", choices=sorted(BACKENDS), default=DEFAULT_BACKEND)
+    parser.add_argument("--pais", nargs="+", default=None, metavar="NOME",
+                        help="Descarta na leitura os focos de outros países (ex.: Brasil)")
+    parser.add_argument("--repeticoes", type=int, default=1, help="Guarda a repetição mais rápida de cada etapa")
+    parser.add_argument("--saida", type=Path, default=None,
+                        help="JSON de resultado (padrão: benchmarks/resultados/pipeline_<commit>_<linhas>.json)")
+    parser.add_argument("--comparar", type=Path, default=None, help="JSON de uma execução anterior")
+    parser.add_argument("--tolerancia", type=float, default=0.10,
+                        help="Aumento de tempo tolerado na comparação (padrão: 0.10 = 10%%)")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    args = parse_args(argv)
+    revision = git_commit()
+
+    with tempfile.TemporaryDirectory(prefix="bench_pipeline_") as tmp:
+        tmp = Path(tmp)
+        if args.brutos is not None:
+            raw_dir = args.brutos
+        else:
+            raw_dir = tmp / "raw"
+            start = time.perf_counter()
+            generate(raw_dir, args.linhas, seed=args.semente)
+            print(f"{args.linhas:,} focos sintéticos gerados em {time.perf_counter() - start:.1f}s")
+        raw_files = sorted(raw_dir.glob("*.csv"))
+        raw_bytes = sum(path.stat().st_size for path in raw_files)
+
+        runs, substages = [], []
+        for repeat in range(args.repeticoes):
+            countries = f", países {', '.join(args.pais)}" if args.pais else ""
+            print(f"\nExecução {repeat + 1}/{args.repeticoes} (leitor {args.leitor}{countries}):")
+            print(f"  {'grupo':<11} {'etapa':<36} {'parede':>9} {'cpu':>9} {'pico RSS':>11}")
+            with RunReport("bench_pipeline", sample_interval=SAMPLE_INTERVAL_S) as report:
+                timer = StageTimer(report)
+                run_pipeline(raw_dir, tmp / f"run{repeat}", args.leitor, timer, args.pais)
+            runs.append(timer.results)
+            substages.append([entry for entry in report.summary() if entry["mae"] is not None])
+
+    stages = best_runs(runs)
+    raw_rows = stages[0].linhas_saida
+    result = {
+        **revision,
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "ambiente": environment(),
+        "dados": "sinteticos" if args.brutos is None else str(args.brutos),
+        "semente": args.semente if args.brutos is None else None,
+        "arquivos_brutos": len(raw_files),
+        "bytes_brutos": raw_bytes,
+        "linhas_brutas": raw_rows,
+        "leitor": args.leitor,
+        "paises": args.pais,
+        "repeticoes": args.repeticoes,
+        "total_segundos": round(sum(stage.segundos for stage in stages), 4),
+        "etapas": [asdict(stage) for stage in stages],
+        # Etapas internas instrumentadas (ex.: limpeza.datas), da última repetição
+        "subetapas": substages[-1],
+    }
+
+    output_path = args.saida
+    if output_path is None:
+        commit = (revision["commit"] or "sem-git")[:10]
+        output_path = RESULTS_DIR / f"pipeline_{commit}_{raw_rows}.json"
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.write_text(json.dumps(result, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"\nTotal: {result['total_segundos']:.2f}s → {output_path}")
+
+    if args.comparar is not None:
+        baseline = json.loads(args.comparar.read_text(encoding="utf-8"))
+        regressions = compare(result, baseline, args.tolerancia)
+        if regressions:
+            print(f"\n✗ {len(regressions)} etapa(s) acima da tolerância de {args.tolerancia:.0%}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,136 @@
+"""
+Microbenchmark do índice espacial em grade
+
+Compara as consultas do `src.spatial_index.GridIndex` (bounding box, raio
+e k vizinhos) com uma varredura NumPy de força bruta sobre todos os pontos
+(haversine em todas as linhas), conferindo que os resultados são iguais.
+
+Por padrão usa pontos sintéticos agrupados em "regiões de fogo" dentro do
+recorte do Brasil; com `--dados` usa a saída da ingestão.
+
+Uso:
+    python -m benchmarks.bench_spatial_index
+    python -m benchmarks.bench_spatial_index --linhas 5000000 --consultas 200
+    python -m benchmarks.bench_spatial_index --dados
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.focos_loader import read_processed
+from src.pipeline_ingestao import LAT_MAX, LAT_MIN, LON_MAX, LON_MIN, SPATIAL_GRID
+from src.spatial_index import INDEX_COLUMNS, KM_PER_DEG_LAT, build_index, haversine_km, load_index
+
+
+def make_points(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """Pontos concentrados em 300 focos regionais (como o arco do desmatamento)."""
+    rng = np.random.default_rng(seed)
+    centers_lat = rng.uniform(LAT_MIN, LAT_MAX, 300)
+    centers_lon = rng.uniform(LON_MIN, LON_MAX, 300)
+    which = rng.integers(0, 300, n_rows)
+    lat = np.clip(centers_lat[which] + rng.normal(0, 1.0, n_rows), LAT_MIN, LAT_MAX)
+    lon = np.clip(centers_lon[which] + rng.normal(0, 1.0, n_rows), LON_MIN, LON_MAX)
+    day_idx = rng.integers(17897, 20089, n_rows)  # 2019-01-01 .. 2024-12-31
+    return pd.DataFrame({
+        "id_bdq": np.arange(n_rows, dtype=np.int64),
+        "lat": lat.astype(np.float32),
+        "lon": lon.astype(np.float32),
+        "day_idx": day_idx.astype(np.int32),
+    })
+
+
+def brute_radius(points: pd.DataFrame, lat: float, lon: float, radius_km: float) -> np.ndarray:
+    distances = haversine_km(lat, lon, points["lat"].to_numpy(), points["lon"].to_numpy())
+    return np.flatnonzero(distances <= radius_km)
+
+
+def brute_bbox(points: pd.DataFrame, box: tuple[float, float, float, float]) -> np.ndarray:
+    lon_min, lat_min, lon_max, lat_max = box
+    lat, lon = points["lat"].to_numpy(), points["lon"].to_numpy()
+    return np.flatnonzero((lat >= lat_min) & (lat <= lat_max) & (lon >= lon_min) & (lon <= lon_max))
+
+
+def brute_nearest(points: pd.DataFrame, lat: float, lon: float, k: int) -> np.ndarray:
+    distances = haversine_km(lat, lon, points["lat"].to_numpy(), points["lon"].to_numpy())
+    top = np.argpartition(distances, k - 1)[:k]
+    return top[np.lexsort((top, distances[top]))]
+
+
+def timed(func, queries) -> tuple[float, list]:
+    start = time.perf_counter()
+    results = [func(*query) for query in queries]
+    return (time.perf_counter() - start) / len(queries), results
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--linhas", type=int, default=2_000_000)
+    parser.add_argument("--consultas", type=int, default=50)
+    parser.add_argument("--raio-km", type=float, default=50.0)
+    parser.add_argument("--vizinhos", type=int, default=10)
+    parser.add_argument("--dados", action="store_true", help="Usa a saída da ingestão")
+    args = parser.parse_args(argv)
+
+    if args.dados:
+        points = read_processed(columns=INDEX_COLUMNS)
+        start = time.perf_counter()
+        index = load_index()
+        source = "saída da ingestão"
+    else:
+        points = make_points(args.linhas)
+        start = time.perf_counter()
+        index = build_index(points, SPATIAL_GRID)
+        source = "sintético"
+    build_s = time.perf_counter() - start
+    print(f"{len(points):,} pontos ({source}), {index.grid.n_cells:,} células; índice em {build_s:.2f}s")
+
+    # Consultas centradas em pontos existentes (onde há fogo)
+    rng = np.random.default_rng(1)
+    picks = rng.integers(0, len(points), args.consultas)
+    centers = [(float(points["lat"].iat[i]), float(points["lon"].iat[i])) for i in picks]
+    half = args.raio_km / KM_PER_DEG_LAT
+    boxes = [(lon - half, lat - half, lon + half, lat + half) for lat, lon in centers]
+
+    cases = [
+        (
+            f"raio {args.raio_km:g} km",
+            lambda lat, lon: index.radius(lat, lon, args.raio_km)["row"].to_numpy(),
+            lambda lat, lon: brute_radius(points, lat, lon, args.raio_km),
+            centers,
+            lambda a, b: np.array_equal(np.sort(a), b),
+        ),
+        (
+            "bounding box",
+            lambda *box: index.bbox(*box)["row"].to_numpy(),
+            lambda *box: brute_bbox(points, box),
+            boxes,
+            np.array_equal,
+        ),
+        (
+            f"{args.vizinhos} vizinhos",
+            lambda lat, lon: index.nearest(lat, lon, args.vizinhos)["row"].to_numpy(),
+            lambda lat, lon: brute_nearest(points, lat, lon, args.vizinhos),
+            centers,
+            np.array_equal,
+        ),
+    ]
+    print(f"Tempo médio por consulta ({args.consultas} consultas):")
+    for label, indexed, brute, queries, same in cases:
+        indexed_s, indexed_out = timed(indexed, queries)
+        brute_s, brute_out = timed(brute, queries)
+        assert all(same(a, b) for a, b in zip(indexed_out, brute_out)), label
+        hits = np.mean([len(out) for out in indexed_out])
+        print(
+            f"  {label:<16} índice {indexed_s * 1e3:8.2f} ms   força bruta {brute_s * 1e3:8.2f} ms"
+            f"   ({brute_s / indexed_s:6.1f}x, {hits:,.0f} focos/consulta)"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
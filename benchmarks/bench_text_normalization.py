@@ -0,0 +1,92 @@
+"""
+Microbenchmark de cleaning.normalize_text_columns
+
+Compara a implementação anterior (lambda com `unidecode` por linha) com a
+atual (fatoração + valores únicos + cache LRU) em uma coluna sintética com
+a cardinalidade dos municípios (~5,5 mil valores distintos).
+
+Uso:
+    python -m benchmarks.bench_text_normalization
+    python -m benchmarks.bench_text_normalization --linhas 2000000 --distintos 5500
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from unidecode import unidecode
+
+from src.cleaning import fix_mojibake, normalize_text_columns, normalize_value
+
+# Exemplos de mojibake do README e dos arquivos do INPE → valor esperado
+MOJIBAKE_CASES = {
+    "VIT√ÒRIA DA CONQUISTA": "VITÓRIA DA CONQUISTA",
+    "VIT√ìRIA": "VITÓRIA",
+    "SÃO PAULO": "SÃO PAULO",
+}
+
+
+def normalize_legacy(df: pd.DataFrame, columns: list[str]) -> pd.DataFrame:
+    """Implementação anterior: uma chamada de `unidecode` por linha."""
+    for col in columns:
+        if col in df.columns:
+            df[col] = (
+                df[col]
+                .astype(str)
+                .map(lambda x: unidecode(x).strip() if x is not None else x)
+            )
+    return df
+
+
+def check_mojibake() -> None:
+    """Confere `fix_mojibake` nos exemplos conhecidos antes de medir."""
+    for broken, expected in MOJIBAKE_CASES.items():
+        fixed = fix_mojibake(broken)
+        assert fixed == expected, f"{broken!r} → {fixed!r} (esperado {expected!r})"
+    assert normalize_value("VIT√ÒRIA DA CONQUISTA") == "VITORIA DA CONQUISTA"
+
+
+def make_column(n_rows: int, n_unique: int, seed: int = 0) -> pd.Series:
+    rng = np.random.default_rng(seed)
+    names = np.array([f" SÃO JOSÉ DO MUNICÍPIO {i} " for i in range(n_unique)], dtype=object)
+    return pd.Series(names[rng.integers(0, n_unique, n_rows)])
+
+
+def timed(func, df: pd.DataFrame) -> tuple[float, pd.DataFrame]:
+    start = time.perf_counter()
+    out = func(df, ["municipio"])
+    return time.perf_counter() - start, out
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--linhas", type=int, default=2_000_000)
+    parser.add_argument("--distintos", type=int, default=5_500)
+    args = parser.parse_args(argv)
+
+    check_mojibake()
+    column = make_column(args.linhas, args.distintos)
+    print(f"{args.linhas:,} linhas, {args.distintos:,} valores distintos")
+
+    legacy_s, legacy = timed(normalize_legacy, pd.DataFrame({"municipio": column}))
+    normalize_value.cache_clear()
+    cold_s, current = timed(normalize_text_columns, pd.DataFrame({"municipio": column}))
+    warm_s, _ = timed(normalize_text_columns, pd.DataFrame({"municipio": column}))
+    categorical_s, _ = timed(
+        normalize_text_columns, pd.DataFrame({"municipio": column.astype("category")})
+    )
+
+    assert legacy["municipio"].tolist() == current["municipio"].tolist()
+    print(f"  legado (lambda por linha):   {legacy_s:7.3f}s")
+    print(f"  fatorado, cache frio:        {cold_s:7.3f}s  ({legacy_s / cold_s:.1f}x)")
+    print(f"  fatorado, cache quente:      {warm_s:7.3f}s  ({legacy_s / warm_s:.1f}x)")
+    print(f"  fatorado, coluna category:   {categorical_s:7.3f}s  ({legacy_s / categorical_s:.1f}x)")
+    print(f"  cache: {normalize_value.cache_info()}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
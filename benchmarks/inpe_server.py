@@ -0,0 +1,200 @@
+"""
+Servidor HTTP local no lugar do servidor de dados do INPE
+
+Serve um diretório de CSVs (ex.: gerados por `benchmarks.synthetic_focos`)
+no mesmo caminho do INPE, `/queimadas/focos/csv/anual/AMS_sat_ref/`, com o
+que o download usa:
+- Índice HTML do diretório com links para os arquivos
+- `ETag` e `Last-Modified`; GET condicional (`If-None-Match`,
+  `If-Modified-Since`) responde 304
+- `Range: bytes=N-` com `If-Range` (206; validador diferente devolve 200)
+- Injeção de falhas: a primeira resposta de cada arquivo é cortada após
+  `falhar_apos` bytes, e `banda_mb_s` limita a taxa de cada conexão
+
+Uso:
+    python -m benchmarks.inpe_server --dir data/raw/sintetico --porta 8000
+
+    from benchmarks.inpe_server import serve
+    with serve(Path("data/raw/sintetico"), fail_after=1_000_000) as url:
+        download_dataset(url, destino)
+"""
+
+from __future__ import annotations
+
+import argparse
+import html
+import re
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import formatdate, parsedate_to_datetime
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Iterator, Optional
+from urllib.parse import quote, unquote, urlsplit
+
+PREFIX = "/queimadas/focos/csv/anual/AMS_sat_ref/"
+CHUNK_SIZE = 64 * 1024
+
+
+class InpeHandler(BaseHTTPRequestHandler):
+    """Arquivos de `directory` sob `PREFIX`, com ETag, Range e falhas injetadas."""
+
+    protocol_version = "HTTP/1.1"
+
+    def __init__(self, *args, directory: Path, state: dict, **kwargs) -> None:
+        self.directory = directory
+        self.state = state
+        super().__init__(*args, **kwargs)
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        path = unquote(urlsplit(self.path).path)
+        if not path.startswith(PREFIX):
+            return self.send_error(404)
+        name = path[len(PREFIX):]
+        if not name:
+            return self._send_index()
+        file_path = self.directory / name
+        if "/" in name or not file_path.is_file():
+            return self.send_error(404)
+
+        with self.state["lock"]:
+            self.state["requests"].append((name, self.headers.get("Range")))
+        stat = file_path.stat()
+        size = stat.st_size
+        etag = f'"{stat.st_mtime_ns:x}-{size:x}"'
+        last_modified = formatdate(stat.st_mtime, usegmt=True)
+
+        if self.headers.get("If-None-Match") == etag or self._not_modified_since(stat.st_mtime):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        start = 0
+        match = re.fullmatch(r"bytes=(\d+)-", self.headers.get("Range", ""))
+        if_range = self.headers.get("If-Range")
+        if match and (if_range is None or if_range in (etag, last_modified)):
+            start = int(match.group(1))
+            if start >= size:
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{size - 1}/{size}")
+        else:
+            self.send_response(200)
+        self.send_header("Content-Type", "text/csv")
+        self.send_header("Content-Length", str(size - start))
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", last_modified)
+        self.send_header("Accept-Ranges", "bytes")
+        self.end_headers()
+        self._send_body(file_path, name, start)
+
+    def _not_modified_since(self, mtime: float) -> bool:
+        value = self.headers.get("If-Modified-Since")
+        if value is None or "If-None-Match" in self.headers:
+            return False
+        try:
+            return int(mtime) <= parsedate_to_datetime(value).timestamp()
+        except (TypeError, ValueError):
+            return False
+
+    def _send_body(self, file_path: Path, name: str, start: int) -> None:
+        with self.state["lock"]:
+            cut = self.state["fail_after"] is not None and name not in self.state["failed"]
+            self.state["failed"].add(name)
+        limit = self.state["fail_after"] if cut else None
+        rate = self.state["bandwidth"]
+        sent = 0
+        began = time.perf_counter()
+        with open(file_path, "rb") as fh:
+            fh.seek(start)
+            while chunk := fh.read(CHUNK_SIZE):
+                if limit is not None and sent + len(chunk) > limit:
+                    self.wfile.write(chunk[: limit - sent])
+                    self.close_connection = True
+                    return
+                self.wfile.write(chunk)
+                sent += len(chunk)
+                if rate:
+                    # Dorme até a taxa da conexão voltar ao limite
+                    delay = sent / rate - (time.perf_counter() - began)
+                    if delay > 0:
+                        time.sleep(delay)
+
+    def _send_index(self) -> None:
+        names = sorted(path.name for path in self.directory.iterdir() if path.is_file())
+        links = "\n".join(f'<a href="{quote(name)}">{html.escape(name)}</a><br>' for name in names)
+        body = f"<html><body><h1>Index of {PREFIX}</h1>\n{links}\n</body></html>".encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@contextmanager
+def serve(
+    directory: Path,
+    port: int = 0,
+    fail_after: Optional[int] = None,
+    bandwidth_mb_s: Optional[float] = None,
+    log: Optional[list] = None,
+) -> Iterator[str]:
+    """Serve `directory` em segundo plano; devolve a URL do diretório AMS_sat_ref.
+
+    `port=0` escolhe uma porta livre. Com `log`, cada requisição de arquivo
+    é anotada nele como (arquivo, cabeçalho Range).
+    """
+    state = {
+        "lock": threading.Lock(),
+        "requests": log if log is not None else [],
+        "failed": set(),
+        "fail_after": fail_after,
+        "bandwidth": bandwidth_mb_s * 1024**2 if bandwidth_mb_s else None,
+    }
+    handler = partial(InpeHandler, directory=Path(directory), state=state)
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="inpe-server", daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}{PREFIX}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Servidor local no layout do INPE (AMS_sat_ref)")
+    parser.add_argument("--dir", type=Path, required=True, help="Diretório com os focos_ams_ref_YYYY.csv")
+    parser.add_argument("--porta", type=int, default=8000, help="Porta (padrão: 8000)")
+    parser.add_argument(
+        "--falhar-apos", type=int, default=None,
+        help="Corta a primeira resposta de cada arquivo após N bytes",
+    )
+    parser.add_argument("--banda-mb-s", type=float, default=None, help="Limite de taxa por conexão (MB/s)")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    args = parse_args(argv)
+    with serve(args.dir, args.porta, args.falhar_apos, args.banda_mb_s) as url:
+        print(f"Servindo {args.dir} em {url} (Ctrl+C para encerrar)")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,294 @@
+"""
+Gerador de focos sintéticos no layout INPE (AMS_sat_ref)
+
+Os CSVs reais não são versionados; este módulo gera arquivos
+`focos_ams_ref_YYYY.csv` com o mesmo cabeçalho e os mesmos problemas que a
+ingestão precisa tratar:
+- Um arquivo por ano, alternando UTF-8 e latin1 (o primeiro em UTF-8)
+- UFs e municípios acentuados, com homônimos em UFs diferentes, e focos de
+  países vizinhos (sem bioma), como no recorte América do Sul
+- Contagens concentradas em poucos municípios e na estação seca
+  (julho a outubro)
+- Coordenadas ausentes ou fora do território BR e datas vazias ou
+  inválidas, em proporções configuráveis
+- Escrita em blocos com pyarrow, então 50M linhas não exigem mais memória
+  que um bloco
+
+Uso:
+    python -m benchmarks.synthetic_focos --linhas 10000000 --saida data/raw/sintetico
+    python -m benchmarks.synthetic_focos --linhas 1000000 --anos 2019 2020 --semente 7
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Sequence
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+
+YEARS = (2019, 2020, 2021, 2022, 2023, 2024)
+BLOCK_ROWS = 1_000_000
+
+# Recorte BR da ingestão (LAT_MIN..LAT_MAX, LON_MIN..LON_MAX), com folga interna
+BR_LAT = (-33.0, 4.5)
+BR_LON = (-73.5, -35.0)
+
+# Proporções padrão de linhas inválidas (descartadas na limpeza)
+INVALID_COORD_RATE = 0.002
+INVALID_DATE_RATE = 0.001
+FOREIGN_RATE = 0.25
+
+BIOMAS = ("Amazônia", "Cerrado", "Caatinga", "Mata Atlântica", "Pantanal", "Pampa")
+# Peso de cada bioma nos focos em território BR
+BIOMA_WEIGHTS = (0.48, 0.32, 0.09, 0.08, 0.02, 0.01)
+
+ESTADOS_BR = (
+    "ACRE", "ALAGOAS", "AMAPÁ", "AMAZONAS", "BAHIA", "CEARÁ", "DISTRITO FEDERAL",
+    "ESPÍRITO SANTO", "GOIÁS", "MARANHÃO", "MATO GROSSO", "MATO GROSSO DO SUL",
+    "MINAS GERAIS", "PARÁ", "PARAÍBA", "PARANÁ", "PERNAMBUCO", "PIAUÍ",
+    "RIO DE JANEIRO", "RIO GRANDE DO NORTE", "RIO GRANDE DO SUL", "RONDÔNIA",
+    "RORAIMA", "SANTA CATARINA", "SÃO PAULO", "SERGIPE", "TOCANTINS",
+)
+VIZINHOS = {
+    "Bolívia": ("Santa Cruz", "Beni", "La Paz", "Pando"),
+    "Paraguai": ("Alto Paraguay", "Boquerón", "Concepción"),
+    "Argentina": ("Salta", "Chaco", "Corrientes"),
+    "Peru": ("Madre de Dios", "Ucayali", "Loreto"),
+    "Colômbia": ("Caquetá", "Meta", "Guaviare"),
+    "Venezuela": ("Bolívar", "Amazonas", "Apure"),
+}
+
+_PREFIXOS = (
+    "SÃO JOSÉ", "SANTA MARIA", "NOVA", "BOM JESUS", "PORTO", "CAMPO", "ÁGUA",
+    "SERRA", "SANTO ANTÔNIO", "SÃO JOÃO", "CONCEIÇÃO", "VILA", "BARRA",
+    "LAGOA", "RIO", "CACHOEIRA", "PEDRA", "SÃO FRANCISCO", "BELA VISTA", "JARDIM",
+)
+_SUFIXOS = (
+    "", " DO NORTE", " DO SUL", " DO ARAGUAIA", " DAS MISSÕES", " DO XINGU",
+    " DA SERRA", " DO OESTE", " DOS PALMARES", " DO PIAUÍ", " DE GOIÁS",
+    " DO TOCANTINS", " DA CONQUISTA", " DO RIO PRETO", " D'OESTE", " DAS FLORES",
+    " DO ITAIM", " DO CAMPO", " DA BOA VISTA", " DO GUAPORÉ", " DE MINAS",
+    " DO PARÁ", " DA ESTRELA", " DO IGUAÇU", " DO AMPARO", " DAS ALMAS",
+    " DO MARANHÃO", " DO CAPIM", " DE ITAPARICA", " DO JACUÍ",
+)
+
+# Estação seca: focos concentrados de julho a outubro
+MONTH_WEIGHTS = np.array([2, 2, 2, 2, 3, 5, 10, 20, 22, 16, 9, 7], dtype=np.float64)
+
+_HEX = np.frombuffer(b"0123456789abcdef", dtype=np.uint8)
+
+
+@dataclass(frozen=True)
+class Municipios:
+    """Tabela de municípios: país, UF, nome, bioma, centroide e peso."""
+
+    pais: np.ndarray
+    estado: np.ndarray
+    nome: np.ndarray
+    bioma: np.ndarray
+    lat: np.ndarray
+    lon: np.ndarray
+    weight: np.ndarray
+
+
+def make_municipios(rng: np.random.Generator, n_br: int = 5570, n_foreign: int = 400) -> Municipios:
+    """Municípios BR e de países vizinhos, com pesos de cauda longa (Zipf)."""
+    names = np.array([f"{p}{s}" for p in _PREFIXOS for s in _SUFIXOS], dtype=object)
+    n_names = len(names)
+    # Nomes repetem entre UFs (homônimos), nunca dentro da mesma UF
+    estado_idx = np.sort(rng.integers(0, len(ESTADOS_BR), n_br))
+    nome = np.empty(n_br, dtype=object)
+    for uf in range(len(ESTADOS_BR)):
+        rows = np.flatnonzero(estado_idx == uf)
+        picks = np.resize(rng.permutation(n_names), len(rows))
+        nome[rows] = [
+            names[pick] if j < n_names else f"{names[pick]} {j // n_names + 1}"
+            for j, pick in enumerate(picks)
+        ]
+    bioma_br = np.array(BIOMAS, dtype=object)[
+        rng.choice(len(BIOMAS), size=n_br, p=BIOMA_WEIGHTS)
+    ]
+
+    paises = list(VIZINHOS)
+    pais_idx = rng.integers(0, len(paises), n_foreign)
+    pais_f = np.array(paises, dtype=object)[pais_idx]
+    estado_f = np.array([rng.choice(VIZINHOS[p]) for p in pais_f], dtype=object)
+    nome_f = np.array([f"{estado.upper()} {i}" for i, estado in enumerate(estado_f)], dtype=object)
+
+    # Cauda longa dentro de cada grupo; `FOREIGN_RATE` dos focos fora do BR
+    weight_br = 1.0 / rng.permutation(np.arange(1, n_br + 1)) ** 0.9
+    weight_f = 1.0 / rng.permutation(np.arange(1, n_foreign + 1)) ** 0.9
+    weight = np.concatenate([
+        weight_br / weight_br.sum() * (1 - FOREIGN_RATE), weight_f / weight_f.sum() * FOREIGN_RATE,
+    ])
+    return Municipios(
+        pais=np.concatenate([np.full(n_br, "Brasil", dtype=object), pais_f]),
+        estado=np.concatenate([np.array(ESTADOS_BR, dtype=object)[estado_idx], estado_f]),
+        nome=np.concatenate([nome, nome_f]),
+        bioma=np.concatenate([bioma_br, np.full(n_foreign, None, dtype=object)]),
+        lat=np.concatenate([rng.uniform(*BR_LAT, n_br), rng.uniform(-30.0, 8.0, n_foreign)]),
+        lon=np.concatenate([rng.uniform(*BR_LON, n_br), rng.uniform(-80.0, -55.0, n_foreign)]),
+        weight=weight / weight.sum(),
+    )
+
+
+def _hex_ids(rng: np.random.Generator, n_rows: int) -> pa.Array:
+    """`foco_id` de 32 dígitos hexadecimais, montado sem laço em Python."""
+    raw = rng.integers(0, 256, size=(n_rows, 16), dtype=np.uint8)
+    digits = np.empty((n_rows, 32), dtype=np.uint8)
+    digits[:, 0::2] = _HEX[raw >> 4]
+    digits[:, 1::2] = _HEX[raw & 0x0F]
+    return pa.array(digits.view("S32").ravel()).cast(pa.string())
+
+
+def _timestamps(rng: np.random.Generator, year: int, n_rows: int) -> np.ndarray:
+    """Datas-hora do ano, sorteando o mês pelos pesos da estação seca."""
+    months = rng.choice(12, size=n_rows, p=MONTH_WEIGHTS / MONTH_WEIGHTS.sum())
+    starts = np.array(
+        [np.datetime64(f"{year}-{m + 1:02d}-01", "s") for m in range(12)]
+        + [np.datetime64(f"{year + 1}-01-01", "s")]
+    ).astype(np.int64)
+    lengths = np.diff(starts)
+    offsets = (rng.random(n_rows) * lengths[months]).astype(np.int64)
+    return (starts[months] + offsets).astype("datetime64[s]")
+
+
+def make_block(
+    rng: np.random.Generator,
+    municipios: Municipios,
+    year: int,
+    n_rows: int,
+    first_id: int,
+    invalid_coord_rate: float = INVALID_COORD_RATE,
+    invalid_date_rate: float = INVALID_DATE_RATE,
+) -> pa.Table:
+    """Um bloco de `n_rows` focos do ano, no layout do CSV bruto."""
+    which = rng.choice(len(municipios.weight), size=n_rows, p=municipios.weight)
+    lat = municipios.lat[which] + rng.normal(0.0, 0.15, n_rows)
+    lon = municipios.lon[which] + rng.normal(0.0, 0.15, n_rows)
+
+    # Coordenadas inválidas: metade ausente, metade fora do recorte BR
+    bad = np.flatnonzero(rng.random(n_rows) < invalid_coord_rate)
+    missing, outside = bad[::2], bad[1::2]
+    lat[outside] = rng.choice([-60.0, 15.0], size=len(outside))
+    lat_mask = np.zeros(n_rows, dtype=bool)
+    lat_mask[missing] = True
+
+    dates = pc.strftime(pa.array(_timestamps(rng, year, n_rows)), format="%Y-%m-%d %H:%M:%S")
+    bad_dates = rng.random(n_rows) < invalid_date_rate
+    if bad_dates.any():
+        junk = np.where(rng.random(bad_dates.sum()) < 0.5, "", f"{year}-13-45 25:61:00")
+        filled = dates.to_numpy(zero_copy_only=False).astype(object)
+        filled[bad_dates] = junk
+        dates = pa.array(filled, type=pa.string())
+
+    return pa.table({
+        "id_bdq": pa.array(np.arange(first_id, first_id + n_rows, dtype=np.int64)),
+        "foco_id": _hex_ids(rng, n_rows),
+        "lat": pa.array(np.round(lat, 5), mask=lat_mask),
+        "lon": pa.array(np.round(lon, 5), mask=lat_mask),
+        "data_pas": dates,
+        "pais": pa.array(municipios.pais[which], type=pa.string()),
+        "estado": pa.array(municipios.estado[which], type=pa.string()),
+        "municipio": pa.array(municipios.nome[which], type=pa.string()),
+        "bioma": pa.array(municipios.bioma[which], type=pa.string()),
+    })
+
+
+def write_year(
+    path: Path,
+    year: int,
+    n_rows: int,
+    encoding: str,
+    rng: np.random.Generator,
+    municipios: Municipios,
+    block_rows: int = BLOCK_ROWS,
+    **rates: float,
+) -> None:
+    """Grava o CSV de um ano em blocos, no encoding pedido."""
+    first_id = (year - 2000) * 10**9
+    with open(path, "wb") as fh:
+        for start in range(0, n_rows, block_rows):
+            block = make_block(rng, municipios, year, min(block_rows, n_rows - start), first_id + start, **rates)
+            sink = pa.BufferOutputStream()
+            pacsv.write_csv(block, sink, pacsv.WriteOptions(include_header=False, quoting_style="none"))
+            data = sink.getvalue().to_pybytes()
+            if start == 0:
+                # Cabeçalho sem aspas, como nos CSVs do INPE
+                data = (",".join(block.column_names) + "\n").encode() + data
+            if encoding != "utf-8":
+                data = data.decode("utf-8").encode(encoding)
+            fh.write(data)
+
+
+def generate(
+    output_dir: Path,
+    n_rows: int,
+    years: Sequence[int] = YEARS,
+    seed: int = 0,
+    invalid_coord_rate: float = INVALID_COORD_RATE,
+    invalid_date_rate: float = INVALID_DATE_RATE,
+    block_rows: int = BLOCK_ROWS,
+) -> list[Path]:
+    """Gera `n_rows` focos divididos igualmente entre `years`; retorna os CSVs.
+
+    O resultado depende só de `seed` e dos parâmetros (inclusive `block_rows`).
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    municipios = make_municipios(rng)
+    per_year = np.full(len(years), n_rows // len(years))
+    per_year[: n_rows % len(years)] += 1
+
+    paths = []
+    for i, (year, rows) in enumerate(zip(years, per_year)):
+        path = output_dir / f"focos_ams_ref_{year}.csv"
+        encoding = "latin1" if i % 2 else "utf-8"
+        write_year(
+            path, year, int(rows), encoding, rng, municipios, block_rows,
+            invalid_coord_rate=invalid_coord_rate, invalid_date_rate=invalid_date_rate,
+        )
+        paths.append(path)
+    return paths
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Gera CSVs sintéticos de focos no layout INPE")
+    parser.add_argument("--linhas", type=int, default=1_000_000, help="Total de focos (padrão: 1M)")
+    parser.add_argument("--saida", type=Path, required=True, help="Pasta dos CSVs gerados")
+    parser.add_argument("--anos", type=int, nargs="+", default=list(YEARS), help="Um CSV por ano")
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument(
+        "--coordenadas-invalidas", type=float, default=INVALID_COORD_RATE,
+        help=f"Fração de coordenadas ausentes ou fora do BR (padrão: {INVALID_COORD_RATE})",
+    )
+    parser.add_argument(
+        "--datas-invalidas", type=float, default=INVALID_DATE_RATE,
+        help=f"Fração de datas vazias ou inválidas (padrão: {INVALID_DATE_RATE})",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    args = parse_args(argv)
+    start = time.perf_counter()
+    paths = generate(
+        args.saida, args.linhas, args.anos, args.semente,
+        args.coordenadas_invalidas, args.datas_invalidas,
+    )
+    elapsed = time.perf_counter() - start
+    size_mb = sum(path.stat().st_size for path in paths) / 1024**2
+    print(f"✓ {args.linhas:,} focos em {len(paths)} arquivo(s), {size_mb:,.0f} MB ({elapsed:.1f}s)")
+    for i, path in enumerate(paths):
+        print(f"  {path.name} ({'latin1' if i % 2 else 'UTF-8'})")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,362 @@
+"""
+Cache de artefatos - CSVs e figuras derivados, endereçados por conteúdo
+
+Este módulo:
+- Identifica cada artefato (ou grupo de artefatos) por uma chave: etapa +
+  impressão digital das entradas (nome, tamanho e mtime dos arquivos, sem
+  ler o conteúdo) + parâmetros + fonte do módulo que o gera
+- Guarda os arquivos em `data/cache/blobs/` pelo SHA-256 do conteúdo (PNGs e
+  CSVs iguais entre entradas ocupam espaço uma vez só)
+- Restaura os arquivos de uma chave já vista sem recalcular nada
+- Remove as entradas usadas há mais tempo (LRU) quando o cache passa do
+  limite de tamanho
+
+`eda_utils`, `eda_inicial` e `storytelling_viz` passam cada etapa por
+`cached()`; numa reexecução sem mudanças o custo é a impressão digital das
+entradas e a cópia dos arquivos.
+
+Uso:
+    python -m src.artifact_cache info
+    python -m src.artifact_cache warm
+    python -m src.artifact_cache warm --scripts eda_utils storytelling_viz
+    python -m src.artifact_cache purge
+    python -m src.artifact_cache purge --etapa figuras_storytelling
+    python -m src.artifact_cache purge --limite-mb 100
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import importlib
+import json
+import os
+import shutil
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Iterable, Optional, Sequence
+
+from src.utils import DATA_DIR
+
+CACHE_DIR = DATA_DIR / "cache"
+INDEX_NAME = "index.json"
+DEFAULT_MAX_MB = 512
+
+# Mudanças no formato do cache invalidam todas as entradas
+CACHE_VERSION = 1
+
+WARM_SCRIPTS = ("eda_utils", "storytelling_viz", "eda_inicial")
+
+
+def input_fingerprint(paths: Iterable[Path]) -> str:
+    """Impressão digital das entradas: nome, tamanho e mtime de cada arquivo.
+
+    Diretórios entram com todos os arquivos internos; caminhos inexistentes
+    também entram (criar a entrada muda a impressão digital).
+    """
+    digest = hashlib.sha256()
+    for path in sorted(Path(p) for p in paths):
+        files = sorted(p for p in path.rglob("*") if p.is_file()) if path.is_dir() else [path]
+        for file in files:
+            try:
+                stat = file.stat()
+            except FileNotFoundError:
+                digest.update(f"{file}\0-\n".encode())
+                continue
+            digest.update(f"{file}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
+
+
+def module_source_hash(module_names: Iterable[str]) -> str:
+    """Hash dos arquivos-fonte dos módulos que geram os artefatos."""
+    digest = hashlib.sha256()
+    for name in module_names:
+        module = sys.modules.get(name) or importlib.import_module(name)
+        digest.update(Path(module.__file__).read_bytes())
+    return digest.hexdigest()
+
+
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ArtifactCache:
+    """Cache em disco de arquivos derivados, com despejo LRU por tamanho."""
+
+    def __init__(self, root: Optional[Path] = None, max_bytes: int = DEFAULT_MAX_MB * 1024 * 1024):
+        self.root = Path(root) if root is not None else CACHE_DIR
+        self.max_bytes = max_bytes
+        self.index_path = self.root / INDEX_NAME
+        self._index: Optional[dict] = None
+
+    # Índice: {"versao", "entradas": {chave: {"etapa", "arquivos", "criado", "acesso"}}}
+
+    @property
+    def entries(self) -> dict[str, dict]:
+        if self._index is None:
+            self._index = self._read_index()
+        return self._index["entradas"]
+
+    def _read_index(self) -> dict:
+        try:
+            index = json.loads(self.index_path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return {"versao": CACHE_VERSION, "entradas": {}}
+        if index.get("versao") != CACHE_VERSION:
+            return {"versao": CACHE_VERSION, "entradas": {}}
+        return index
+
+    def _save_index(self) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.index_path.with_suffix(".json.tmp")
+        tmp_path.write_text(json.dumps(self._index, indent=2, sort_keys=True), encoding="utf-8")
+        os.replace(tmp_path, self.index_path)
+
+    def _blob_path(self, sha256: str) -> Path:
+        return self.root / "blobs" / sha256[:2] / sha256
+
+    def key(self, step: str, fingerprint: str, params: Optional[dict[str, Any]] = None, code: str = "") -> str:
+        """Chave de uma etapa: entradas + parâmetros + versão do código."""
+        payload = json.dumps(
+            {"etapa": step, "entradas": fingerprint, "parametros": params or {}, "codigo": code},
+            sort_keys=True, default=str,
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def restore(self, key: str, outputs: Sequence[Path]) -> Optional[list[Path]]:
+        """Copia os arquivos da chave para `outputs`; None se a chave não existir.
+
+        Arquivos de `outputs` que a etapa não gerou ao ser guardada são
+        ignorados. Destinos idênticos ao cache (mesmo tamanho e mtime) não
+        são copiados de novo.
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        by_name = {path.name: path for path in outputs}
+        blobs = {name: self._blob_path(meta["sha256"]) for name, meta in entry["arquivos"].items()}
+        if not all(name in by_name and blob.exists() for name, blob in blobs.items()):
+            # Entrada órfã (blob removido à mão ou saídas renomeadas)
+            del self.entries[key]
+            self._save_index()
+            return None
+
+        restored = []
+        for target in outputs:
+            if target.name not in blobs:
+                continue
+            blob = blobs[target.name]
+            blob_stat = blob.stat()
+            try:
+                target_stat = target.stat()
+                same = (target_stat.st_size, target_stat.st_mtime_ns) == (blob_stat.st_size, blob_stat.st_mtime_ns)
+            except FileNotFoundError:
+                same = False
+            if not same:
+                target.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = target.with_name(target.name + ".tmp")
+                shutil.copy2(blob, tmp_path)
+                os.replace(tmp_path, target)
+            restored.append(target)
+        entry["acesso"] = time.time()
+        self._save_index()
+        return restored
+
+    def store(self, key: str, step: str, outputs: Sequence[Path]) -> list[Path]:
+        """Guarda os `outputs` existentes sob `key` e aplica o limite de tamanho."""
+        files = {}
+        stored = []
+        for path in outputs:
+            if not path.exists():
+                continue
+            sha256 = _file_sha256(path)
+            blob = self._blob_path(sha256)
+            if not blob.exists():
+                blob.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = blob.with_name(blob.name + ".tmp")
+                shutil.copy2(path, tmp_path)
+                os.replace(tmp_path, blob)
+            # O destino fica com o mtime do blob: a próxima restauração não copia
+            blob_stat = blob.stat()
+            os.utime(path, ns=(blob_stat.st_atime_ns, blob_stat.st_mtime_ns))
+            files[path.name] = {"sha256": sha256, "bytes": blob_stat.st_size}
+            stored.append(path)
+        now = time.time()
+        self.entries[key] = {
+            "etapa": step,
+            "arquivos": files,
+            "criado": datetime.fromtimestamp(now).isoformat(timespec="seconds"),
+            "acesso": now,
+        }
+        self.evict(keep=key)
+        self._save_index()
+        return stored
+
+    def _blob_sizes(self, keys: Iterable[str]) -> dict[str, int]:
+        sizes = {}
+        for key in keys:
+            for meta in self.entries[key]["arquivos"].values():
+                sizes[meta["sha256"]] = meta["bytes"]
+        return sizes
+
+    def total_bytes(self) -> int:
+        """Bytes em disco (cada blob conta uma vez)."""
+        return sum(self._blob_sizes(self.entries).values())
+
+    def evict(self, max_bytes: Optional[int] = None, keep: Optional[str] = None) -> list[str]:
+        """Remove as entradas menos usadas até caber em `max_bytes`."""
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        by_access = sorted(self.entries, key=lambda key: self.entries[key]["acesso"])
+        removed = []
+        while by_access and self.total_bytes() > limit:
+            key = by_access.pop(0)
+            if key == keep:
+                continue
+            del self.entries[key]
+            removed.append(key)
+        if removed:
+            self._collect_blobs()
+            self._save_index()
+        return removed
+
+    def purge(self, step: Optional[str] = None) -> list[str]:
+        """Remove todas as entradas (ou só as de uma etapa)."""
+        removed = [key for key, entry in self.entries.items() if step is None or entry["etapa"] == step]
+        for key in removed:
+            del self.entries[key]
+        self._collect_blobs()
+        self._save_index()
+        return removed
+
+    def _collect_blobs(self) -> None:
+        """Apaga blobs que nenhuma entrada referencia."""
+        referenced = set(self._blob_sizes(self.entries))
+        blobs_dir = self.root / "blobs"
+        if not blobs_dir.exists():
+            return
+        for blob in blobs_dir.glob("*/*"):
+            if blob.name not in referenced:
+                blob.unlink()
+
+
+def cached(
+    step: str,
+    outputs: Sequence[Path],
+    build: Callable[[], Any],
+    fingerprint: str,
+    params: Optional[dict[str, Any]] = None,
+    cache: Optional[ArtifactCache] = None,
+    refresh: bool = False,
+    modules: Sequence[str] = (),
+) -> bool:
+    """Restaura os `outputs` da etapa do cache ou roda `build()` e os guarda.
+
+    A versão do código é o fonte do módulo de `build` mais o de `modules`
+    (dependências que também afetam as saídas). Retorna True quando os
+    arquivos vieram do cache. Sem `cache`, apenas executa `build()`; com
+    `refresh=True`, executa e substitui a entrada.
+    """
+    if cache is None:
+        build()
+        return False
+    code = module_source_hash([build.__module__, *modules])
+    key = cache.key(step, fingerprint, params, code)
+    if not refresh:
+        restored = cache.restore(key, outputs)
+        if restored is not None:
+            for path in restored:
+                print(f"= {path.name} (cache)")
+            return True
+    build()
+    cache.store(key, step, outputs)
+    return False
+
+
+def format_bytes(n_bytes: int) -> str:
+    return f"{n_bytes / (1024 * 1024):.1f} MB"
+
+
+def print_info(cache: ArtifactCache) -> None:
+    entries = cache.entries
+    print(f"Cache: {cache.root}")
+    print(f"Entradas: {len(entries)}; em disco: {format_bytes(cache.total_bytes())} "
+          f"(limite {format_bytes(cache.max_bytes)})")
+    for key, entry in sorted(entries.items(), key=lambda item: item[1]["acesso"], reverse=True):
+        n_bytes = sum(meta["bytes"] for meta in entry["arquivos"].values())
+        last_access = datetime.fromtimestamp(entry["acesso"]).isoformat(sep=" ", timespec="seconds")
+        print(f"  {key[:12]}  {entry['etapa']:<24} {len(entry['arquivos']):>3} arquivos "
+              f"{format_bytes(n_bytes):>10}  último uso {last_access}")
+
+
+def warm(scripts: Sequence[str]) -> int:
+    """Executa os scripts para popular o cache; retorna quantos falharam.
+
+    Antes de cada script, confere as entradas dele (`input_paths()`): sem
+    nenhuma, o script é pulado com a lista do que falta e conta como falha.
+    """
+    failures = 0
+    for script in scripts:
+        print(f"\n--- {script} ---")
+        module = importlib.import_module(f"src.{script}")
+        inputs = module.input_paths()
+        if not any(path.exists() for path in inputs):
+            expected = ", ".join(str(path) for path in inputs)
+            print(f"✗ {script}: nenhuma entrada encontrada ({expected})", file=sys.stderr)
+            failures += 1
+            continue
+        if module.main([]) != 0:
+            failures += 1
+    return failures
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Cache de artefatos derivados (CSVs e figuras)")
+    commands = parser.add_subparsers(dest="comando", required=True)
+    commands.add_parser("info", help="Lista as entradas do cache")
+    warm_parser = commands.add_parser("warm", help="Executa os scripts para popular o cache")
+    warm_parser.add_argument(
+        "--scripts", nargs="+", choices=WARM_SCRIPTS, default=list(WARM_SCRIPTS),
+        help="Scripts a executar (padrão: todos)",
+    )
+    purge_parser = commands.add_parser("purge", help="Remove entradas do cache")
+    # O limite vale para o cache inteiro: não se combina com uma etapa
+    purge_scope = purge_parser.add_mutually_exclusive_group()
+    purge_scope.add_argument("--etapa", help="Remove só as entradas desta etapa")
+    purge_scope.add_argument(
+        "--limite-mb", type=float, default=None,
+        help="Em vez de limpar tudo, remove as menos usadas até caber neste tamanho",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    args = parse_args(argv)
+    try:
+        cache = ArtifactCache()
+        if args.comando == "info":
+            print_info(cache)
+        elif args.comando == "warm":
+            failures = warm(args.scripts)
+            print()
+            print_info(cache)
+            return 1 if failures else 0
+        elif args.limite_mb is not None:
+            removed = cache.evict(int(args.limite_mb * 1024 * 1024))
+            print(f"✓ {len(removed)} entradas removidas; em disco: {format_bytes(cache.total_bytes())}")
+        else:
+            removed = cache.purge(args.etapa)
+            print(f"✓ {len(removed)} entradas removidas; em disco: {format_bytes(cache.total_bytes())}")
+        return 0
+    except Exception as e:
+        print(f"✗ Erro: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,16 +1,62 @@
 from __future__ import annotations
+from functools import lru_cache
 import pandas as pd
 from unidecode import unidecode
 
+# Cache compartilhado entre colunas e chamadas (~6 mil municípios cabem folgados)
+NORMALIZE_CACHE_SIZE = 65_536
+
+# Sequências típicas de UTF-8 lido como Mac Roman/cp1252 (ex.: "VIT√ìRIA")
+MOJIBAKE_MARKERS = ("√", "Ã", "Â", "â€")
+MOJIBAKE_ENCODINGS = ("mac_roman", "cp1252", "latin1")
+# Padrões dos arquivos do INPE que nenhuma releitura desfaz (os bytes não
+# formam UTF-8 válido), ex.: "VIT√ÒRIA DA CONQUISTA" do README
+MOJIBAKE_TABLE = {"√Ò": "Ó"}
+
+
+def fix_mojibake(text: str) -> str:
+    """Desfaz UTF-8 interpretado como Mac Roman/cp1252/latin1.
+
+    Só tenta quando há marcadores típicos e só aceita a conversão se os
+    bytes formarem UTF-8 válido, então texto correto como "SÃO PAULO" fica
+    intacto. Se nenhuma releitura servir, aplica `MOJIBAKE_TABLE`.
+    """
+    if not any(marker in text for marker in MOJIBAKE_MARKERS):
+        return text
+    for encoding in MOJIBAKE_ENCODINGS:
+        try:
+            return text.encode(encoding).decode("utf-8")
+        except (UnicodeEncodeError, UnicodeDecodeError):
+            continue
+    for broken, fixed in MOJIBAKE_TABLE.items():
+        text = text.replace(broken, fixed)
+    return text
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def normalize_value(text: str) -> str:
+    """Normaliza um valor (mojibake, acentos, espaços), com memoização."""
+    return unidecode(fix_mojibake(text)).strip()
+
 
 def normalize_text_columns(df: pd.DataFrame, columns: list[str]) -> pd.DataFrame:
+    """Normaliza colunas de texto processando só os valores distintos.
+
+    Cada coluna é fatorada; os valores únicos passam por `normalize_value`
+    (cache LRU compartilhado) e o resultado volta às linhas pelos códigos.
+    Colunas `category` continuam `category`.
+    """
     for col in columns:
         if col in df.columns:
-            df[col] = (
-                df[col]
-                .astype(str)
-                .map(lambda x: unidecode(x).strip() if x is not None else x)
-            )
+            codes, uniques = pd.factorize(df[col], use_na_sentinel=False)
+            uniques = pd.Index(uniques, dtype=object).fillna("nan").astype(str)
+            normalized = pd.Index([normalize_value(value) for value in uniques], dtype=object)
+            if isinstance(df[col].dtype, pd.CategoricalDtype):
+                merged_codes, categories = pd.factorize(normalized, sort=True)
+                values = pd.Categorical.from_codes(merged_codes[codes], categories=categories)
+            else:
+                values = normalized.to_numpy()[codes]
+            df[col] = pd.Series(values, index=df.index)
     return df
 
 
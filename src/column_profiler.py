@@ -0,0 +1,408 @@
+"""
+Perfil de colunas em uma passada - Lotes Arrow com sketches
+
+Este módulo:
+- Percorre a saída da ingestão (ou qualquer fonte de lotes Arrow) uma única
+  vez e acumula, por coluna: ausentes, distintos, mínimo/máximo e, se
+  pedido, quantis
+- Conta distintos de forma exata enquanto cabem em `EXACT_LIMIT` valores e,
+  acima disso, pela estimativa HyperLogLog (erro típico ~0,8%); com
+  `exact=True` a contagem é sempre exata
+- Estima quantis com um sketch de erro relativo (buckets logarítmicos,
+  estilo DDSketch), que se combina entre lotes sem guardar os valores
+- Gera o mesmo `resumo_colunas.csv` de `eda_utils.generate_summary_stats()`;
+  como só consome lotes, também roda durante a ingestão em streaming
+
+Uso:
+    python -m src.column_profiler
+    python -m src.column_profiler --exato
+    python -m src.column_profiler --quantis 0.25 0.5 0.75 --saida perfil.csv
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import sys
+import time
+from pathlib import Path
+from typing import Iterable, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from src.focos_loader import focos_source, open_focos
+from src.utils import PROCESSED_DIR
+
+SUMMARY_NAME = "resumo_colunas.csv"
+
+# Distintos contados de forma exata até este total por coluna
+EXACT_LIMIT = 1 << 16
+
+# Registradores do HyperLogLog: 2**HLL_PRECISION (erro ~1.04/sqrt(m))
+HLL_PRECISION = 14
+
+# Erro relativo dos quantis estimados
+QUANTILE_ACCURACY = 0.01
+
+
+class HyperLogLog:
+    """Contador aproximado de distintos sobre hashes de 64 bits."""
+
+    __slots__ = ("precision", "registers")
+
+    def __init__(self, precision: int = HLL_PRECISION):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add_hashes(self, hashes: np.ndarray) -> None:
+        if len(hashes) == 0:
+            return
+        hashes = hashes.astype(np.uint64, copy=False)
+        tail_bits = 64 - self.precision
+        index = (hashes >> np.uint64(tail_bits)).astype(np.intp)
+        tail = hashes & np.uint64((1 << tail_bits) - 1)
+        # Posição do primeiro bit 1 da cauda: tail_bits - bit_length + 1
+        bit_length = np.frexp(tail.astype(np.float64))[1]
+        rank = (tail_bits - bit_length + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other: "HyperLogLog") -> None:
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.exp2(-self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            # Correção para cardinalidades pequenas (contagem linear)
+            return int(round(m * math.log(m / zeros)))
+        return int(round(raw))
+
+
+class QuantileSketch:
+    """Sketch de quantis com erro relativo fixo (buckets logarítmicos).
+
+    Cada valor cai no bucket ceil(log_gamma(|x|)), com sinal e zero à parte;
+    a memória depende da faixa de magnitudes, não do número de valores.
+    """
+
+    __slots__ = ("gamma", "log_gamma", "min_value", "positive", "negative", "zeros", "count")
+
+    def __init__(self, accuracy: float = QUANTILE_ACCURACY, min_value: float = 1e-9):
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.min_value = min_value
+        self.positive: dict[int, int] = {}
+        self.negative: dict[int, int] = {}
+        self.zeros = 0
+        self.count = 0
+
+    def _add_magnitudes(self, store: dict[int, int], values: np.ndarray) -> None:
+        if len(values) == 0:
+            return
+        buckets = np.ceil(np.log(values) / self.log_gamma).astype(np.int64)
+        keys, counts = np.unique(buckets, return_counts=True)
+        for key, count in zip(keys.tolist(), counts.tolist()):
+            store[key] = store.get(key, 0) + count
+
+    def add(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=np.float64)
+        self.count += len(values)
+        magnitude = np.abs(values)
+        small = magnitude < self.min_value
+        self.zeros += int(np.count_nonzero(small))
+        self._add_magnitudes(self.positive, magnitude[(values > 0) & ~small])
+        self._add_magnitudes(self.negative, magnitude[(values < 0) & ~small])
+
+    def merge(self, other: "QuantileSketch") -> None:
+        for store, other_store in ((self.positive, other.positive), (self.negative, other.negative)):
+            for key, count in other_store.items():
+                store[key] = store.get(key, 0) + count
+        self.zeros += other.zeros
+        self.count += other.count
+
+    def quantile(self, q: float) -> Optional[float]:
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        # Ordem crescente: negativos de maior magnitude, zeros, positivos
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return -self._bucket_value(key)
+        seen += self.zeros
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return self._bucket_value(key)
+        return self._bucket_value(max(self.positive)) if self.positive else 0.0
+
+    def _bucket_value(self, key: int) -> float:
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+
+def _mix64(values: np.ndarray) -> np.ndarray:
+    """Finalizador do splitmix64: espalha os bits de inteiros de 64 bits."""
+    z = values.astype(np.uint64, copy=True)
+    z ^= z >> np.uint64(30)
+    z *= np.uint64(0xBF58476D1CE4E5B9)
+    z ^= z >> np.uint64(27)
+    z *= np.uint64(0x94D049BB133111EB)
+    z ^= z >> np.uint64(31)
+    return z
+
+
+def _hash_strings(values: pa.Array) -> np.ndarray:
+    """Hash polinomial dos bytes de cada string, direto dos buffers Arrow.
+
+    Um só cálculo para qualquer lote (strings de largura fixa ou não): o
+    mesmo texto precisa ter o mesmo hash em todos os lotes.
+    """
+    if not (pa.types.is_string(values.type) or pa.types.is_large_string(values.type)):
+        values = values.cast(pa.large_string())
+    offset_type = np.int64 if pa.types.is_large_string(values.type) else np.int32
+    _, offsets_buffer, data_buffer = values.buffers()
+    offsets = np.frombuffer(offsets_buffer, dtype=offset_type)[values.offset:values.offset + len(values) + 1]
+    start = int(offsets[0])
+    offsets = offsets.astype(np.int64) - start
+    data = np.frombuffer(data_buffer, dtype=np.uint8) if data_buffer is not None else np.zeros(0, np.uint8)
+    data = data[start:start + offsets[-1]]
+    lengths = np.diff(offsets)
+    # Peso P**k pela posição do byte dentro da própria string (mod 2**64)
+    position = np.arange(offsets[-1], dtype=np.int64) - np.repeat(offsets[:-1], lengths)
+    powers = np.cumprod(np.full(int(lengths.max(initial=0)) + 1, 0x100000001B3, dtype=np.uint64))
+    terms = data.astype(np.uint64) * powers[position]
+    cumulative = np.concatenate([np.zeros(1, np.uint64), np.cumsum(terms, dtype=np.uint64)])
+    sums = cumulative[offsets[1:]] - cumulative[offsets[:-1]]
+    return _mix64(sums ^ lengths.astype(np.uint64))
+
+
+def _hash_values(values: pa.Array) -> np.ndarray:
+    """Hashes de 64 bits dos valores (mesmo valor → mesmo hash entre lotes)."""
+    kind = values.type
+    if pa.types.is_string(kind) or pa.types.is_large_string(kind) or pa.types.is_string_view(kind):
+        return _hash_strings(values)
+    if pa.types.is_temporal(kind):
+        values = values.cast(pa.int64())
+    array = values.to_numpy(zero_copy_only=False)
+    if array.dtype.kind == "f":
+        # -0.0 e 0.0 contam como o mesmo valor
+        return _mix64((array.astype(np.float64) + 0.0).view(np.uint64))
+    if array.dtype.kind in "iub":
+        return _mix64(array.astype(np.int64).view(np.uint64))
+    return pd.util.hash_array(np.asarray(array, dtype=object), categorize=False)
+
+
+class ColumnStats:
+    """Acumulador das estatísticas de uma coluna."""
+
+    def __init__(self, name: str, dtype: str, numeric: bool, exact: bool, quantiles: bool):
+        self.name = name
+        self.dtype = dtype
+        self.numeric = numeric
+        self.exact = exact
+        self.rows = 0
+        self.missing = 0
+        self.min = None
+        self.max = None
+        self.sketch = QuantileSketch() if quantiles and numeric else None
+        # Distintos exatos até EXACT_LIMIT; acima disso, `hll` (se não `exact`)
+        self.hll: Optional[HyperLogLog] = None
+        self._uniques: list[pa.Array] = []
+        self._n_uniques = 0
+        self._dense = False
+
+    def update(self, array: Union[pa.Array, pa.ChunkedArray]) -> None:
+        if isinstance(array, pa.ChunkedArray):
+            # Blocos de uma Table podem ter dicionários diferentes
+            for chunk in array.chunks:
+                self.update(chunk)
+            return
+        self.rows += len(array)
+        self.missing += array.null_count
+        values = pc.drop_null(array) if array.null_count else array
+        if pa.types.is_floating(values.type):
+            is_nan = pc.is_nan(values)
+            n_nan = pc.sum(is_nan).as_py() or 0
+            if n_nan:
+                self.missing += n_nan
+                values = pc.filter(values, pc.invert(is_nan))
+        if len(values) == 0:
+            return
+
+        if pa.types.is_dictionary(values.type):
+            # Distintos do lote = entradas do dicionário usadas
+            distinct = values.dictionary.take(pc.unique(values.indices))
+        elif self.hll is not None or self._dense:
+            # Coluna de alta cardinalidade: o unique por lote quase não reduz nada
+            distinct = values
+        else:
+            distinct = pc.unique(values)
+        self._track_distinct(distinct)
+
+        if self.numeric:
+            bounds = pc.min_max(values)
+            low, high = bounds["min"].as_py(), bounds["max"].as_py()
+            self.min = low if self.min is None else min(self.min, low)
+            self.max = high if self.max is None else max(self.max, high)
+            if self.sketch is not None:
+                self.sketch.add(np.asarray(values.to_numpy(zero_copy_only=False), dtype=np.float64))
+
+    def _track_distinct(self, distinct: pa.Array) -> None:
+        if self.hll is not None:
+            self.hll.add_hashes(_hash_values(distinct))
+            return
+        self._uniques.append(distinct)
+        self._n_uniques += len(distinct)
+        if self._dense or self._n_uniques <= EXACT_LIMIT:
+            return
+        merged = pc.unique(pa.chunked_array(self._uniques, type=distinct.type))
+        self._uniques, self._n_uniques = [merged], len(merged)
+        if len(merged) <= EXACT_LIMIT:
+            return
+        if self.exact:
+            # Guarda os lotes inteiros e conta os distintos uma vez só, no fim
+            self._dense = True
+        else:
+            # Acima do limite vale só o HyperLogLog, a partir dos distintos já vistos
+            self.hll = HyperLogLog()
+            self.hll.add_hashes(_hash_values(merged))
+            self._uniques = []
+
+    @property
+    def n_unique(self) -> int:
+        if self.hll is not None:
+            # A estimativa pode passar do total de valores presentes
+            return min(self.hll.estimate(), self.rows - self.missing)
+        if not self._uniques:
+            return 0
+        return len(pc.unique(pa.chunked_array(self._uniques, type=self._uniques[0].type)))
+
+    @property
+    def n_unique_exact(self) -> bool:
+        return self.hll is None
+
+
+class ColumnProfiler:
+    """Perfil de todas as colunas de um schema, alimentado lote a lote."""
+
+    def __init__(self, schema: pa.Schema, exact: bool = False, quantiles: Sequence[float] = ()):
+        # Tipos como o pandas os materializa (`tipo` do resumo)
+        dtypes = schema.empty_table().to_pandas().dtypes
+        self.quantiles = tuple(quantiles)
+        self.columns = {
+            name: ColumnStats(
+                name,
+                str(dtypes[name]),
+                pd.api.types.is_numeric_dtype(dtypes[name]),
+                exact,
+                bool(self.quantiles),
+            )
+            for name in schema.names
+        }
+        self.rows = 0
+
+    def update(self, batch: Union[pa.RecordBatch, pa.Table]) -> None:
+        self.rows += batch.num_rows
+        for name, column in zip(batch.schema.names, batch.columns):
+            if name in self.columns:
+                self.columns[name].update(column)
+
+    def summary(self) -> pd.DataFrame:
+        """Tabela no formato de `resumo_colunas.csv` (mais os quantis pedidos)."""
+        info_list = []
+        for stats in self.columns.values():
+            row = {
+                "coluna": stats.name,
+                "tipo": stats.dtype,
+                "n_missing": stats.missing,
+                "pct_missing": round(stats.missing / self.rows * 100, 2),
+                "n_unique": stats.n_unique,
+                "min": stats.min,
+                "max": stats.max,
+            }
+            for q in self.quantiles:
+                row[f"p{q * 100:g}"] = stats.sketch.quantile(q) if stats.sketch is not None else None
+            info_list.append(row)
+        return pd.DataFrame(info_list)
+
+
+def profile_batches(
+    batches: Iterable[Union[pa.RecordBatch, pa.Table]],
+    schema: pa.Schema,
+    exact: bool = False,
+    quantiles: Sequence[float] = (),
+) -> ColumnProfiler:
+    """Perfil de uma sequência de lotes com o `schema` dado."""
+    profiler = ColumnProfiler(schema, exact, quantiles)
+    for batch in batches:
+        profiler.update(batch)
+    return profiler
+
+
+def profile_focos(
+    processed_dir: Path = PROCESSED_DIR,
+    exact: bool = False,
+    quantiles: Sequence[float] = (),
+) -> ColumnProfiler:
+    """Perfil da saída da ingestão, lida em lotes (sem materializar em pandas)."""
+    dataset = open_focos(processed_dir)
+    return profile_batches(dataset.to_batches(), dataset.schema, exact, quantiles)
+
+
+def write_summary(profiler: ColumnProfiler, processed_dir: Path = PROCESSED_DIR) -> Path:
+    """Grava o perfil como `resumo_colunas.csv` e retorna o caminho."""
+    output_path = processed_dir / SUMMARY_NAME
+    profiler.summary().to_csv(output_path, index=False)
+    return output_path
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Perfil das colunas da saída da ingestão em uma passada")
+    parser.add_argument(
+        "--exato", action="store_true",
+        help="Conta distintos de forma exata em todas as colunas (sem HyperLogLog)",
+    )
+    parser.add_argument(
+        "--quantis", type=float, nargs="+", default=[],
+        help="Quantis a estimar nas colunas numéricas (ex.: 0.25 0.5 0.75)",
+    )
+    parser.add_argument(
+        "--saida", type=Path, default=None,
+        help=f"CSV de saída (padrão: {SUMMARY_NAME} na pasta processada)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    args = parse_args(argv)
+    try:
+        source = focos_source(PROCESSED_DIR)
+        start = time.perf_counter()
+        profiler = profile_focos(PROCESSED_DIR, args.exato, args.quantis)
+        if args.saida is None:
+            output_path = write_summary(profiler, PROCESSED_DIR)
+        else:
+            output_path = args.saida
+            profiler.summary().to_csv(output_path, index=False)
+        elapsed = time.perf_counter() - start
+        print(f"✓ {output_path.name}: {len(profiler.columns)} colunas, {profiler.rows:,} linhas de {source.name} "
+              f"em {elapsed:.2f}s")
+        approximate = [stats.name for stats in profiler.columns.values() if not stats.n_unique_exact]
+        if approximate:
+            print(f"  n_unique aproximado (HyperLogLog): {', '.join(approximate)}")
+        return 0
+    except Exception as e:
+        print(f"✗ Erro: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
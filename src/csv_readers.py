@@ -0,0 +1,286 @@
+"""
+Leitores de CSV - Backends plugáveis para os arquivos de focos
+
+Este módulo:
+- Detecta o encoding (UTF-8 ou latin1) a partir de uma amostra de bytes,
+  antes de qualquer parsing
+- Lê o CSV com o backend escolhido, projetando as colunas e fixando os
+  tipos declarados em `src.schema` (float32, category, int64):
+    - "pandas": engine C do pandas (`usecols`/`dtype`)
+    - "pyarrow": leitor multithread do `pyarrow.csv` (`include_columns`/
+      `column_types`)
+- Só reinterpreta o arquivo como latin1 se a amostra enganar (bytes
+  inválidos depois da amostra), o que evita o parsing duplo do fallback
+- Opcionalmente (`countries`), descarta na leitura os focos de outros
+  países: os arquivos AMS cobrem a América do Sul inteira. O filtro é
+  avaliado uma vez por país distinto (sem acentos/caixa) e aplicado pelos
+  códigos; no pyarrow, antes da conversão para pandas
+
+Uso:
+    from src.csv_readers import read_csv
+    df, encoding, n_read = read_csv(path, backend="pyarrow")
+    df, encoding, n_read = read_csv(path, columns=None)  # todas as colunas
+    df, encoding, n_read = read_csv(path, countries=["Brasil"])
+"""
+
+from __future__ import annotations
+
+import codecs
+import unicodedata
+from pathlib import Path
+from typing import Any, Callable, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+
+from src.instrumentation import stage
+from src.schema import DEFAULT_COLUMNS, EXTRA_ARROW_TYPE, EXTRA_DTYPE, resolve_columns
+
+ENCODING_SAMPLE_BYTES = 1 << 20
+DEFAULT_BACKEND = "pandas"
+COUNTRY_COLUMN = "pais"
+
+# Mesmos marcadores de nulo padrão do pandas, para os backends concordarem
+NA_VALUES = [
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan",
+    "1.#IND", "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a",
+    "nan", "null",
+]
+
+
+def sniff_encoding(file_path: Path, sample_bytes: Optional[int] = ENCODING_SAMPLE_BYTES) -> str:
+    """Detecta o encoding (UTF-8 ou latin1) decodificando os bytes.
+
+    Com `sample_bytes`, só a amostra inicial é verificada (um caractere
+    multibyte cortado no fim da amostra não conta como erro). Com
+    `sample_bytes=None`, o arquivo inteiro é verificado em blocos — ainda
+    sem parsing, então é bem mais barato que reler o CSV.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    block_size = sample_bytes or 1 << 20
+    try:
+        with open(file_path, "rb") as fh:
+            if sample_bytes is not None:
+                decoder.decode(fh.read(sample_bytes))
+            else:
+                while block := fh.read(block_size):
+                    decoder.decode(block)
+                decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        return "latin1"
+    return "utf-8"
+
+
+def read_header(file_path: Path, encoding: str, sep: str = ",") -> list[str]:
+    """Lê apenas a linha de cabeçalho do CSV."""
+    with open(file_path, encoding=encoding, newline="") as fh:
+        header = fh.readline()
+    return [name.strip().strip('"') for name in header.rstrip("\r\n").split(sep)]
+
+
+def pandas_read_kwargs(
+    file_path: Path,
+    encoding: str,
+    columns: Optional[Iterable[str]] = DEFAULT_COLUMNS,
+    text_extras: bool = True,
+) -> dict[str, Any]:
+    """Argumentos `usecols`/`dtype` do pandas derivados do schema.
+
+    Com `text_extras=False`, as colunas fora do schema têm o tipo inferido.
+    """
+    resolved = resolve_columns(read_header(file_path, encoding), columns)
+    dtype = {actual: spec.dtype for actual, spec in resolved.items() if spec is not None}
+    if text_extras:
+        dtype.update({actual: EXTRA_DTYPE for actual, spec in resolved.items() if spec is None})
+    return {"usecols": list(resolved), "dtype": dtype}
+
+
+def country_key(name: str) -> str:
+    """Nome de país comparável: sem acentos, sem espaços nas pontas, sem caixa."""
+    decomposed = unicodedata.normalize("NFKD", str(name).strip())
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).casefold()
+
+
+def country_columns(
+    columns: Optional[Iterable[str]],
+    countries: Optional[Iterable[str]],
+) -> Optional[tuple[str, ...]]:
+    """Projeção acrescida de `pais` quando há filtro de países."""
+    if columns is None:
+        return None
+    columns = tuple(columns)
+    if countries and COUNTRY_COLUMN not in columns:
+        columns += (COUNTRY_COLUMN,)
+    return columns
+
+
+def _keep_codes(values: Iterable, countries: Iterable[str]) -> np.ndarray:
+    """Máscara por valor distinto, com uma posição extra (False) para os nulos."""
+    keys = {country_key(country) for country in countries}
+    keep = [value is not None and country_key(value) in keys for value in values]
+    return np.array([*keep, False], dtype=bool)
+
+
+def _country_field(names: Iterable[str]) -> str:
+    resolved = resolve_columns(names, [COUNTRY_COLUMN])
+    if not resolved:
+        raise ValueError("Coluna de país não encontrada (ex.: pais)")
+    return next(iter(resolved))
+
+
+def filter_countries(
+    df: pd.DataFrame,
+    countries: Iterable[str],
+    keep_column: bool = True,
+) -> pd.DataFrame:
+    """Mantém só as linhas dos países `countries` (linhas sem país saem).
+
+    A comparação ignora acentos e caixa ("Brasil", "BRASIL"). Sem
+    `keep_column`, a coluna de país é descartada depois do filtro.
+    """
+    column = _country_field(df.columns)
+    with stage("leitura.filtro_pais", df) as current:
+        values = df[column]
+        if not isinstance(values.dtype, pd.CategoricalDtype):
+            values = values.astype("category")
+        keep = _keep_codes(values.cat.categories, countries)
+        mask = keep[values.cat.codes.to_numpy(np.int64)]
+        df = df[mask]
+        if keep_column:
+            df[column] = values[mask].cat.remove_unused_categories()
+        else:
+            df = df.drop(columns=column)
+        current.rows_out = df
+    return df
+
+
+def _filter_countries_table(
+    table: pa.Table,
+    countries: Iterable[str],
+    keep_column: bool = True,
+) -> pa.Table:
+    """`filter_countries()` sobre a tabela Arrow (coluna de dicionário)."""
+    column = _country_field(table.column_names)
+    with stage("leitura.filtro_pais", table) as current:
+        masks = []
+        for chunk in table.column(column).chunks:
+            keep = _keep_codes(chunk.dictionary.to_pylist(), countries)
+            codes = chunk.indices.fill_null(len(chunk.dictionary)).to_numpy()
+            masks.append(keep[codes])
+        table = table.filter(pa.chunked_array(masks, type=pa.bool_()))
+        if not keep_column:
+            table = table.drop_columns([column])
+        current.rows_out = table
+    return table
+
+
+def _keeps_country(columns: Optional[Iterable[str]]) -> bool:
+    return columns is None or COUNTRY_COLUMN in columns
+
+
+def read_csv_pandas(
+    file_path: Path,
+    encoding: str,
+    columns: Optional[Iterable[str]] = DEFAULT_COLUMNS,
+    countries: Optional[Iterable[str]] = None,
+    text_extras: bool = True,
+) -> tuple[pd.DataFrame, int]:
+    """Backend pandas (engine C) com projeção e tipos do schema.
+
+    Retorna o DataFrame e as linhas lidas do arquivo (antes do filtro de
+    países).
+    """
+    kwargs = pandas_read_kwargs(file_path, encoding, country_columns(columns, countries), text_extras)
+    df = pd.read_csv(file_path, encoding=encoding, sep=",", low_memory=False, **kwargs)
+    n_read = len(df)
+    if countries:
+        df = filter_countries(df, countries, _keeps_country(columns)).reset_index(drop=True)
+    return df, n_read
+
+
+def read_csv_pyarrow(
+    file_path: Path,
+    encoding: str,
+    columns: Optional[Iterable[str]] = DEFAULT_COLUMNS,
+    countries: Optional[Iterable[str]] = None,
+    text_extras: bool = True,
+) -> tuple[pd.DataFrame, int]:
+    """Backend Arrow (multithread) com projeção e tipos do schema.
+
+    O filtro de países roda na tabela Arrow: as linhas descartadas nem
+    chegam a ser convertidas para pandas. Retorna o DataFrame e as linhas
+    lidas do arquivo (antes do filtro).
+    """
+    resolved = resolve_columns(read_header(file_path, encoding), country_columns(columns, countries))
+    table = pacsv.read_csv(
+        file_path,
+        read_options=pacsv.ReadOptions(encoding=encoding, use_threads=True),
+        convert_options=pacsv.ConvertOptions(
+            column_types={
+                actual: EXTRA_ARROW_TYPE if spec is None else spec.arrow_type
+                for actual, spec in resolved.items()
+                if spec is not None or text_extras
+            },
+            include_columns=list(resolved),
+            null_values=NA_VALUES,
+            strings_can_be_null=True,
+        ),
+    )
+    n_read = table.num_rows
+    if countries:
+        table = _filter_countries_table(table, countries, _keeps_country(columns))
+    # Mesmo dtype "string" que o backend pandas recebe do schema
+    df = table.to_pandas(types_mapper={pa.string(): pd.StringDtype()}.get)
+    if countries and _keeps_country(columns):
+        # O dicionário Arrow filtrado ainda lista os países descartados
+        column = _country_field(df.columns)
+        df[column] = df[column].cat.remove_unused_categories()
+    return df, n_read
+
+
+BACKENDS: dict[str, Callable[..., tuple[pd.DataFrame, int]]] = {
+    "pandas": read_csv_pandas,
+    "pyarrow": read_csv_pyarrow,
+}
+
+
+def _is_decode_error(exc: Exception) -> bool:
+    if isinstance(exc, UnicodeDecodeError):
+        return True
+    return isinstance(exc, pa.ArrowInvalid) and "utf8" in str(exc).lower()
+
+
+def read_csv(
+    file_path: Path,
+    backend: str = DEFAULT_BACKEND,
+    encoding: Optional[str] = None,
+    columns: Optional[Iterable[str]] = DEFAULT_COLUMNS,
+    countries: Optional[Iterable[str]] = None,
+    text_extras: bool = True,
+) -> tuple[pd.DataFrame, str, int]:
+    """Lê um CSV com o backend escolhido.
+
+    Retorna o DataFrame, o encoding e as linhas lidas do arquivo (antes do
+    filtro de países; sem `countries`, o próprio `len(df)`).
+
+    `columns` são nomes canônicos do schema (resolvidos pelos aliases);
+    `None` mantém todas as colunas do arquivo, com as de fora do schema como
+    texto (ou com tipo inferido, se `text_extras=False`, para CSVs que não
+    são de focos). Com `countries`, só os focos desses países são devolvidos
+    (`pais` entra na leitura só para o filtro, se não estiver em `columns`).
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend desconhecido: {backend!r} (opções: {', '.join(BACKENDS)})")
+    reader = BACKENDS[backend]
+    encoding = encoding or sniff_encoding(file_path)
+    try:
+        df, n_read = reader(file_path, encoding, columns, countries, text_extras)
+    except (UnicodeDecodeError, pa.ArrowInvalid) as exc:
+        if encoding == "latin1" or not _is_decode_error(exc):
+            raise
+        # Bytes inválidos depois da amostra: única situação com releitura
+        encoding = "latin1"
+        df, n_read = reader(file_path, encoding, columns, countries, text_extras)
+    return df, encoding, n_read
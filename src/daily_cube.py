@@ -0,0 +1,126 @@
+"""
+Cubo diário de focos - Agregado pré-calculado na ingestão
+
+Este módulo:
+- Agrega os focos em contagens por dia × bioma × UF × município
+  (dimensões `category`, gravadas como dicionário/inteiros no Parquet)
+- Grava/carrega o cubo ao lado do Parquet consolidado
+- Responde qualquer rollup (dia, dia×bioma, ano×mês, município, ...) com
+  `count_by()`, que aceita o cubo, os dados por foco ou uma consulta do
+  motor DuckDB (`query_engine.FocosQuery`), e filtra ausentes com
+  `drop_missing()`
+
+Uso:
+    from src.daily_cube import count_by, load_cube
+    cube = load_cube(PROCESSED_DIR)
+    by_day_bioma = count_by(cube, ["day", "bioma"])
+"""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+CUBE_NAME = "focos_cubo_diario.parquet"
+CUBE_DIMENSIONS = ("day", "bioma", "estado", "municipio")
+COUNT_COL = "focos"
+
+
+def _with_time_keys(data: pd.DataFrame, keys: Sequence[str]) -> pd.DataFrame:
+    """Deriva do `day` as chaves de tempo pedidas que não existem no frame."""
+    missing = [key for key in ("year", "month", "year_month") if key in keys and key not in data.columns]
+    if not missing:
+        return data
+    day = pd.to_datetime(data["day"])
+    data = data.assign(**{
+        key: day.dt.to_period("M") if key == "year_month" else getattr(day.dt, key)
+        for key in missing
+    })
+    return data
+
+
+def count_by(data: pd.DataFrame, keys: Sequence[str]) -> pd.DataFrame:
+    """Contagem de focos por `keys`, a partir do cubo ou dos dados por foco.
+
+    No cubo soma a coluna `focos`; nos dados por foco conta linhas. As chaves
+    `year`, `month` e `year_month` (Period mensal) são derivadas de `day`
+    quando não existem. Retorna as chaves como colunas mais `focos`.
+    """
+    keys = list(keys)
+    if not isinstance(data, pd.DataFrame):
+        # Consulta preguiçosa (ex.: `query_engine.FocosQuery`): agrega no motor
+        return data.count_by(keys)
+    data = _with_time_keys(data, keys)
+    grouped = data.groupby(keys, observed=True, sort=True)
+    if COUNT_COL in data.columns:
+        counts = grouped[COUNT_COL].sum()
+    else:
+        counts = grouped.size()
+    return counts.rename(COUNT_COL).reset_index()
+
+
+def drop_missing(data: pd.DataFrame, column: str, missing: Iterable[str] = ()) -> pd.DataFrame:
+    """Linhas com `column` preenchida e fora de `missing` (ex.: o texto "Nan").
+
+    Em uma consulta preguiçosa, só acrescenta o filtro.
+    """
+    if not isinstance(data, pd.DataFrame):
+        return data.drop_missing(column, missing)
+    mask = data[column].notna()
+    missing = list(missing)
+    if missing:
+        mask &= ~data[column].isin(missing)
+    return data[mask]
+
+
+def build_cube(df: pd.DataFrame) -> pd.DataFrame:
+    """Agrega os dados por foco no cubo dia × bioma × UF × município."""
+    dims = [dim for dim in CUBE_DIMENSIONS if dim in df.columns]
+    cube = df.groupby(dims, observed=True, sort=True, dropna=False).size().rename(COUNT_COL)
+    cube = cube.reset_index()
+    cube["day"] = pd.to_datetime(cube["day"])
+    cube[COUNT_COL] = cube[COUNT_COL].astype(np.int32)
+    return cube
+
+
+def combine_cubes(cubes: Iterable[pd.DataFrame]) -> pd.DataFrame:
+    """Soma cubos parciais (ex.: um por bloco do modo streaming)."""
+    cubes = list(cubes)
+    if not cubes:
+        return pd.DataFrame(columns=[*CUBE_DIMENSIONS, COUNT_COL])
+    merged = pd.concat(cubes, ignore_index=True)
+    dims = [dim for dim in CUBE_DIMENSIONS if dim in merged.columns]
+    for dim in dims:
+        # Categorias diferentes entre blocos viram objeto no concat
+        if dim != "day" and not isinstance(merged[dim].dtype, pd.CategoricalDtype):
+            merged[dim] = merged[dim].astype("category")
+    cube = merged.groupby(dims, observed=True, sort=True, dropna=False)[COUNT_COL].sum()
+    cube = cube.reset_index()
+    cube[COUNT_COL] = cube[COUNT_COL].astype(np.int32)
+    return cube
+
+
+def write_cube(cube: pd.DataFrame, processed_dir: Path) -> Path:
+    """Grava o cubo (temporário + rename) e retorna o caminho."""
+    output_path = processed_dir / CUBE_NAME
+    tmp_path = output_path.with_suffix(".parquet.tmp")
+    cube.to_parquet(tmp_path, engine="pyarrow", compression="snappy", index=False)
+    os.replace(tmp_path, output_path)
+    print(f"Cubo diário: {output_path.name} ({len(cube):,} células)")
+    return output_path
+
+
+def load_cube(processed_dir: Path, sources: Iterable[Path] = ()) -> Optional[pd.DataFrame]:
+    """Carrega o cubo; None se não existir ou for mais antigo que `sources`."""
+    cube_path = processed_dir / CUBE_NAME
+    if not cube_path.exists():
+        return None
+    cube_mtime = cube_path.stat().st_mtime_ns
+    if any(path.exists() and path.stat().st_mtime_ns > cube_mtime for path in sources):
+        print(f"  ⚠ {cube_path.name} desatualizado, usando os dados por foco")
+        return None
+    return pd.read_parquet(cube_path)
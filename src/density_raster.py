@@ -0,0 +1,320 @@
+"""
+Raster de densidade de focos - Grade por dia, mês ou ano
+
+Este módulo:
+- Acumula os focos em uma pilha de grades (período × linha × coluna) com
+  resolução configurável, em uma passada vetorizada: cada foco vira um
+  índice linear período × célula e as contagens saem de `np.unique`, sem
+  laço por período nem matriz densa temporária
+- Grava a pilha como `.npy` mapeado em memória (`np.lib.format.open_memmap`)
+  com um JSON de metadados (grade, período inicial, focos por dia incluído)
+- Acrescenta dias novos à pilha existente sem refazer o histórico: só os
+  períodos com dias novos ou alterados (ex.: um dia ingerido pela metade
+  que ganhou focos) são refeitos; a pilha cresce com folga quando precisa
+- Ignora focos sem coordenadas (lat/lon nulos), que não têm célula
+- Renderiza mapas de calor PNG de um período ou do total de um intervalo
+
+Uso:
+    python -m src.density_raster --periodo month --resolucao 0.25
+    python -m src.density_raster --periodo day --adicionar
+    python -m src.density_raster --periodo year --png todos
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+from matplotlib.colors import LogNorm
+
+from src.focos_loader import read_processed
+from src.pipeline_ingestao import LAT_MAX, LAT_MIN, LON_MAX, LON_MIN
+from src.spatial_index import Grid
+from src.utils import PROCESSED_DIR, PROJECT_ROOT
+
+DENSITY_DIR = PROCESSED_DIR / "densidade"
+FIGS_DIR = PROJECT_ROOT / "figs" / "densidade"
+
+PERIODS = ("day", "month", "year")
+DEFAULT_RESOLUTION = 0.25
+
+# Unidade datetime64 de cada período (ordinais contados desde 1970)
+PERIOD_UNITS = {"day": "D", "month": "M", "year": "Y"}
+
+# Folga ao criar/crescer a pilha, em períodos (evita recópias a cada dia novo)
+GROWTH_SLACK = {"day": 366, "month": 12, "year": 1}
+
+
+def period_ordinals(day_idx: np.ndarray, period: str) -> np.ndarray:
+    """Converte dias desde 1970-01-01 em ordinais do período (dia/mês/ano)."""
+    days = np.asarray(day_idx).astype("datetime64[D]")
+    return days.astype(f"datetime64[{PERIOD_UNITS[period]}]").astype(np.int64)
+
+
+def period_label(ordinal: int, period: str) -> str:
+    return str(np.datetime64(int(ordinal), PERIOD_UNITS[period]))
+
+
+def stack_paths(period: str, resolution: float, density_dir: Path = DENSITY_DIR) -> tuple[Path, Path]:
+    """Caminhos da pilha (.npy) e dos metadados (.json)."""
+    stem = f"densidade_{period}_{resolution:g}".replace(".", "p")
+    return density_dir / f"{stem}.npy", density_dir / f"{stem}.json"
+
+
+class DensityStack:
+    """Pilha de grades de contagem (uint32) mapeada em memória."""
+
+    def __init__(self, path: Path, meta: dict, counts: np.memmap):
+        self.path = path
+        self.meta = meta
+        self.counts = counts
+
+    @property
+    def grid(self) -> Grid:
+        return Grid(*self.meta["grade"])
+
+    @property
+    def period(self) -> str:
+        return self.meta["periodo"]
+
+    @property
+    def n_periods(self) -> int:
+        return self.meta["n_periodos"]
+
+    @property
+    def ordinals(self) -> np.ndarray:
+        return self.meta["primeiro"] + np.arange(self.n_periods)
+
+    def labels(self) -> list[str]:
+        return [period_label(ordinal, self.period) for ordinal in self.ordinals]
+
+    @classmethod
+    def create(cls, path: Path, grid: Grid, period: str, first: int, capacity: int) -> "DensityStack":
+        path.parent.mkdir(parents=True, exist_ok=True)
+        counts = np.lib.format.open_memmap(
+            path, mode="w+", dtype=np.uint32, shape=(capacity, grid.n_lat, grid.n_lon)
+        )
+        meta = {
+            "periodo": period,
+            "grade": [grid.lat_min, grid.lon_min, grid.cell_deg, grid.n_lat, grid.n_lon],
+            "primeiro": int(first),
+            "n_periodos": 0,
+            "focos_por_dia": {},
+        }
+        return cls(path, meta, counts)
+
+    @classmethod
+    def open(cls, path: Path, mode: str = "r+") -> "DensityStack":
+        meta = json.loads(path.with_suffix(".json").read_text(encoding="utf-8"))
+        return cls(path, meta, np.load(path, mmap_mode=mode))
+
+    def save_meta(self) -> None:
+        self.counts.flush()
+        meta_path = self.path.with_suffix(".json")
+        tmp_path = meta_path.with_suffix(".json.tmp")
+        tmp_path.write_text(json.dumps(self.meta), encoding="utf-8")
+        os.replace(tmp_path, meta_path)
+
+    def _reserve(self, first: int, last: int) -> None:
+        """Garante espaço para os ordinais [first, last], realocando se preciso."""
+        start = min(first, self.meta["primeiro"]) if self.n_periods else first
+        end = max(last, self.meta["primeiro"] + self.n_periods - 1) if self.n_periods else last
+        if not self.n_periods:
+            self.meta["primeiro"] = start
+        if start >= self.meta["primeiro"] and end - start < len(self.counts):
+            self.meta["n_periodos"] = max(self.n_periods, end - self.meta["primeiro"] + 1)
+            return
+
+        # Não cabe: nova pilha com folga, copiando a atual na posição certa
+        capacity = end - start + 1 + GROWTH_SLACK[self.period]
+        tmp_path = self.path.with_suffix(".tmp.npy")
+        grown = np.lib.format.open_memmap(
+            tmp_path, mode="w+", dtype=np.uint32, shape=(capacity, *self.counts.shape[1:])
+        )
+        shift = self.meta["primeiro"] - start
+        grown[shift:shift + self.n_periods] = self.counts[:self.n_periods]
+        grown.flush()
+        del grown
+        self.counts = None
+        os.replace(tmp_path, self.path)
+        self.counts = np.load(self.path, mmap_mode="r+")
+        self.meta["primeiro"] = start
+        self.meta["n_periodos"] = end - start + 1
+
+    def add(self, lat: np.ndarray, lon: np.ndarray, day_idx: np.ndarray) -> int:
+        """Acumula focos na pilha, refazendo os períodos com dias novos ou alterados.
+
+        Os focos passados devem ser todos os dos dias que aparecem neles (ex.:
+        a saída inteira da ingestão). Um dia é novo ou alterado quando seu
+        total de focos difere do registrado em `focos_por_dia` (ex.: um dia
+        ingerido pela metade); o período dele é zerado e recebe de novo os
+        focos de todos os seus dias. Períodos sem mudança não são tocados.
+        Retorna quantos focos foram somados.
+        """
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        day_idx = np.asarray(day_idx, dtype=np.int64)
+        located = np.isfinite(lat) & np.isfinite(lon)
+        lat, lon, day_idx = lat[located], lon[located], day_idx[located]
+
+        known = self.meta.get("focos_por_dia", {})
+        days, per_day = np.unique(day_idx, return_counts=True)
+        changed = np.array([known.get(str(day)) != n for day, n in zip(days.tolist(), per_day.tolist())], dtype=bool)
+        if not changed.any():
+            return 0
+        ordinals = period_ordinals(day_idx, self.period)
+        stale = np.unique(period_ordinals(days[changed], self.period))
+        redo = np.isin(ordinals, stale)
+        lat, lon, ordinals = lat[redo], lon[redo], ordinals[redo]
+
+        self._reserve(int(stale.min()), int(stale.max()))
+        first = self.meta["primeiro"]
+        grid = self.grid
+        self.counts[stale - first] = 0
+        flat = (ordinals - first) * grid.n_cells + grid.cell_ids(lat, lon)
+        cells, counts = np.unique(flat, return_counts=True)
+        plane = self.counts.reshape(-1)
+        plane[cells] += counts.astype(np.uint32)
+
+        known.update(
+            (str(day), n) for day, n in zip(days[changed].tolist(), per_day[changed].tolist())
+        )
+        self.meta["focos_por_dia"] = known
+        self.meta.pop("dias", None)
+        self.save_meta()
+        return int(redo.sum())
+
+    def total(self, start: Optional[str] = None, end: Optional[str] = None) -> np.ndarray:
+        """Soma das grades no intervalo inclusivo de rótulos (ex.: "2024-08")."""
+        first = self.meta["primeiro"]
+        lo = 0 if start is None else int(np.datetime64(start, PERIOD_UNITS[self.period]).astype(np.int64)) - first
+        hi = self.n_periods if end is None else int(np.datetime64(end, PERIOD_UNITS[self.period]).astype(np.int64)) - first + 1
+        lo, hi = max(lo, 0), min(hi, self.n_periods)
+        return self.counts[lo:hi].sum(axis=0, dtype=np.uint64)
+
+
+def build_stack(
+    period: str = "month",
+    resolution: float = DEFAULT_RESOLUTION,
+    processed_dir: Path = PROCESSED_DIR,
+    density_dir: Path = DENSITY_DIR,
+    append: bool = False,
+) -> DensityStack:
+    """Monta (ou, com `append`, completa) a pilha a partir da saída da ingestão."""
+    path, _ = stack_paths(period, resolution, density_dir)
+    points = read_processed(processed_dir, columns=["lat", "lon", "day", "day_idx"])
+    if "day_idx" in points.columns:
+        day_idx = points["day_idx"].to_numpy()
+    else:
+        day_idx = pd.to_datetime(points["day"]).to_numpy().astype("datetime64[D]").astype(np.int64)
+
+    if append and path.exists():
+        stack = DensityStack.open(path)
+    else:
+        grid = Grid.covering(LAT_MIN, LAT_MAX, LON_MIN, LON_MAX, resolution)
+        ordinals = period_ordinals(day_idx, period)
+        first = int(ordinals.min()) if len(ordinals) else 0
+        capacity = (int(ordinals.max()) - first + 1 if len(ordinals) else 0) + GROWTH_SLACK[period]
+        tmp_path = path.with_suffix(".tmp.npy")
+        stack = DensityStack.create(tmp_path, grid, period, first, capacity)
+        stack.counts.flush()
+        os.replace(tmp_path, path)
+        stack.path = path
+    added = stack.add(points["lat"].to_numpy(), points["lon"].to_numpy(), day_idx)
+    stack.save_meta()
+    print(
+        f"Pilha {path.name}: {stack.n_periods} período(s) × {stack.grid.n_lat}×{stack.grid.n_lon} células, "
+        f"{added:,} foco(s) acrescentado(s)"
+    )
+    return stack
+
+
+def render_heatmap(grid: Grid, counts: np.ndarray, title: str, output_path: Path) -> Path:
+    """Mapa de calor (escala log) de uma grade de contagens."""
+    extent = [
+        grid.lon_min, grid.lon_min + grid.n_lon * grid.cell_deg,
+        grid.lat_min, grid.lat_min + grid.n_lat * grid.cell_deg,
+    ]
+    masked = np.ma.masked_equal(np.asarray(counts, dtype=np.float64), 0)
+    fig, ax = plt.subplots(figsize=(9, 8))
+    vmax = max(float(masked.max()) if masked.count() else 1.0, 1.0)
+    image = ax.imshow(
+        masked, origin="lower", extent=extent, cmap="YlOrRd",
+        norm=LogNorm(vmin=1, vmax=vmax), interpolation="nearest",
+    )
+    fig.colorbar(image, ax=ax, shrink=0.8, label=f"Focos por célula ({grid.cell_deg:g}°)")
+    ax.set_title(title, fontsize=13, fontweight="bold")
+    ax.set_xlabel("Longitude")
+    ax.set_ylabel("Latitude")
+    ax.set_aspect("equal")
+    ax.grid(True, alpha=0.3)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    fig.savefig(output_path, dpi=150, bbox_inches="tight")
+    plt.close(fig)
+    return output_path
+
+
+def render_stack(stack: DensityStack, which: str = "total", figs_dir: Path = FIGS_DIR) -> list[Path]:
+    """PNGs da pilha: "total" (período inteiro), "ultimo" ou "todos" os períodos."""
+    resolution = f"{stack.grid.cell_deg:g}".replace(".", "p")
+    outputs = []
+    if which == "total":
+        labels = stack.labels()
+        title = f"Densidade de focos: {labels[0]} a {labels[-1]}" if labels else "Densidade de focos"
+        path = figs_dir / f"densidade_total_{stack.period}_{resolution}.png"
+        outputs.append(render_heatmap(stack.grid, stack.total(), title, path))
+    else:
+        positions = range(stack.n_periods) if which == "todos" else [stack.n_periods - 1]
+        for pos in positions:
+            label = period_label(stack.meta["primeiro"] + pos, stack.period)
+            path = figs_dir / f"densidade_{stack.period}_{label}_{resolution}.png"
+            outputs.append(render_heatmap(stack.grid, stack.counts[pos], f"Densidade de focos: {label}", path))
+    for path in outputs:
+        print(f"✓ {path.name}")
+    return outputs
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Raster de densidade de focos")
+    parser.add_argument("--periodo", choices=PERIODS, default="month", help="Granularidade da pilha")
+    parser.add_argument(
+        "--resolucao", type=float, default=DEFAULT_RESOLUTION,
+        help=f"Tamanho da célula em graus (padrão: {DEFAULT_RESOLUTION:g})",
+    )
+    parser.add_argument(
+        "--adicionar", action="store_true",
+        help="Acrescenta à pilha existente só os dias ainda não incluídos",
+    )
+    parser.add_argument(
+        "--png", choices=("total", "ultimo", "todos", "nenhum"), default="total",
+        help="Quais mapas de calor renderizar (padrão: total)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Execução principal."""
+    args = parse_args(argv)
+    print("=== Raster de densidade de focos ===\n")
+    try:
+        stack = build_stack(args.periodo, args.resolucao, append=args.adicionar)
+        if args.png != "nenhum":
+            render_stack(stack, args.png)
+        return 0
+
+    except Exception as e:
+        print(f"\n✗ Erro: {e}", file=sys.stderr)
+        import traceback
+        traceback.print_exc()
+        return 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,23 +1,476 @@
 """
-Módulo de download/ingestão do dataset escolhido.
-Preencha com a lógica de download, leitura e salvamento em data/raw ou data/processed.
+Download dos CSVs anuais do INPE - Focos de queimadas (AMS_sat_ref)
+
+Este módulo:
+- Lista o diretório `/queimadas/focos/csv/anual/AMS_sat_ref/` do servidor de
+  dados do INPE e seleciona os arquivos `focos_ams_ref_YYYY.csv` (ou `.zip`)
+- Baixa até `--conexoes` arquivos ao mesmo tempo (uma conexão por thread)
+- Grava em streaming direto no disco (`<arquivo>.part`, blocos de 1 MiB),
+  calculando o SHA-256 durante a escrita, sem manter o arquivo em memória
+- Retoma downloads interrompidos com `Range` + `If-Range`: se o arquivo mudou
+  no servidor desde a interrupção, o servidor devolve o conteúdo inteiro
+- Pula arquivos inalterados com GET condicional (`If-None-Match` com o ETag,
+  ou `If-Modified-Since`), a partir do manifesto `.downloads.json`
+- Extrai os CSVs de arquivos `.zip` em streaming
+- Entrega cada arquivo concluído a um callback (`on_complete`); com
+  `--ingerir`, cada CSV é ingerido no dataset incremental assim que chega,
+  com os mesmos `--pais` e `--limites` da ingestão
+
+Uso:
+    python -m src.download
+    python -m src.download --anos 2023 2024 --conexoes 2
+    python -m src.download --ingerir
+    python -m src.download --ingerir --pais --limites
+    python -m src.download --url http://localhost:8000/queimadas/focos/csv/anual/AMS_sat_ref/
 """
 
+from __future__ import annotations
+
+import argparse
+import hashlib
+import http.client
+import json
+import os
+import re
+import shutil
+import sys
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from functools import partial
+from html.parser import HTMLParser
 from pathlib import Path
+from typing import Callable, Optional, Sequence
+from urllib.error import HTTPError, URLError
+from urllib.parse import unquote, urljoin, urlsplit
+from urllib.request import Request, urlopen
+
+from src.instrumentation import RunReport, add_report_arguments, stage, write_reports
+from src.utils import DATA_DIR
+
+BASE_URL = "https://dataserver-coids.inpe.br/queimadas/queimadas/focos/csv/anual/AMS_sat_ref/"
+# Mesmo diretório lido por `pipeline_ingestao`
+RAW_DIR = DATA_DIR / "raw" / "queimadas"
+# Mesmo diretório de `geo_backfill` (`--limites` sem caminho)
+BOUNDARIES_DIR = DATA_DIR / "limites"
+FILE_PATTERN = re.compile(r"^focos_ams_ref_(\d{4})\.(csv|zip)$")
+DOWNLOAD_MANIFEST = ".downloads.json"
+
+DEFAULT_CONNECTIONS = 4
+CHUNK_SIZE = 1 << 20
+TIMEOUT_S = 60
+MAX_ATTEMPTS = 5
+BACKOFF_S = 1.0
+USER_AGENT = "focos-queimadas-download/1.0"
+# Erros HTTP que valem nova tentativa (demais, como 404, falham direto)
+RETRY_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+class IncompleteDownload(IOError):
+    """Conexão encerrada antes do fim; o `.part` fica para a próxima tentativa."""
+
+
+@dataclass(frozen=True)
+class RemoteFile:
+    name: str
+    url: str
+    year: int
+
+
+@dataclass
+class DownloadResult:
+    """Arquivo concluído: `paths` são os CSVs prontos para a ingestão."""
+
+    name: str
+    status: str  # "baixado", "retomado" ou "inalterado"
+    paths: list[Path]
+    bytes: int = 0
+    seconds: float = 0.0
+    entry: dict = field(default_factory=dict)
+
+
+class _LinkParser(HTMLParser):
+    def __init__(self) -> None:
+        super().__init__()
+        self.links: list[str] = []
+
+    def handle_starttag(self, tag, attrs) -> None:
+        href = dict(attrs).get("href")
+        if tag == "a" and href:
+            self.links.append(href)
+
+
+def _open(url: str, headers: Optional[dict] = None, timeout: float = TIMEOUT_S):
+    request = Request(url, headers={"User-Agent": USER_AGENT, **(headers or {})})
+    return urlopen(request, timeout=timeout)
+
+
+def list_remote_files(
+    base_url: str = BASE_URL,
+    years: Optional[Sequence[int]] = None,
+    timeout: float = TIMEOUT_S,
+) -> list[RemoteFile]:
+    """Arquivos anuais do índice do diretório, um por ano (CSV antes do zip)."""
+    if not base_url.endswith("/"):
+        base_url += "/"
+    with _open(base_url, timeout=timeout) as response:
+        charset = response.headers.get_content_charset() or "utf-8"
+        parser = _LinkParser()
+        parser.feed(response.read().decode(charset, errors="replace"))
+
+    by_year: dict[int, RemoteFile] = {}
+    for href in parser.links:
+        name = unquote(urlsplit(href).path.rsplit("/", 1)[-1])
+        match = FILE_PATTERN.match(name)
+        if match is None:
+            continue
+        year = int(match.group(1))
+        if years and year not in years:
+            continue
+        current = by_year.get(year)
+        if current is None or (match.group(2) == "csv" and current.name.endswith(".zip")):
+            by_year[year] = RemoteFile(name, urljoin(base_url, href), year)
+    return [by_year[year] for year in sorted(by_year)]
+
+
+def _sha256(path: Path, digest=None):
+    digest = digest or hashlib.sha256()
+    with open(path, "rb") as fh:
+        while block := fh.read(CHUNK_SIZE):
+            digest.update(block)
+    return digest
+
+
+def _read_json(path: Path) -> dict:
+    try:
+        with open(path, encoding="utf-8") as fh:
+            return json.load(fh)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _write_json(path: Path, data: dict) -> None:
+    """Grava de forma atômica (temporário + rename)."""
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as fh:
+        json.dump(data, fh, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def load_download_manifest(output_dir: Path = RAW_DIR) -> dict:
+    """ETag, Last-Modified, tamanho e SHA-256 de cada arquivo já baixado."""
+    return _read_json(output_dir / DOWNLOAD_MANIFEST).get("arquivos", {})
+
+
+def save_download_manifest(entries: dict, output_dir: Path = RAW_DIR) -> None:
+    _write_json(output_dir / DOWNLOAD_MANIFEST, {"arquivos": entries})
+
+
+def is_complete(path: Path, entry: Optional[dict], verify: bool = False) -> bool:
+    """O arquivo local é o que foi baixado (tamanho; com `verify`, também o SHA-256)."""
+    if not entry or not path.exists() or path.stat().st_size != entry["size"]:
+        return False
+    return not verify or _sha256(path).hexdigest() == entry["sha256"]
 
-RAW_DIR = Path(__file__).resolve().parents[1] / "data" / "raw"
-PROCESSED_DIR = Path(__file__).resolve().parents[1] / "data" / "processed"
 
+def _content_range_start(value: Optional[str]) -> Optional[int]:
+    match = re.match(r"bytes (\d+)-", value or "")
+    return int(match.group(1)) if match else None
 
-def download_dataset():
+
+def fetch_file(
+    remote: RemoteFile,
+    output_dir: Path = RAW_DIR,
+    entry: Optional[dict] = None,
+    verify: bool = False,
+    timeout: float = TIMEOUT_S,
+) -> tuple[Optional[dict], str, int]:
+    """Uma tentativa de download de `remote` para `output_dir`.
+
+    Retorna a entrada do manifesto, o status e os bytes recebidos. Arquivo
+    local completo: GET condicional (304 = inalterado). `.part` de uma
+    tentativa anterior: pede só o restante, validado pelo ETag/Last-Modified
+    com que começou. Se a conexão cair, o `.part` fica para retomar.
+    """
+    dest = output_dir / remote.name
+    part = dest.with_name(dest.name + ".part")
+    meta_path = dest.with_name(dest.name + ".part.json")
+
+    headers = {}
+    offset = 0
+    if is_complete(dest, entry, verify):
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+    elif part.exists():
+        meta = _read_json(meta_path)
+        validator = meta.get("etag") or meta.get("last_modified")
+        if meta.get("url") == remote.url and validator and part.stat().st_size:
+            offset = part.stat().st_size
+            headers["Range"] = f"bytes={offset}-"
+            headers["If-Range"] = validator
+
+    try:
+        response = _open(remote.url, headers, timeout)
+    except HTTPError as e:
+        if e.code == 304:
+            return entry, "inalterado", 0
+        if e.code == 416:
+            # `.part` não corresponde ao arquivo remoto: recomeça do zero
+            part.unlink(missing_ok=True)
+            meta_path.unlink(missing_ok=True)
+            raise IncompleteDownload("intervalo inválido, recomeçando") from e
+        raise
+
+    with response:
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if response.status == 206:
+            if _content_range_start(response.headers.get("Content-Range")) != offset:
+                part.unlink(missing_ok=True)
+                raise IncompleteDownload("Content-Range inesperado, recomeçando")
+            mode, digest, status = "ab", _sha256(part), "retomado"
+        else:
+            # 200: arquivo inteiro (sem retomada, ou o arquivo mudou no servidor)
+            offset = 0
+            mode, digest, status = "wb", hashlib.sha256(), "baixado"
+        length = response.headers.get("Content-Length")
+        expected = offset + int(length) if length is not None else None
+
+        _write_json(meta_path, {"url": remote.url, "etag": etag, "last_modified": last_modified})
+        received = 0
+        with open(part, mode) as fh:
+            while chunk := response.read(CHUNK_SIZE):
+                fh.write(chunk)
+                digest.update(chunk)
+                received += len(chunk)
+
+    size = offset + received
+    if expected is not None and size != expected:
+        raise IncompleteDownload(f"conexão encerrada com {size:,} de {expected:,} bytes")
+    os.replace(part, dest)
+    meta_path.unlink(missing_ok=True)
+    entry = {
+        "url": remote.url,
+        "etag": etag,
+        "last_modified": last_modified,
+        "size": size,
+        "sha256": digest.hexdigest(),
+        "baixado_em": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+    return entry, status, received
+
+
+def extract_csvs(archive: Path, output_dir: Path = RAW_DIR) -> list[Path]:
+    """Extrai os CSVs de um zip em streaming (temporário + rename)."""
+    paths = []
+    with zipfile.ZipFile(archive) as zf:
+        for info in zf.infolist():
+            name = Path(info.filename).name
+            if info.is_dir() or not name.lower().endswith(".csv"):
+                continue
+            target = output_dir / name
+            tmp_path = output_dir / f".{name}.tmp"
+            with zf.open(info) as src, open(tmp_path, "wb") as dst:
+                shutil.copyfileobj(src, dst, CHUNK_SIZE)
+            os.replace(tmp_path, target)
+            paths.append(target)
+    return paths
+
+
+def download_file(
+    remote: RemoteFile,
+    output_dir: Path = RAW_DIR,
+    entry: Optional[dict] = None,
+    verify: bool = False,
+    timeout: float = TIMEOUT_S,
+    attempts: int = MAX_ATTEMPTS,
+) -> DownloadResult:
+    """Baixa (ou confirma) um arquivo, retomando do `.part` após falhas de rede."""
+    start = time.perf_counter()
+    with stage("download.arquivo", detail=remote.name) as current:
+        for attempt in range(1, attempts + 1):
+            try:
+                entry, status, received = fetch_file(remote, output_dir, entry, verify, timeout)
+                break
+            except HTTPError as e:
+                if e.code not in RETRY_STATUS or attempt == attempts:
+                    raise
+                error = e
+            except (IncompleteDownload, http.client.HTTPException, URLError, ConnectionError, TimeoutError) as e:
+                if attempt == attempts:
+                    raise
+                error = e
+            wait = BACKOFF_S * 2 ** (attempt - 1)
+            print(f"  ⚠ {remote.name}: {error} (tentativa {attempt}/{attempts}, nova em {wait:.0f}s)")
+            time.sleep(wait)
+
+        dest = output_dir / remote.name
+        paths = [dest]
+        if dest.suffix == ".zip":
+            paths = [output_dir / name for name in entry.get("csvs", [])]
+            if status != "inalterado" or not paths or not all(path.exists() for path in paths):
+                paths = extract_csvs(dest, output_dir)
+            entry = {**entry, "csvs": [path.name for path in paths]}
+        current.rows_out = len(paths)
+    return DownloadResult(remote.name, status, paths, received, time.perf_counter() - start, entry)
+
+
+def download_dataset(
+    base_url: str = BASE_URL,
+    output_dir: Path = RAW_DIR,
+    years: Optional[Sequence[int]] = None,
+    connections: int = DEFAULT_CONNECTIONS,
+    on_complete: Optional[Callable[[DownloadResult], None]] = None,
+    verify: bool = False,
+    timeout: float = TIMEOUT_S,
+) -> list[DownloadResult]:
+    """Baixa os arquivos anuais para `output_dir`, até `connections` ao mesmo tempo.
+
+    `on_complete(result)` roda na thread principal para cada arquivo
+    concluído (inclusive os inalterados), na ordem de conclusão, enquanto os
+    demais continuam baixando. O manifesto é salvo a cada arquivo; falhas
+    não interrompem os outros downloads e são relatadas ao final.
     """
-    Baixe/ingira o dataset e salve em RAW_DIR.
+    output_dir.mkdir(parents=True, exist_ok=True)
+    remote_files = list_remote_files(base_url, years, timeout)
+    if not remote_files:
+        raise FileNotFoundError(f"Nenhum arquivo focos_ams_ref_YYYY em {base_url}")
+    entries = load_download_manifest(output_dir)
+    connections = max(1, min(connections, len(remote_files)))
+    print(f"{len(remote_files)} arquivo(s) em {base_url} ({connections} conexão(ões)):")
+
+    results, failures = [], []
+    with ThreadPoolExecutor(max_workers=connections, thread_name_prefix="download") as executor:
+        futures = {
+            executor.submit(download_file, remote, output_dir, entries.get(remote.name), verify, timeout): remote
+            for remote in remote_files
+        }
+        for future in as_completed(futures):
+            remote = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                failures.append(remote.name)
+                print(f"  ✗ {remote.name}: {e}", file=sys.stderr)
+                continue
+            entries[remote.name] = result.entry
+            save_download_manifest(entries, output_dir)
+            size_mb = result.entry["size"] / 1024**2
+            if result.status == "inalterado":
+                print(f"  ✓ {remote.name} inalterado ({size_mb:.1f} MB)")
+            else:
+                rate = result.bytes / 1024**2 / max(result.seconds, 1e-9)
+                print(f"  ✓ {remote.name} {result.status} ({size_mb:.1f} MB, {result.seconds:.1f}s, {rate:.1f} MB/s)")
+            results.append(result)
+            if on_complete is not None:
+                on_complete(result)
+
+    if failures:
+        raise IOError(f"{len(failures)} arquivo(s) não baixado(s): {', '.join(sorted(failures))}")
+    return sorted(results, key=lambda result: result.name)
+
+
+def ingest_on_complete(
+    result: DownloadResult,
+    countries: Optional[Sequence[str]] = None,
+    lookup=None,
+) -> None:
+    """Gancho `on_complete` que ingere cada CSV no dataset incremental.
+
+    `countries` e `lookup` (um `BoundaryLookup`) precisam ser os mesmos da
+    ingestão final; senão o manifesto não confere e o arquivo fica para a
+    reingestão completa.
     """
-    RAW_DIR.mkdir(parents=True, exist_ok=True)
-    # TODO: implementar lógica de download/ingestão
-    return RAW_DIR
+    from src.pipeline_ingestao import ingest_file
+
+    for path in result.paths:
+        if not ingest_file(path, countries=countries, lookup=lookup):
+            print(f"  · {path.name} não ingerido agora (inalterado ou dataset a refazer)")
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Download dos CSVs anuais de focos do INPE (AMS_sat_ref)")
+    parser.add_argument("--url", default=BASE_URL, help="Diretório AMS_sat_ref no servidor de dados do INPE")
+    parser.add_argument("--anos", type=int, nargs="+", default=None, help="Só estes anos (padrão: todos)")
+    parser.add_argument(
+        "--conexoes", type=int, default=DEFAULT_CONNECTIONS,
+        help=f"Downloads simultâneos (padrão: {DEFAULT_CONNECTIONS})",
+    )
+    parser.add_argument("--saida", type=Path, default=None, help=f"Diretório de destino (padrão: {RAW_DIR})")
+    parser.add_argument(
+        "--verificar", action="store_true",
+        help="Confere o SHA-256 dos arquivos locais antes de considerá-los inalterados",
+    )
+    parser.add_argument(
+        "--ingerir", action="store_true",
+        help="Ingere cada CSV no dataset incremental assim que termina de baixar",
+    )
+    parser.add_argument(
+        "--pais", nargs="*", default=None, metavar="NOME",
+        help="Com --ingerir: mantém só os focos destes países (sem nomes: o padrão da ingestão, Brasil)",
+    )
+    parser.add_argument(
+        "--limites", type=Path, nargs="?", const=BOUNDARIES_DIR, default=None,
+        help=f"Com --ingerir: preenche bioma/UF/município com os GeoJSON deste diretório (padrão: {BOUNDARIES_DIR})",
+    )
+    add_report_arguments(parser, "download")
+    args = parser.parse_args(argv)
+    if args.ingerir and args.saida is not None:
+        parser.error("--ingerir usa o diretório lido pela ingestão; não combine com --saida")
+    if not args.ingerir and (args.pais is not None or args.limites is not None):
+        parser.error("--pais e --limites só valem com --ingerir")
+    return args
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Execução principal."""
+    args = parse_args(argv)
+    print("=== Download - Focos de Queimadas (INPE) ===\n")
+
+    report = RunReport("download", cprofile_stages=args.cprofile)
+    try:
+        with report:
+            lookup = None
+            if args.ingerir:
+                from src import pipeline_ingestao
+
+                if args.pais == []:
+                    args.pais = [pipeline_ingestao.DEFAULT_COUNTRY]
+                if args.limites is not None:
+                    from src.geo_backfill import BoundaryLookup
+
+                    with stage("limites"):
+                        lookup = BoundaryLookup.from_dir(args.limites)
+                    print(f"Limites: {', '.join(lookup.columns)} ({args.limites})")
+                output_dir = pipeline_ingestao.RAW_DIR
+                on_complete = partial(ingest_on_complete, countries=args.pais, lookup=lookup)
+            else:
+                output_dir, on_complete = args.saida or RAW_DIR, None
+            results = download_dataset(
+                args.url, output_dir, args.anos, args.conexoes, on_complete, args.verificar,
+            )
+            if args.ingerir:
+                # Arquivos já ingeridos são pulados; refaz cubo e índice uma vez
+                pipeline_ingestao.run_incremental(lookup=lookup, countries=args.pais)
+                if lookup is not None:
+                    lookup.save_cache()
+                if args.pais:
+                    pipeline_ingestao.print_country_filter(report)
+
+        downloaded = sum(result.bytes for result in results)
+        print(f"\n✓ {len(results)} arquivo(s) em {output_dir} ({downloaded / 1024**2:.1f} MB transferidos)")
+        return 0
+
+    except Exception as e:
+        print(f"\n✗ Erro: {e}", file=sys.stderr)
+        return 1
+
+    finally:
+        write_reports(report, args.relatorio, args.trace)
 
 
 if __name__ == "__main__":
-    path = download_dataset()
-    print(f"Dados disponíveis em: {path}")
+    raise SystemExit(main())
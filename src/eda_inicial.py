@@ -6,17 +6,20 @@ Este script reproduz a análise básica do notebook `notebooks/EDA_inicial.ipynb
 - Normaliza datas e alguns campos de texto
 - Gera contagens por dia e agregações por bioma/UF (se existirem as colunas)
 - Plota gráficos simples
-- Exporta artefatos em `data/processed/`
+- Exporta artefatos em `data/processed/` (reaproveitados do cache de
+  artefatos quando os CSVs não mudaram; ver `src.artifact_cache`)
 
 Uso:
     python -m venv .venv && source .venv/bin/activate
     pip install -r requirements.txt
-    python src/eda_inicial.py
+    python -m src.eda_inicial
+    python -m src.eda_inicial --sem-cache
 
 Requisitos: pandas, numpy, matplotlib, seaborn
 """
 from __future__ import annotations
 
+import argparse
 import sys
 from pathlib import Path
 from typing import Dict, Iterable, Optional, Tuple
@@ -26,6 +29,10 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+from src.artifact_cache import ArtifactCache, cached, input_fingerprint
+from src.csv_readers import DEFAULT_BACKEND, read_csv
+from src.schema import DEFAULT_COLUMNS, aliases
+
 # Configurações globais
 pd.set_option("display.max_columns", 100)
 sns.set(style="whitegrid", context="notebook")
@@ -36,6 +43,16 @@ RAW_DIR: Path = DATA_DIR / "raw"
 PROCESSED_DIR: Path = DATA_DIR / "processed"
 PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
 
+OUTPUT_NAMES = ("focos_por_dia.csv", "focos_mes_bioma.csv", "focos_mes_uf.csv")
+
+# Módulos cujo código também define os artefatos (versão no cache)
+CACHE_MODULES = ("src.csv_readers", "src.schema")
+
+
+def input_paths() -> list[Path]:
+    """CSVs brutos de que os artefatos dependem (o padrão `*.csv`, se não há nenhum)."""
+    return sorted(RAW_DIR.glob("*.csv")) or [RAW_DIR / "*.csv"]
+
 
 def list_csv_files(directory: Path) -> list[Path]:
     csv_files = sorted(directory.glob("*.csv"))
@@ -46,17 +63,21 @@ def list_csv_files(directory: Path) -> list[Path]:
     return csv_files
 
 
-def read_csv_with_fallback(file_path: Path, usecols: Optional[Iterable[str]] = None) -> pd.DataFrame:
-    try:
-        return pd.read_csv(file_path, encoding="utf-8", sep=",", usecols=usecols, low_memory=False)
-    except UnicodeDecodeError:
-        return pd.read_csv(file_path, encoding="latin1", sep=",", usecols=usecols, low_memory=False)
+def read_csv_with_fallback(
+    file_path: Path,
+    columns: Optional[Iterable[str]] = DEFAULT_COLUMNS,
+    backend: str = DEFAULT_BACKEND,
+) -> pd.DataFrame:
+    df, _, _ = read_csv(file_path, backend=backend, columns=columns)
+    return df
 
 
-def concatenate_csv_files(csv_files: Iterable[Path], usecols: Optional[Iterable[str]] = None) -> pd.DataFrame:
+def concatenate_csv_files(
+    csv_files: Iterable[Path], columns: Optional[Iterable[str]] = DEFAULT_COLUMNS
+) -> pd.DataFrame:
     frames: list[pd.DataFrame] = []
     for file_path in csv_files:
-        df = read_csv_with_fallback(file_path, usecols=usecols)
+        df = read_csv_with_fallback(file_path, columns=columns)
         df["_source_file"] = file_path.name
         frames.append(df)
     if not frames:
@@ -77,10 +98,10 @@ def resolve_first_present_column(lower_to_original: Dict[str, str], candidates:
 
 def normalize_and_derive_columns(raw: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, Optional[str]]]:
     lower_to_original = build_lower_to_original_map(raw.columns)
-    date_col = resolve_first_present_column(lower_to_original, ["data_pas", "data", "dt", "datetime"])  # type: ignore[arg-type]
-    bioma_col = resolve_first_present_column(lower_to_original, ["bioma"])  # type: ignore[arg-type]
-    uf_col = resolve_first_present_column(lower_to_original, ["estado", "uf"])  # type: ignore[arg-type]
-    muni_col = resolve_first_present_column(lower_to_original, ["municipio", "município", "munic"])  # type: ignore[arg-type]
+    date_col = resolve_first_present_column(lower_to_original, aliases("data_pas"))
+    bioma_col = resolve_first_present_column(lower_to_original, aliases("bioma"))
+    uf_col = resolve_first_present_column(lower_to_original, aliases("estado"))
+    muni_col = resolve_first_present_column(lower_to_original, aliases("municipio"))
 
     if date_col is None:
         raise KeyError("Não encontrei coluna de data (ex.: data_pas). Atualize o mapeamento.")
@@ -96,7 +117,7 @@ def normalize_and_derive_columns(raw: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[
 
     raw["year"] = raw["date"].dt.year
     raw["month"] = raw["date"].dt.to_period("M").astype(str)
-    raw["day"] = raw["date"].dt.date
+    raw["day"] = raw["date"].dt.floor("D")
 
     column_map = {
         "date": date_col,
@@ -152,15 +173,39 @@ def summarize_and_plot(raw: pd.DataFrame, column_map: Dict[str, Optional[str]])
         plt.show()
 
 
-def main() -> int:
+def run_analysis(csv_files: list[Path]) -> None:
+    raw = concatenate_csv_files(csv_files)
+    raw, column_map = normalize_and_derive_columns(raw)
+    summarize_and_plot(raw, column_map)
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="EDA inicial dos CSVs brutos")
+    parser.add_argument(
+        "--sem-cache", action="store_true",
+        help="Recalcula tudo sem consultar nem alimentar o cache de artefatos",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    args = parse_args(argv)
     print("Project root:", PROJECT_ROOT)
     print("Raw dir:", RAW_DIR)
     print("Processed dir:", PROCESSED_DIR)
 
-    csv_files = list_csv_files(RAW_DIR)
-    raw = concatenate_csv_files(csv_files, usecols=None)
-    raw, column_map = normalize_and_derive_columns(raw)
-    summarize_and_plot(raw, column_map)
+    try:
+        # Sem mudanças nos CSVs brutos os artefatos vêm do cache, sem ler os CSVs
+        csv_files = list_csv_files(RAW_DIR)
+        cached(
+            "eda_inicial", [PROCESSED_DIR / name for name in OUTPUT_NAMES],
+            lambda: run_analysis(csv_files),
+            fingerprint=input_fingerprint(csv_files),
+            cache=None if args.sem_cache else ArtifactCache(), modules=CACHE_MODULES,
+        )
+    except Exception as e:
+        print(f"\n✗ Erro: {e}", file=sys.stderr)
+        return 1
 
     print("Arquivos exportados em:", PROCESSED_DIR)
     return 0
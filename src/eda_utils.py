@@ -2,25 +2,51 @@
 EDA Utils - Análise Exploratória de Dados
 
 Este script:
-- Carrega o Parquet consolidado
+- Carrega o cubo diário (figuras e anomalias); o Parquet consolidado só é
+  percorrido em lotes Arrow para o resumo por coluna (ver column_profiler)
 - Gera estatísticas descritivas (posição, dispersão, CV)
-- Cria visualizações (séries temporais, boxplots, histogramas)
+- Cria visualizações (séries temporais, boxplots, histogramas), com os
+  agregados calculados uma vez e as figuras renderizadas em paralelo, pulando
+  as que não mudaram (ver render_scheduler)
+- Reaproveita CSVs e figuras do cache de artefatos quando as saídas da
+  ingestão não mudaram (ver artifact_cache)
 - Detecta anomalias (z-score robusto e IQR)
 - Exporta artefatos (CSVs de resumo e figuras)
+- Grava o relatório da execução por etapa em data/relatorios/ (ver
+  instrumentation)
 
 Uso:
     python -m src.eda_utils
+    python -m src.eda_utils --workers 4 --forcar
+    python -m src.eda_utils --sem-cache
+    python -m src.eda_utils --exato
+    python -m src.eda_utils --motor duckdb
 """
 
 from __future__ import annotations
 
+import argparse
+import functools
 import sys
 from pathlib import Path
+from typing import Callable, Optional, Sequence
 
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
+import pyarrow as pa
+
+from src.anomalies import score_anomalies
+from src.artifact_cache import ArtifactCache, cached, input_fingerprint
+from src.column_profiler import profile_batches, profile_focos, write_summary
+from src.daily_cube import COUNT_COL, CUBE_DIMENSIONS, CUBE_NAME, count_by, drop_missing, load_cube
+from src.focos_loader import (
+    DATASET_NAME, MANIFEST_NAME, MISSING_BIOMAS, PARQUET_NAME, focos_source, load_focos,
+)
+from src.query_engine import DEFAULT_ENGINE, ENGINES, open_counts
+from src.instrumentation import RunReport, add_report_arguments, instrumented, stage, write_reports
+from src.render_scheduler import FigureJob, render_figures
 
 # Configurações
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
@@ -29,61 +55,87 @@ PROCESSED_DIR = DATA_DIR / "processed"
 FIGS_DIR = PROJECT_ROOT / "figs" / "eda"
 FIGS_DIR.mkdir(parents=True, exist_ok=True)
 
+FIGURE_NAMES = ("series_bioma.png", "boxplot_bioma.png", "top10_uf.png")
+
+# Módulos cujo código também define os artefatos (versão no cache)
+CACHE_MODULES = (
+    "src.anomalies", "src.column_profiler", "src.daily_cube", "src.focos_loader", "src.query_engine",
+    "src.render_scheduler",
+)
+
 plt.rcParams["figure.dpi"] = 100
 plt.rcParams["font.size"] = 10
 
 
-def load_data() -> pd.DataFrame:
-    """Carrega Parquet consolidado."""
-    parquet_path = PROCESSED_DIR / "focos_2019_2024.parquet"
-    if not parquet_path.exists():
-        raise FileNotFoundError(
-            f"{parquet_path} não encontrado. Execute pipeline_ingestao.py primeiro."
-        )
-    
-    df = pd.read_parquet(parquet_path)
-    print(f"Carregados {len(df):,} registros de {parquet_path.name}")
+def load_data(columns: Optional[Sequence[str]] = None, **filters) -> pd.DataFrame:
+    """Carrega Parquet consolidado.
+
+    `columns` e os filtros de `focos_loader.build_filter` (anos, biomas,
+    UFs, bbox) são aplicados na leitura, antes de materializar em pandas.
+    """
+    source = focos_source(PROCESSED_DIR)
+    df = load_focos(columns, PROCESSED_DIR, **filters)
+    print(f"Carregados {len(df):,} registros de {source.name}")
     return df
 
 
-def generate_summary_stats(df: pd.DataFrame) -> None:
-    """Gera estatísticas de resumo das colunas."""
-    info_list = []
-    for col in df.columns:
-        dtype = str(df[col].dtype)
-        n_missing = df[col].isna().sum()
-        n_unique = df[col].nunique()
-        
-        # Min/Max para numéricos
-        if pd.api.types.is_numeric_dtype(df[col]):
-            col_min = df[col].min()
-            col_max = df[col].max()
-        else:
-            col_min = None
-            col_max = None
-        
-        info_list.append({
-            "coluna": col,
-            "tipo": dtype,
-            "n_missing": n_missing,
-            "pct_missing": round(n_missing / len(df) * 100, 2),
-            "n_unique": n_unique,
-            "min": col_min,
-            "max": col_max,
-        })
-    
-    info_df = pd.DataFrame(info_list)
-    output_path = PROCESSED_DIR / "resumo_colunas.csv"
-    info_df.to_csv(output_path, index=False)
+def input_paths() -> list[Path]:
+    """Saídas da ingestão de que os artefatos dependem (chave do cache)."""
+    return [PROCESSED_DIR / name for name in (PARQUET_NAME, DATASET_NAME, MANIFEST_NAME, CUBE_NAME)]
+
+
+@instrumented("carga")
+def load_counts(
+    processed_dir: Optional[Path] = None,
+    load_rows: Optional[Callable[..., pd.DataFrame]] = None,
+) -> pd.DataFrame:
+    """Carrega o cubo diário; sem cubo válido, recai nos dados por foco.
+
+    Também usada por `storytelling_viz` e `municipio_ranking`. Sem cubo, só
+    as dimensões do cubo são lidas, de `processed_dir` (padrão:
+    PROCESSED_DIR) ou por `load_rows(columns=...)`, se dado.
+    """
+    processed_dir = PROCESSED_DIR if processed_dir is None else processed_dir
+    sources = [processed_dir / PARQUET_NAME, processed_dir / MANIFEST_NAME]
+    cube = load_cube(processed_dir, sources)
+    if cube is None:
+        if load_rows is not None:
+            return load_rows(columns=CUBE_DIMENSIONS)
+        df = load_focos(CUBE_DIMENSIONS, processed_dir)
+        print(f"Carregados {len(df):,} registros de {focos_source(processed_dir).name}")
+        return df
+    print(f"Carregado cubo diário com {len(cube):,} células ({cube[COUNT_COL].sum():,} focos)")
+    return cube
+
+
+def generate_summary_stats(df: Optional[pd.DataFrame] = None, exact: bool = False) -> None:
+    """Gera estatísticas de resumo das colunas em uma passada (ver column_profiler).
+
+    Sem `df`, lê o Parquet consolidado em lotes Arrow, sem materializar em
+    pandas. `n_unique` é aproximado (HyperLogLog) acima de
+    `column_profiler.EXACT_LIMIT` distintos, a menos que `exact=True`.
+    """
+    if df is None:
+        profiler = profile_focos(PROCESSED_DIR, exact)
+        print(f"Perfil de {profiler.rows:,} registros de {focos_source(PROCESSED_DIR).name}")
+    else:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        profiler = profile_batches(table.to_batches(), table.schema, exact)
+    output_path = write_summary(profiler, PROCESSED_DIR)
     print(f"✓ {output_path.name}")
 
 
 def generate_general_stats(df: pd.DataFrame) -> None:
-    """Estatísticas gerais: contagem de registros por bioma, UF, ano."""
+    """Estatísticas gerais: contagem de registros por bioma, UF, ano.
+
+    Aceita o cubo diário ou os dados por foco.
+    """
+    by_day = count_by(df, ["day"])
+    days = pd.to_datetime(by_day["day"])
     stats = {
-        "total_registros": len(df),
-        "anos": df["year"].nunique() if "year" in df.columns else 0,
-        "periodo": f"{df['date'].min().date()} a {df['date'].max().date()}" if "date" in df.columns else "N/A",
+        "total_registros": int(by_day[COUNT_COL].sum()),
+        "anos": days.dt.year.nunique(),
+        "periodo": f"{days.min().date()} a {days.max().date()}" if len(days) else "N/A",
     }
     
     # Por bioma
@@ -94,7 +146,7 @@ def generate_general_stats(df: pd.DataFrame) -> None:
             break
     
     if bioma_col:
-        by_bioma = df[bioma_col].value_counts().head(10)
+        by_bioma = count_by(df, [bioma_col]).set_index(bioma_col)[COUNT_COL].nlargest(10)
         for bioma, count in by_bioma.items():
             stats[f"bioma_{bioma}"] = count
     
@@ -106,7 +158,7 @@ def generate_general_stats(df: pd.DataFrame) -> None:
             break
     
     if uf_col:
-        by_uf = df[uf_col].value_counts().head(10)
+        by_uf = count_by(df, [uf_col]).set_index(uf_col)[COUNT_COL].nlargest(10)
         for uf, count in by_uf.items():
             stats[f"uf_{uf}"] = count
     
@@ -117,26 +169,37 @@ def generate_general_stats(df: pd.DataFrame) -> None:
     print(f"✓ {output_path.name}")
 
 
-def plot_series_by_bioma(df: pd.DataFrame) -> None:
-    """Plota séries temporais de focos por dia, agrupadas por bioma."""
-    bioma_col = None
+def find_bioma_column(df: pd.DataFrame) -> Optional[str]:
     for candidate in ["bioma"]:
         if candidate in df.columns:
-            bioma_col = candidate
-            break
-    
-    if not bioma_col:
-        print("  ⚠ Coluna 'bioma' não encontrada, pulando gráfico por bioma")
-        return
-    
+            return candidate
+    return None
+
+
+def find_uf_column(df: pd.DataFrame) -> Optional[str]:
+    for candidate in ["estado", "uf"]:
+        if candidate in df.columns:
+            return candidate
+    return None
+
+
+@instrumented()
+def daily_by_bioma(df: pd.DataFrame, bioma_col: str) -> pd.DataFrame:
+    """Focos por dia e bioma, sem biomas ausentes (séries e boxplot)."""
     # Filter out NaN/null bioma values
-    df_filtered = df[df[bioma_col].notna() & (df[bioma_col] != 'Nan') & (df[bioma_col] != 'nan')].copy()
-    
-    # Agregar por dia e bioma
-    by_day_bioma = df_filtered.groupby(["day", bioma_col]).size().reset_index(name="focos")
+    df_filtered = drop_missing(df, bioma_col, MISSING_BIOMAS)
+    by_day_bioma = count_by(df_filtered, ["day", bioma_col])
     by_day_bioma["day"] = pd.to_datetime(by_day_bioma["day"])
-    
-    # Plotar
+    return by_day_bioma
+
+
+@instrumented()
+def top_ufs(df: pd.DataFrame, uf_col: str) -> pd.Series:
+    """Top 10 UFs por número de focos."""
+    return count_by(df, [uf_col]).set_index(uf_col)[COUNT_COL].nlargest(10)
+
+
+def render_series_by_bioma(output_path: Path, by_day_bioma: pd.DataFrame, bioma_col: str) -> None:
     fig, ax = plt.subplots(figsize=(14, 6))
     for bioma in by_day_bioma[bioma_col].unique():
         subset = by_day_bioma[by_day_bioma[bioma_col] == bioma]
@@ -151,29 +214,11 @@ def plot_series_by_bioma(df: pd.DataFrame) -> None:
     plt.xticks(rotation=45)
     plt.tight_layout()
     
-    output_path = FIGS_DIR / "series_bioma.png"
     plt.savefig(output_path, dpi=150)
     plt.close()
-    print(f"✓ {output_path.name}")
 
 
-def plot_boxplot_by_bioma(df: pd.DataFrame) -> None:
-    """Boxplot de focos diários por bioma."""
-    bioma_col = None
-    for candidate in ["bioma"]:
-        if candidate in df.columns:
-            bioma_col = candidate
-            break
-    
-    if not bioma_col:
-        print("  ⚠ Coluna 'bioma' não encontrada, pulando boxplot")
-        return
-    
-    # Filter out NaN/null bioma values
-    df_filtered = df[df[bioma_col].notna() & (df[bioma_col] != 'Nan') & (df[bioma_col] != 'nan')].copy()
-    
-    by_day_bioma = df_filtered.groupby(["day", bioma_col]).size().reset_index(name="focos")
-    
+def render_boxplot_by_bioma(output_path: Path, by_day_bioma: pd.DataFrame, bioma_col: str) -> None:
     fig, ax = plt.subplots(figsize=(10, 6))
     biomas = sorted(by_day_bioma[bioma_col].unique())
     data_to_plot = [by_day_bioma[by_day_bioma[bioma_col] == b]["focos"] for b in biomas]
@@ -185,26 +230,11 @@ def plot_boxplot_by_bioma(df: pd.DataFrame) -> None:
     plt.xticks(rotation=15, ha="right")
     plt.tight_layout()
     
-    output_path = FIGS_DIR / "boxplot_bioma.png"
     plt.savefig(output_path, dpi=150)
     plt.close()
-    print(f"✓ {output_path.name}")
 
 
-def plot_top_uf(df: pd.DataFrame) -> None:
-    """Gráfico de barras - Top 10 UFs por focos."""
-    uf_col = None
-    for candidate in ["estado", "uf"]:
-        if candidate in df.columns:
-            uf_col = candidate
-            break
-    
-    if not uf_col:
-        print("  ⚠ Coluna de UF não encontrada, pulando gráfico Top UF")
-        return
-    
-    top_uf = df[uf_col].value_counts().head(10)
-    
+def render_top_uf(output_path: Path, top_uf: pd.Series) -> None:
     fig, ax = plt.subplots(figsize=(10, 6))
     top_uf.plot(kind="barh", ax=ax, color="coral")
     ax.set_title("Top 10 UFs por número de focos (2019-2024)")
@@ -213,29 +243,78 @@ def plot_top_uf(df: pd.DataFrame) -> None:
     ax.invert_yaxis()
     plt.tight_layout()
     
-    output_path = FIGS_DIR / "top10_uf.png"
     plt.savefig(output_path, dpi=150)
     plt.close()
+
+
+def plot_series_by_bioma(df: pd.DataFrame) -> None:
+    """Plota séries temporais de focos por dia, agrupadas por bioma."""
+    bioma_col = find_bioma_column(df)
+    if not bioma_col:
+        print("  ⚠ Coluna 'bioma' não encontrada, pulando gráfico por bioma")
+        return
+    output_path = FIGS_DIR / "series_bioma.png"
+    render_series_by_bioma(output_path, daily_by_bioma(df, bioma_col), bioma_col)
+    print(f"✓ {output_path.name}")
+
+
+def plot_boxplot_by_bioma(df: pd.DataFrame) -> None:
+    """Boxplot de focos diários por bioma."""
+    bioma_col = find_bioma_column(df)
+    if not bioma_col:
+        print("  ⚠ Coluna 'bioma' não encontrada, pulando boxplot")
+        return
+    output_path = FIGS_DIR / "boxplot_bioma.png"
+    render_boxplot_by_bioma(output_path, daily_by_bioma(df, bioma_col), bioma_col)
+    print(f"✓ {output_path.name}")
+
+
+def plot_top_uf(df: pd.DataFrame) -> None:
+    """Gráfico de barras - Top 10 UFs por focos."""
+    uf_col = find_uf_column(df)
+    if not uf_col:
+        print("  ⚠ Coluna de UF não encontrada, pulando gráfico Top UF")
+        return
+    output_path = FIGS_DIR / "top10_uf.png"
+    render_top_uf(output_path, top_ufs(df, uf_col))
     print(f"✓ {output_path.name}")
 
 
-def detect_anomalies_simple(df: pd.DataFrame) -> None:
-    """Detecta anomalias simples por z-score robusto (MAD) em focos diários."""
-    # Agregar por dia
-    by_day = df.groupby("day").size().reset_index(name="focos")
-    by_day["day"] = pd.to_datetime(by_day["day"])
+@instrumented("agregacoes")
+def figure_jobs(df: pd.DataFrame) -> list[FigureJob]:
+    """Figuras da EDA com os agregados calculados uma vez (séries e boxplot
+    compartilham a contagem por dia × bioma)."""
+    jobs = []
+    bioma_col = find_bioma_column(df)
+    if bioma_col:
+        by_day_bioma = daily_by_bioma(df, bioma_col)
+        data = {"by_day_bioma": by_day_bioma, "bioma_col": bioma_col}
+        jobs.append(FigureJob("series_bioma.png", render_series_by_bioma, data))
+        jobs.append(FigureJob("boxplot_bioma.png", render_boxplot_by_bioma, data))
+    else:
+        print("  ⚠ Coluna 'bioma' não encontrada, pulando gráficos por bioma")
     
-    # Z-score robusto (MAD)
-    median_focos = by_day["focos"].median()
-    mad = (by_day["focos"] - median_focos).abs().median()
+    uf_col = find_uf_column(df)
+    if uf_col:
+        jobs.append(FigureJob("top10_uf.png", render_top_uf, {"top_uf": top_ufs(df, uf_col)}))
+    else:
+        print("  ⚠ Coluna de UF não encontrada, pulando gráfico Top UF")
+    return jobs
+
+
+def detect_anomalies_simple(df: pd.DataFrame, scores: Optional[pd.DataFrame] = None) -> None:
+    """Detecta anomalias simples por z-score robusto (MAD) em focos diários.
+
+    `scores` reaproveita uma pontuação já feita com `score_anomalies(df)`.
+    """
+    if scores is None:
+        scores = score_anomalies(df)
     
-    if mad == 0:
+    if scores["z_score_robust"].isna().all():
         print("  ⚠ MAD = 0, sem detecção de anomalias")
         return
     
-    by_day["z_score_robust"] = (by_day["focos"] - median_focos) / (1.4826 * mad)
-    by_day["anomalia"] = by_day["z_score_robust"].abs() >= 3
-    
+    by_day = scores[["day", "focos", "z_score_robust", "anomalia"]]
     anomalies = by_day[by_day["anomalia"]].copy()
     anomalies = anomalies.sort_values("focos", ascending=False).head(50)
     
@@ -244,24 +323,70 @@ def detect_anomalies_simple(df: pd.DataFrame) -> None:
     print(f"✓ {output_path.name} ({len(anomalies)} anomalias detectadas)")
 
 
-def main() -> int:
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Análise exploratória dos focos")
+    parser.add_argument(
+        "--workers", type=int, default=None,
+        help="Processos para renderizar as figuras (padrão: um por figura, até o nº de CPUs)",
+    )
+    parser.add_argument(
+        "--forcar", action="store_true",
+        help="Renderiza todas as figuras, mesmo sem mudanças nos agregados",
+    )
+    parser.add_argument(
+        "--sem-cache", action="store_true",
+        help="Recalcula tudo sem consultar nem alimentar o cache de artefatos",
+    )
+    parser.add_argument(
+        "--exato", action="store_true",
+        help="n_unique exato no resumo das colunas (padrão: HyperLogLog nas de alta cardinalidade)",
+    )
+    parser.add_argument(
+        "--motor", choices=ENGINES, default=DEFAULT_ENGINE,
+        help="Motor das agregações: cubo em pandas ou DuckDB direto sobre o Parquet (fora da memória)",
+    )
+    add_report_arguments(parser, "eda_utils")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
     """Execução principal."""
+    args = parse_args(argv)
     print("=== EDA - Análise Exploratória de Dados ===\n")
     
+    report = RunReport("eda_utils", cprofile_stages=args.cprofile)
     try:
-        df = load_data()
-        
-        print("\nGerando artefatos:")
-        generate_summary_stats(df)
-        generate_general_stats(df)
-        
-        print("\nGerando figuras:")
-        plot_series_by_bioma(df)
-        plot_boxplot_by_bioma(df)
-        plot_top_uf(df)
-        
-        print("\nDetectando anomalias:")
-        detect_anomalies_simple(df)
+        with report:
+            # Cada etapa vem do cache quando as saídas da ingestão não mudaram;
+            # os dados só são carregados se alguma etapa precisar recalcular
+            cache = None if args.sem_cache else ArtifactCache()
+            run = functools.partial(
+                cached, fingerprint=input_fingerprint(input_paths()), cache=cache, modules=CACHE_MODULES,
+            )
+            
+            print("\nGerando artefatos:")
+            with stage("resumo_colunas"):
+                run("resumo_colunas", [PROCESSED_DIR / "resumo_colunas.csv"],
+                    lambda: generate_summary_stats(exact=args.exato), params={"exato": args.exato})
+            
+            # Demais artefatos só precisam de contagens: usam o cubo diário
+            # (ou consultas DuckDB sobre o Parquet, com `--motor duckdb`)
+            counts = functools.cache(functools.partial(open_counts, args.motor, load_counts, PROCESSED_DIR))
+            engine = {"motor": args.motor}
+            with stage("estatisticas_gerais"):
+                run("estatisticas_gerais", [PROCESSED_DIR / "estatisticas_gerais.csv"],
+                    lambda: generate_general_stats(counts()), params=engine)
+            
+            print("\nGerando figuras:")
+            with stage("figuras_eda"):
+                run("figuras_eda", [FIGS_DIR / name for name in FIGURE_NAMES],
+                    lambda: render_figures(figure_jobs(counts()), FIGS_DIR, args.workers, args.forcar),
+                    params=engine, refresh=args.forcar)
+            
+            print("\nDetectando anomalias:")
+            with stage("anomalias_top"):
+                run("anomalias_top", [PROCESSED_DIR / "anomalias_top.csv"],
+                    lambda: detect_anomalies_simple(counts()), params=engine)
         
         print("\n✓ EDA concluída com sucesso!")
         return 0
@@ -271,6 +396,9 @@ def main() -> int:
         import traceback
         traceback.print_exc()
         return 1
+    
+    finally:
+        write_reports(report, args.relatorio, args.trace)
 
 
 if __name__ == "__main__":
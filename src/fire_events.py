@@ -0,0 +1,290 @@
+"""
+Eventos de fogo - Agrupamento espaço-temporal dos focos
+
+Focos do mesmo incêndio aparecem como dezenas de linhas (um por pixel e
+passagem de satélite). Este módulo:
+- Liga dois focos quando estão a até `radius_km` um do outro e a até
+  `gap_days` dias de distância, e chama de evento cada componente conexo
+  (ligações transitivas: uma frente de fogo que avança vira um evento só)
+- Busca vizinhos por baldes de grade (células de `radius_km` × janelas de
+  `gap_days`): cada foco só é comparado com os focos dos baldes adjacentes,
+  nunca com todos (sem O(n²))
+- Une os pares com union-find vetorizado (ligação pelo menor rótulo +
+  compressão de caminhos em NumPy)
+- Resume cada evento: focos, início, fim, duração, centroide, área ocupada
+  (células de ~1 km com focos) e UF/município/bioma predominantes
+- Grava `focos_eventos.parquet` (um por evento) e
+  `focos_eventos_mapa.parquet` (`id_bdq` → `event_id`; focos sem
+  coordenadas ficam fora dos eventos, com `event_id` -1)
+
+Uso:
+    python -m src.fire_events
+    python -m src.fire_events --raio-km 3 --intervalo-dias 2 --anos 2024
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from src.focos_loader import load_focos
+from src.spatial_index import KM_PER_DEG_LAT, haversine_km
+from src.utils import PROCESSED_DIR
+
+EVENTS_NAME = "focos_eventos.parquet"
+EVENT_MAP_NAME = "focos_eventos_mapa.parquet"
+EVENT_COLUMNS = ("id_bdq", "lat", "lon", "day", "day_idx", "estado", "municipio", "bioma")
+
+DEFAULT_RADIUS_KM = 2.0
+DEFAULT_GAP_DAYS = 1
+
+# Células usadas para a área ocupada de cada evento (0,01° ≈ 1,1 km)
+AREA_CELL_DEG = 0.01
+
+# Focos de origem por lote na geração de pares (limita a memória em dias de pico)
+PAIR_BATCH = 250_000
+
+
+def _bucket_keys(lat: np.ndarray, lon: np.ndarray, day_idx: np.ndarray, radius_km: float, gap_days: int):
+    """Chave linear (janela de tempo, linha, coluna) de cada foco e os passos da chave.
+
+    As células têm pelo menos `radius_km` em cada direção e as janelas
+    `gap_days` dias, então vizinhos válidos só estão em baldes adjacentes.
+    Há uma célula de margem em cada borda para os deslocamentos não
+    "darem a volta" na grade.
+    """
+    lat64, lon64 = lat.astype(np.float64), lon.astype(np.float64)
+    max_abs_lat = float(np.abs(lat64).max())
+    lat_deg = radius_km / KM_PER_DEG_LAT
+    lon_deg = radius_km / (KM_PER_DEG_LAT * max(np.cos(np.radians(min(max_abs_lat, 89.0))), 1e-6))
+    rows = np.floor((lat64 - lat64.min()) / lat_deg).astype(np.int64) + 1
+    cols = np.floor((lon64 - lon64.min()) / lon_deg).astype(np.int64) + 1
+    window = max(gap_days, 1)
+    times = (day_idx.astype(np.int64) - int(day_idx.min())) // window
+    n_cols = int(cols.max()) + 2
+    n_rows = int(rows.max()) + 2
+    col_step, row_step, time_step = 1, n_cols, n_cols * n_rows
+    keys = times * time_step + rows * row_step + cols * col_step
+    return keys, (time_step, row_step, col_step)
+
+
+def candidate_pairs(
+    lat: np.ndarray,
+    lon: np.ndarray,
+    day_idx: np.ndarray,
+    radius_km: float = DEFAULT_RADIUS_KM,
+    gap_days: int = DEFAULT_GAP_DAYS,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Pares (i, j) de focos próximos no espaço e no tempo.
+
+    Para cada foco, olha só os baldes vizinhos (mesma janela e a seguinte,
+    3 × 3 células) via `searchsorted` na ordem das chaves; os pares
+    candidatos são conferidos pela distância haversine e pelo intervalo em
+    dias.
+    """
+    n = len(lat)
+    if n < 2:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    keys, (time_step, row_step, col_step) = _bucket_keys(lat, lon, day_idx, radius_km, gap_days)
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    day_idx = day_idx.astype(np.int64)
+
+    # Mesma janela e a seguinte (com gap_days = 0, só o mesmo dia conta)
+    time_offsets = (0,) if gap_days == 0 else (0, 1)
+    offsets = [
+        (dt, dt * time_step + dr * row_step + dc * col_step)
+        for dt in time_offsets
+        for dr in (-1, 0, 1)
+        for dc in (-1, 0, 1)
+    ]
+
+    left, right = [], []
+    for start in range(0, n, PAIR_BATCH):
+        source = order[start:start + PAIR_BATCH]
+        source_keys = sorted_keys[start:start + PAIR_BATCH]
+        for dt, offset in offsets:
+            lo = np.searchsorted(sorted_keys, source_keys + offset, side="left")
+            hi = np.searchsorted(sorted_keys, source_keys + offset, side="right")
+            sizes = hi - lo
+            total = int(sizes.sum())
+            if not total:
+                continue
+            i = np.repeat(source, sizes)
+            # Posições lo..hi-1 de cada foco de origem, sem laço
+            pos = np.arange(total, dtype=np.int64) + np.repeat(lo - (np.cumsum(sizes) - sizes), sizes)
+            j = order[pos]
+            if not dt:
+                # Na mesma janela cada par aparece dos dois lados: fica o i < j
+                keep = i < j
+                i, j = i[keep], j[keep]
+            keep = np.abs(day_idx[i] - day_idx[j]) <= gap_days
+            i, j = i[keep], j[keep]
+            keep = haversine_km(lat[i], lon[i], lat[j], lon[j]) <= radius_km
+            left.append(i[keep])
+            right.append(j[keep])
+    if not left:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    return np.concatenate(left), np.concatenate(right)
+
+
+def connected_labels(n: int, left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    """Union-find vetorizado: rótulo (menor índice) do componente de cada nó."""
+    parent = np.arange(n, dtype=np.int64)
+    while True:
+        # Compressão total: cada nó aponta para a raiz atual
+        while True:
+            grand = parent[parent]
+            if np.array_equal(grand, parent):
+                break
+            parent = grand
+        root_l, root_r = parent[left], parent[right]
+        differ = root_l != root_r
+        if not differ.any():
+            return parent
+        root_l, root_r = root_l[differ], root_r[differ]
+        # Liga a raiz maior à menor (o menor rótulo vence quando há disputa)
+        np.minimum.at(parent, np.maximum(root_l, root_r), np.minimum(root_l, root_r))
+
+
+def _dominant(points: pd.DataFrame, column: str) -> pd.Series:
+    """Valor mais frequente de `column` em cada evento (empate: o primeiro em ordem)."""
+    counts = points.groupby(["event_id", column], observed=True, sort=True).size().rename("n").reset_index()
+    counts = counts.sort_values(["event_id", "n"], ascending=[True, False], kind="stable")
+    return counts.drop_duplicates("event_id").set_index("event_id")[column]
+
+
+def cluster_events(
+    points: pd.DataFrame,
+    radius_km: float = DEFAULT_RADIUS_KM,
+    gap_days: int = DEFAULT_GAP_DAYS,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Agrupa os focos em eventos; retorna (eventos, mapa id_bdq → event_id).
+
+    Focos sem coordenadas (lat/lon nulos, mantidos pela limpeza) não entram
+    em nenhum evento: no mapa, recebem `event_id` -1.
+    """
+    all_lat = points["lat"].to_numpy(dtype=np.float32)
+    all_lon = points["lon"].to_numpy(dtype=np.float32)
+    located = np.isfinite(all_lat) & np.isfinite(all_lon)
+    mapping = pd.DataFrame({"event_id": np.full(len(points), -1, dtype=np.int64)})
+    if "id_bdq" in points.columns:
+        mapping.insert(0, "id_bdq", points["id_bdq"].to_numpy())
+    points = points[located]
+    lat, lon = all_lat[located], all_lon[located]
+    if "day_idx" in points.columns:
+        day_idx = points["day_idx"].to_numpy(dtype=np.int64)
+    else:
+        day_idx = pd.to_datetime(points["day"]).to_numpy().astype("datetime64[D]").astype(np.int64)
+
+    left, right = candidate_pairs(lat, lon, day_idx, radius_km, gap_days)
+    labels = connected_labels(len(points), left, right)
+    # Eventos numerados pela ordem do primeiro foco
+    _, event_id = np.unique(labels, return_inverse=True)
+    event_id = event_id.astype(np.int64)
+    mapping.loc[located, "event_id"] = event_id
+
+    tagged = pd.DataFrame({
+        "event_id": event_id,
+        "lat": lat.astype(np.float64),
+        "lon": lon.astype(np.float64),
+        "day_idx": day_idx,
+    })
+    grouped = tagged.groupby("event_id", sort=True)
+    events = grouped.agg(
+        n_focos=("lat", "size"),
+        inicio_idx=("day_idx", "min"),
+        fim_idx=("day_idx", "max"),
+        lat=("lat", "mean"),
+        lon=("lon", "mean"),
+    )
+    events["inicio"] = events["inicio_idx"].to_numpy().astype("datetime64[D]").astype("datetime64[s]")
+    events["fim"] = events["fim_idx"].to_numpy().astype("datetime64[D]").astype("datetime64[s]")
+    events["duracao_dias"] = (events["fim_idx"] - events["inicio_idx"] + 1).astype(np.int32)
+
+    # Área ocupada: células de ~1 km distintas com focos, em km² na latitude da célula
+    cell_lat = np.floor(tagged["lat"].to_numpy() / AREA_CELL_DEG).astype(np.int64)
+    cell_lon = np.floor(tagged["lon"].to_numpy() / AREA_CELL_DEG).astype(np.int64)
+    cells = pd.DataFrame({"event_id": event_id, "cell_lat": cell_lat, "cell_lon": cell_lon}).drop_duplicates()
+    cell_km2 = (AREA_CELL_DEG * KM_PER_DEG_LAT) ** 2 * np.cos(np.radians((cells["cell_lat"] + 0.5) * AREA_CELL_DEG))
+    events["area_km2"] = cell_km2.groupby(cells["event_id"]).sum()
+
+    context = points.drop(columns=["lat", "lon"], errors="ignore").assign(event_id=event_id)
+    for column in ("estado", "municipio", "bioma"):
+        if column in context.columns:
+            events[column] = _dominant(context, column)
+
+    events = events.drop(columns=["inicio_idx", "fim_idx"]).reset_index()
+    events["n_focos"] = events["n_focos"].astype(np.int32)
+    events["lat"] = events["lat"].astype(np.float32)
+    events["lon"] = events["lon"].astype(np.float32)
+    return events, mapping
+
+
+def write_events(events: pd.DataFrame, mapping: pd.DataFrame, processed_dir: Path) -> tuple[Path, Path]:
+    """Grava eventos e mapa (temporário + rename)."""
+    paths = []
+    for frame, name in ((events, EVENTS_NAME), (mapping, EVENT_MAP_NAME)):
+        output_path = processed_dir / name
+        tmp_path = output_path.with_suffix(".parquet.tmp")
+        frame.to_parquet(tmp_path, engine="pyarrow", compression="snappy", index=False)
+        os.replace(tmp_path, output_path)
+        paths.append(output_path)
+    return paths[0], paths[1]
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Agrupamento de focos em eventos de fogo")
+    parser.add_argument(
+        "--raio-km", type=float, default=DEFAULT_RADIUS_KM,
+        help=f"Distância máxima entre focos do mesmo evento (padrão: {DEFAULT_RADIUS_KM:g} km)",
+    )
+    parser.add_argument(
+        "--intervalo-dias", type=int, default=DEFAULT_GAP_DAYS,
+        help=f"Intervalo máximo em dias entre focos ligados (padrão: {DEFAULT_GAP_DAYS})",
+    )
+    parser.add_argument("--anos", type=int, nargs="*", default=None, help="Só estes anos")
+    args = parser.parse_args(argv)
+    if args.raio_km <= 0 or args.intervalo_dias < 0:
+        parser.error("--raio-km precisa ser positivo e --intervalo-dias não negativo")
+    return args
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Execução principal."""
+    args = parse_args(argv)
+    print("=== Eventos de fogo ===\n")
+    try:
+        points = load_focos(EVENT_COLUMNS, PROCESSED_DIR, years=args.anos)
+        print(f"Carregados {len(points):,} focos")
+        unlocated = int((points["lat"].isna() | points["lon"].isna()).sum())
+        if unlocated:
+            print(f"  ⚠ {unlocated:,} foco(s) sem coordenadas ficam fora dos eventos (event_id -1)")
+        start = time.perf_counter()
+        events, mapping = cluster_events(points, args.raio_km, args.intervalo_dias)
+        elapsed = time.perf_counter() - start
+        print(
+            f"{len(events):,} eventos ({args.raio_km:g} km, {args.intervalo_dias} dia(s)) em {elapsed:.1f}s; "
+            f"maior evento: {int(events['n_focos'].max()) if len(events) else 0:,} focos"
+        )
+        events_path, map_path = write_events(events, mapping, PROCESSED_DIR)
+        print(f"✓ {events_path.name}")
+        print(f"✓ {map_path.name}")
+        return 0
+
+    except Exception as e:
+        print(f"\n✗ Erro: {e}", file=sys.stderr)
+        import traceback
+        traceback.print_exc()
+        return 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,138 @@
+"""
+Carregador do Parquet consolidado - Leitura preguiçosa com pushdown
+
+Este módulo:
+- Abre a saída da ingestão como `pyarrow.dataset` (Parquet único ou dataset
+  particionado por ano, o que tiver sido atualizado por último)
+- Monta filtros (intervalo/lista de anos, biomas, UFs, bounding box) que o
+  Arrow empurra para as partições e para as estatísticas dos row groups
+- Materializa em pandas só as colunas e linhas pedidas, e só quando
+  necessário (`scan_focos` devolve um Scanner preguiçoso)
+
+Uso:
+    from src.focos_loader import load_focos
+    df = load_focos(columns=["day", "bioma"], biomas=["Cerrado"], year_range=(2024, 2024))
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Iterable, Optional, Sequence
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from src.utils import PROCESSED_DIR
+
+PARQUET_NAME = "focos_2019_2024.parquet"
+DATASET_NAME = "focos_2019_2024"
+MANIFEST_NAME = "focos_manifest.json"
+
+# Linhas por row group: granularidade do pushdown nas estatísticas
+ROW_GROUP_SIZE = 128 * 1024
+
+# Valores de bioma que representam ausência (herdados do `astype(str)`)
+MISSING_BIOMAS = ("Nan", "nan")
+
+YEAR_PARTITIONING = ds.partitioning(pa.schema([("year", pa.int32())]), flavor="hive")
+
+
+def focos_source(processed_dir: Path = PROCESSED_DIR) -> Path:
+    """Caminho da saída mais recente da ingestão (arquivo ou diretório).
+
+    Quando existem o Parquet único e o dataset incremental, vale o que foi
+    atualizado por último.
+    """
+    parquet_path = processed_dir / PARQUET_NAME
+    manifest_path = processed_dir / MANIFEST_NAME
+    use_dataset = manifest_path.exists() and (
+        not parquet_path.exists()
+        or manifest_path.stat().st_mtime_ns > parquet_path.stat().st_mtime_ns
+    )
+    if use_dataset:
+        return processed_dir / DATASET_NAME
+    if not parquet_path.exists():
+        raise FileNotFoundError(
+            f"{parquet_path} não encontrado. Execute pipeline_ingestao.py primeiro."
+        )
+    return parquet_path
+
+
+def open_focos(processed_dir: Path = PROCESSED_DIR) -> ds.Dataset:
+    """Abre a saída da ingestão como dataset Arrow (nada é lido ainda)."""
+    source = focos_source(processed_dir)
+    if source.is_dir():
+        return ds.dataset(source, format="parquet", partitioning=YEAR_PARTITIONING)
+    return ds.dataset(source, format="parquet")
+
+
+def build_filter(
+    years: Optional[Iterable[int]] = None,
+    year_range: Optional[tuple[int, int]] = None,
+    biomas: Optional[Iterable[str]] = None,
+    ufs: Optional[Iterable[str]] = None,
+    bbox: Optional[tuple[float, float, float, float]] = None,
+    drop_missing_bioma: bool = False,
+) -> Optional[ds.Expression]:
+    """Combina os filtros pedidos em uma expressão Arrow (ou None).
+
+    `year_range` é inclusivo; `bbox` segue a ordem (lon_min, lat_min,
+    lon_max, lat_max).
+    """
+    terms = []
+    if years is not None:
+        terms.append(ds.field("year").isin([int(year) for year in years]))
+    if year_range is not None:
+        start, end = year_range
+        terms.append((ds.field("year") >= int(start)) & (ds.field("year") <= int(end)))
+    if biomas is not None:
+        terms.append(ds.field("bioma").isin(list(biomas)))
+    if drop_missing_bioma:
+        terms.append(ds.field("bioma").is_valid() & ~ds.field("bioma").isin(list(MISSING_BIOMAS)))
+    if ufs is not None:
+        terms.append(ds.field("estado").isin(list(ufs)))
+    if bbox is not None:
+        lon_min, lat_min, lon_max, lat_max = bbox
+        terms.append(
+            (ds.field("lon") >= lon_min) & (ds.field("lon") <= lon_max)
+            & (ds.field("lat") >= lat_min) & (ds.field("lat") <= lat_max)
+        )
+    if not terms:
+        return None
+    expression = terms[0]
+    for term in terms[1:]:
+        expression = expression & term
+    return expression
+
+
+def scan_focos(
+    columns: Optional[Sequence[str]] = None,
+    processed_dir: Path = PROCESSED_DIR,
+    **filters,
+) -> ds.Scanner:
+    """Scanner preguiçoso com projeção e filtros (ver `build_filter`).
+
+    Colunas pedidas que não existem no dataset são ignoradas.
+    """
+    dataset = open_focos(processed_dir)
+    if columns is not None:
+        columns = [col for col in columns if col in dataset.schema.names]
+    return dataset.scanner(columns=columns, filter=build_filter(**filters))
+
+
+def load_focos(
+    columns: Optional[Sequence[str]] = None,
+    processed_dir: Path = PROCESSED_DIR,
+    **filters,
+) -> pd.DataFrame:
+    """Materializa em pandas apenas as colunas e linhas selecionadas."""
+    return scan_focos(columns, processed_dir, **filters).to_table().to_pandas()
+
+
+def read_processed(
+    processed_dir: Path = PROCESSED_DIR,
+    columns: Optional[Sequence[str]] = None,
+) -> pd.DataFrame:
+    """Lê a saída da ingestão inteira (ou só `columns`), sem filtros."""
+    return load_focos(columns, processed_dir)
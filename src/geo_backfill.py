@@ -0,0 +1,530 @@
+"""
+Preenchimento geográfico - bioma, UF e município a partir dos limites oficiais
+
+Parte dos focos chega sem bioma, UF ou município ("Nan" após a limpeza) e
+some das figuras. Este módulo atribui esses campos pela posição (`lat`,
+`lon`), testando os pontos contra polígonos locais em GeoJSON (ex.: IBGE:
+biomas, UFs e municípios em `data/limites/`):
+- Cada camada é uma cobertura sem sobreposição (um bioma, UF ou município
+  por ponto); anéis internos (buracos) e multipolígonos entram pela regra
+  par-ímpar
+- As arestas são distribuídas numa grade (`Grid` de `spatial_index`, layout
+  CSR por célula). O polígono que contém o ponto de referência de cada
+  célula sai de uma varredura por linha da grade, vetorizada
+- Ponto em célula sem arestas herda o polígono da referência. Nas células
+  de borda, conta-se quantas arestas de cada polígono o segmento
+  referência → ponto cruza (só as arestas da célula): paridade ímpar troca
+  de polígono. Tudo em NumPy, em lotes, sem laço por ponto
+- Os resultados ficam em cache por coordenada arredondada (4 casas, ~11 m),
+  na memória e em `data/cache/geo_backfill.npz` (invalidado quando os
+  arquivos de limites mudam); só coordenadas novas são testadas
+- Com `workers > 1`, as coordenadas novas são divididas entre processos
+
+Focos fora de todos os polígonos (ex.: países vizinhos, sem bioma
+brasileiro) continuam "Nan".
+
+Uso:
+    python -m src.pipeline_ingestao --limites
+    python -m src.geo_backfill
+    python -m src.geo_backfill --limites data/limites --workers 4
+
+    from src.geo_backfill import BoundaryLookup, backfill_missing
+    lookup = BoundaryLookup.from_dir()
+    df, preenchidos = backfill_missing(df, lookup)
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Mapping, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.artifact_cache import CACHE_DIR, input_fingerprint
+from src.focos_loader import MISSING_BIOMAS, load_focos
+from src.instrumentation import detach_report
+from src.spatial_index import Grid
+from src.utils import DATA_DIR, PROCESSED_DIR
+
+BOUNDARIES_DIR = DATA_DIR / "limites"
+# Coluna preenchida → (arquivo GeoJSON, propriedade com o nome do polígono)
+DEFAULT_LAYERS: dict[str, tuple[str, str]] = {
+    "bioma": ("biomas.geojson", "Bioma"),
+    "estado": ("ufs.geojson", "NM_UF"),
+    "municipio": ("municipios.geojson", "NM_MUN"),
+}
+MISSING_VALUES = MISSING_BIOMAS
+
+DEFAULT_CELL_DEG = 0.05
+ROUND_DECIMALS = 4
+CACHE_PATH = CACHE_DIR / "geo_backfill.npz"
+
+# Pares (ponto, aresta) testados por lote nas células de borda
+PAIR_BATCH = 4_000_000
+# Desloca as referências das células para fora de vértices em coordenadas "redondas"
+_REFERENCE_JITTER = 1.234567e-7
+_SCALE = 10**ROUND_DECIMALS
+
+
+def read_geojson(path: Path, name_property: str) -> tuple[list[str], np.ndarray, np.ndarray]:
+    """Nomes dos polígonos e arestas (lon1, lat1, lon2, lat2) com o polígono de cada uma."""
+    with open(path, encoding="utf-8") as fh:
+        data = json.load(fh)
+
+    names, edges, owners = [], [], []
+    for feature in data.get("features", []):
+        geometry = feature.get("geometry") or {}
+        if geometry.get("type") == "Polygon":
+            polygons = [geometry["coordinates"]]
+        elif geometry.get("type") == "MultiPolygon":
+            polygons = geometry["coordinates"]
+        else:
+            continue
+        properties = feature.get("properties") or {}
+        if name_property not in properties:
+            raise ValueError(
+                f"{path.name}: propriedade {name_property!r} ausente "
+                f"(disponíveis: {', '.join(map(str, properties))})"
+            )
+        owner = len(names)
+        names.append(str(properties[name_property]))
+        for polygon in polygons:
+            for ring in polygon:
+                ring = np.asarray(ring, dtype=np.float64)[:, :2]
+                if len(ring) < 3:
+                    continue
+                if not np.array_equal(ring[0], ring[-1]):
+                    ring = np.vstack([ring, ring[:1]])
+                edges.append(np.hstack([ring[:-1], ring[1:]]))
+                owners.append(np.full(len(ring) - 1, owner, dtype=np.int32))
+    if not edges:
+        raise ValueError(f"{path.name}: nenhum polígono encontrado")
+    return names, np.concatenate(edges), np.concatenate(owners)
+
+
+def _orientation(ax, ay, bx, by, px, py) -> np.ndarray:
+    return (bx - ax) * (py - ay) - (by - ay) * (px - ax)
+
+
+@dataclass
+class BoundaryLayer:
+    """Polígonos de uma camada com as arestas indexadas por célula da grade."""
+
+    column: str
+    names: np.ndarray
+    grid: Grid
+    edges: np.ndarray
+    edge_owner: np.ndarray
+    cell_offsets: np.ndarray
+    cell_edges: np.ndarray
+    reference_owner: np.ndarray
+
+    @classmethod
+    def build(
+        cls,
+        column: str,
+        names: Sequence[str],
+        edges: np.ndarray,
+        edge_owner: np.ndarray,
+        cell_deg: float = DEFAULT_CELL_DEG,
+    ) -> "BoundaryLayer":
+        x1, y1, x2, y2 = edges.T
+        grid = Grid.covering(
+            min(y1.min(), y2.min()), max(y1.max(), y2.max()),
+            min(x1.min(), x2.min()), max(x1.max(), x2.max()), cell_deg,
+        )
+
+        # Cada aresta entra em todas as células do seu retângulo envolvente
+        r0, r1 = grid.rows(np.minimum(y1, y2)), grid.rows(np.maximum(y1, y2))
+        c0, c1 = grid.cols(np.minimum(x1, x2)), grid.cols(np.maximum(x1, x2))
+        n_cols = (c1 - c0 + 1).astype(np.int64)
+        sizes = (r1 - r0 + 1).astype(np.int64) * n_cols
+        edge_ids = np.repeat(np.arange(len(edges), dtype=np.int64), sizes)
+        k = np.arange(int(sizes.sum()), dtype=np.int64) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+        cells = (r0[edge_ids] + k // n_cols[edge_ids]) * grid.n_lon + c0[edge_ids] + k % n_cols[edge_ids]
+        order = np.argsort(cells, kind="stable")
+        cell_offsets = np.zeros(grid.n_cells + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cells, minlength=grid.n_cells), out=cell_offsets[1:])
+
+        layer = cls(
+            column, np.asarray(names, dtype=object), grid, edges, edge_owner.astype(np.int32),
+            cell_offsets, edge_ids[order].astype(np.int32), np.empty(0, dtype=np.int32),
+        )
+        layer.reference_owner = layer._scan_references()
+        return layer
+
+    def reference_points(self) -> tuple[np.ndarray, np.ndarray]:
+        """Latitudes das linhas e longitudes das colunas dos pontos de referência."""
+        grid = self.grid
+        ref_lat = grid.lat_min + (np.arange(grid.n_lat) + 0.5) * grid.cell_deg + _REFERENCE_JITTER
+        ref_lon = grid.lon_min + (np.arange(grid.n_lon) + 0.5) * grid.cell_deg + _REFERENCE_JITTER
+        return ref_lat, ref_lon
+
+    def _scan_references(self) -> np.ndarray:
+        """Polígono de cada referência (-1: nenhum), varrendo cada linha de oeste a leste.
+
+        Na latitude de referência de cada linha, as arestas cruzadas (regra
+        meio-aberta: y1 <= y < y2) são ordenadas por longitude; o n-ésimo
+        cruzamento de um polígono entra nele (n ímpar) ou sai (n par).
+        """
+        ref_lat, ref_lon = self.reference_points()
+        x1, y1, x2, y2 = self.edges.T
+        # Extremos na ordem canônica: arestas compartilhadas cruzam no mesmo x
+        swap = y1 > y2
+        ax, ay = np.where(swap, x2, x1), np.where(swap, y2, y1)
+        bx, by = np.where(swap, x1, x2), np.where(swap, y1, y2)
+        first = np.searchsorted(ref_lat, ay, side="left")
+        last = np.searchsorted(ref_lat, by, side="left")
+        sizes = (last - first).astype(np.int64)
+        edge_ids = np.repeat(np.arange(len(self.edges), dtype=np.int64), sizes)
+        rows = first[edge_ids] + np.arange(int(sizes.sum()), dtype=np.int64) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+        ax, ay, bx, by = ax[edge_ids], ay[edge_ids], bx[edge_ids], by[edge_ids]
+        x = ax + (ref_lat[rows] - ay) * (bx - ax) / (by - ay)
+        owner = self.edge_owner[edge_ids]
+
+        # Ordem do cruzamento dentro de (linha, polígono): par = entrada
+        by_owner = np.lexsort((x, owner, rows))
+        group = rows[by_owner] * (len(self.names) + 1) + owner[by_owner]
+        starts = np.flatnonzero(np.r_[True, group[1:] != group[:-1]])
+        rank = np.arange(len(by_owner)) - np.repeat(starts, np.diff(np.r_[starts, len(by_owner)]))
+        entering = np.empty(len(by_owner), dtype=bool)
+        entering[by_owner] = rank % 2 == 0
+        # Cruzamento de saída que fecha cada entrada (o seguinte do mesmo polígono)
+        closing = np.full(len(by_owner), -1, dtype=np.int64)
+        paired = (rank[:-1] % 2 == 0) & (group[1:] == group[:-1])
+        closing[by_owner[:-1][paired]] = by_owner[1:][paired]
+
+        # Estado após cada cruzamento; no mesmo x, a saída vem antes da entrada
+        order = np.lexsort((entering, x, rows))
+        n = len(order)
+        position = np.empty(n, dtype=np.int64)
+        position[order] = np.arange(n)
+        rows, x, owner, entering = rows[order], x[order], owner[order], entering[order]
+        closes_at = np.where(closing[order] >= 0, position[np.maximum(closing[order], 0)], n)
+        state = np.where(entering, owner, -1).astype(np.int32)
+
+        # Saída com outro polígono ainda aberto (sobreposição entre vizinhos,
+        # polígono aninhado): volta ao último aberto que ainda não fechou
+        step = np.where(entering, 1, -1)
+        depth = np.cumsum(step)
+        row_start = np.searchsorted(rows, rows, side="left")
+        depth -= np.r_[0, depth][row_start]
+        last_enter = np.maximum.accumulate(np.where(entering, np.arange(n), -1))
+        pending = np.flatnonzero(~entering & (depth > 0))
+        candidate = last_enter[np.maximum(pending - 1, 0)]
+        while len(pending):
+            valid = (candidate >= row_start[pending]) & (candidate < pending)
+            still_open = valid & (closes_at[np.maximum(candidate, 0)] > pending)
+            state[pending[still_open]] = owner[candidate[still_open]]
+            retry = valid & ~still_open
+            pending, candidate = pending[retry], candidate[retry]
+            candidate = np.where(candidate > 0, last_enter[np.maximum(candidate - 1, 0)], -1)
+
+        span = self.grid.n_lon * self.grid.cell_deg + 1.0
+        key = rows * span + (x - self.grid.lon_min)
+        grid_rows = np.repeat(np.arange(self.grid.n_lat, dtype=np.int64), self.grid.n_lon)
+        queries = grid_rows * span + np.tile(ref_lon - self.grid.lon_min, self.grid.n_lat)
+        pos = np.searchsorted(key, queries, side="left") - 1
+        valid = pos >= 0
+        valid[valid] = rows[pos[valid]] == grid_rows[valid]
+        return np.where(valid, state[np.maximum(pos, 0)], -1).astype(np.int32)
+
+    def locate(self, lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+        """Índice do polígono que contém cada ponto (-1: fora de todos)."""
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        grid = self.grid
+        result = np.full(len(lat), -1, dtype=np.int32)
+        inside = (
+            (lat >= grid.lat_min) & (lat <= grid.lat_min + grid.n_lat * grid.cell_deg)
+            & (lon >= grid.lon_min) & (lon <= grid.lon_min + grid.n_lon * grid.cell_deg)
+        )
+        points = np.flatnonzero(inside)
+        cells = grid.cell_ids(lat[points], lon[points]).astype(np.int64)
+        result[points] = self.reference_owner[cells]
+
+        # Células de borda: segmento referência → ponto contra as arestas da célula
+        n_edges = self.cell_offsets[cells + 1] - self.cell_offsets[cells]
+        border = np.flatnonzero(n_edges > 0)
+        ref_lat, ref_lon = self.reference_points()
+        total_pairs = np.cumsum(n_edges[border])
+        start = 0
+        while start < len(border):
+            done = total_pairs[start - 1] if start else 0
+            end = max(start + 1, int(np.searchsorted(total_pairs, done + PAIR_BATCH, side="right")))
+            chunk = border[start:end]
+            start = end
+            sizes = n_edges[chunk]
+            pair_point = np.repeat(chunk, sizes)
+            k = np.arange(int(sizes.sum()), dtype=np.int64) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+            edge_ids = self.cell_edges[self.cell_offsets[cells[pair_point]] + k]
+
+            px, py = lon[points[pair_point]], lat[points[pair_point]]
+            cx = ref_lon[cells[pair_point] % grid.n_lon]
+            cy = ref_lat[cells[pair_point] // grid.n_lon]
+            x1, y1, x2, y2 = self.edges[edge_ids].T
+            # Cruzamento próprio; vértice sobre o segmento conta de um lado só
+            crosses = (
+                ((_orientation(x1, y1, x2, y2, cx, cy) > 0) != (_orientation(x1, y1, x2, y2, px, py) > 0))
+                & ((_orientation(cx, cy, px, py, x1, y1) > 0) != (_orientation(cx, cy, px, py, x2, y2) > 0))
+            )
+            pair_point, owner = pair_point[crosses], self.edge_owner[edge_ids[crosses]]
+
+            # Polígonos cruzados um número ímpar de vezes
+            n_owners = len(self.names)
+            pairs, counts = np.unique(pair_point * n_owners + owner, return_counts=True)
+            odd = pairs[counts % 2 == 1]
+            odd_point, odd_owner = odd // n_owners, (odd % n_owners).astype(np.int32)
+            reference = self.reference_owner[cells[odd_point]]
+            # Saiu do polígono da referência; entrar em outro tem precedência
+            left = odd_owner == reference
+            result[points[odd_point[left]]] = -1
+            result[points[odd_point[~left]]] = odd_owner[~left]
+        return result
+
+
+def _locate_all(layers: Sequence[BoundaryLayer], lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    return np.column_stack([layer.locate(lat, lon) for layer in layers]).astype(np.int32)
+
+
+_worker_layers: Sequence[BoundaryLayer] = ()
+
+
+def _init_worker(layers: Sequence[BoundaryLayer]) -> None:
+    global _worker_layers
+    detach_report()
+    _worker_layers = layers
+
+
+def _locate_in_worker(coords: tuple[np.ndarray, np.ndarray]) -> np.ndarray:
+    return _locate_all(_worker_layers, *coords)
+
+
+def coordinate_keys(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    """Chave int64 da coordenada arredondada a `ROUND_DECIMALS` casas."""
+    lat_q = np.round(np.asarray(lat, dtype=np.float64) * _SCALE).astype(np.int64)
+    lon_q = np.round(np.asarray(lon, dtype=np.float64) * _SCALE).astype(np.int64)
+    return (lat_q + 90 * _SCALE) * (360 * _SCALE + 1) + (lon_q + 180 * _SCALE)
+
+
+def key_coordinates(keys: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Coordenada arredondada de cada chave (o ponto efetivamente testado)."""
+    lat_q, lon_q = np.divmod(keys, 360 * _SCALE + 1)
+    return (lat_q - 90 * _SCALE) / _SCALE, (lon_q - 180 * _SCALE) / _SCALE
+
+
+class BoundaryLookup:
+    """Camadas de limites + cache por coordenada arredondada."""
+
+    def __init__(
+        self,
+        layers: Sequence[BoundaryLayer],
+        fingerprint: str = "",
+        cache_path: Optional[Path] = CACHE_PATH,
+        workers: int = 1,
+    ):
+        self.layers = list(layers)
+        self.columns = [layer.column for layer in self.layers]
+        self.fingerprint = fingerprint
+        self.cache_path = cache_path
+        self.workers = workers
+        self._keys = np.empty(0, dtype=np.int64)
+        self._owners = np.empty((0, len(self.layers)), dtype=np.int32)
+        self._dirty = False
+        self._load_cache()
+
+    def __len__(self) -> int:
+        """Coordenadas arredondadas já resolvidas (cache)."""
+        return len(self._keys)
+
+    @classmethod
+    def from_dir(
+        cls,
+        boundaries_dir: Path = BOUNDARIES_DIR,
+        layers: Mapping[str, tuple[str, str]] = DEFAULT_LAYERS,
+        cell_deg: float = DEFAULT_CELL_DEG,
+        workers: int = 1,
+        cache_path: Optional[Path] = CACHE_PATH,
+    ) -> "BoundaryLookup":
+        """Camadas cujo arquivo existe em `boundaries_dir` (ao menos uma)."""
+        found = {
+            column: (boundaries_dir / file_name, prop)
+            for column, (file_name, prop) in layers.items()
+            if (boundaries_dir / file_name).exists()
+        }
+        if not found:
+            expected = ", ".join(file_name for file_name, _ in layers.values())
+            raise FileNotFoundError(f"Nenhum arquivo de limites em {boundaries_dir} (esperados: {expected})")
+        built = []
+        for column, (path, prop) in found.items():
+            names, edges, owners = read_geojson(path, prop)
+            built.append(BoundaryLayer.build(column, names, edges, owners, cell_deg))
+        fingerprint = input_fingerprint(path for path, _ in found.values())
+        fingerprint += json.dumps({column: prop for column, (_, prop) in found.items()}, sort_keys=True)
+        fingerprint += f"|{ROUND_DECIMALS}"
+        return cls(built, fingerprint, cache_path, workers)
+
+    def _load_cache(self) -> None:
+        if self.cache_path is None or not self.cache_path.exists():
+            return
+        with np.load(self.cache_path, allow_pickle=False) as cached:
+            if str(cached["fingerprint"]) != self.fingerprint:
+                return
+            self._keys, self._owners = cached["keys"], cached["owners"]
+
+    def save_cache(self) -> None:
+        """Grava o cache (temporário + rename) se houver coordenadas novas."""
+        if self.cache_path is None or not self._dirty:
+            return
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_path.with_suffix(".tmp.npz")
+        np.savez(tmp_path, fingerprint=np.array(self.fingerprint), keys=self._keys, owners=self._owners)
+        os.replace(tmp_path, self.cache_path)
+        self._dirty = False
+
+    def _compute(self, keys: np.ndarray) -> np.ndarray:
+        lat, lon = key_coordinates(keys)
+        workers = max(1, min(self.workers, len(keys) // 50_000))
+        if workers == 1:
+            return _locate_all(self.layers, lat, lon)
+        # Blocos na ordem das chaves (latitude): cada processo pega faixas contíguas
+        bounds = np.linspace(0, len(keys), workers * 4 + 1).astype(np.int64)
+        chunks = [(lat[a:b], lon[a:b]) for a, b in zip(bounds[:-1], bounds[1:])]
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(self.layers,)) as executor:
+            return np.concatenate(list(executor.map(_locate_in_worker, chunks)))
+
+    def owners(self, lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+        """Índice do polígono de cada ponto em cada camada, shape (n, camadas)."""
+        unique_keys, inverse = np.unique(coordinate_keys(lat, lon), return_inverse=True)
+        pos = np.zeros(len(unique_keys), dtype=np.int64)
+        cached = np.zeros(len(unique_keys), dtype=bool)
+        if len(self._keys):
+            pos = np.minimum(np.searchsorted(self._keys, unique_keys), len(self._keys) - 1)
+            cached = self._keys[pos] == unique_keys
+        result = np.empty((len(unique_keys), len(self.layers)), dtype=np.int32)
+        result[cached] = self._owners[pos[cached]]
+        new_keys = unique_keys[~cached]
+        if len(new_keys):
+            result[~cached] = self._compute(new_keys)
+            merged = np.concatenate([self._keys, new_keys])
+            order = np.argsort(merged, kind="stable")
+            self._keys = merged[order]
+            self._owners = np.concatenate([self._owners, result[~cached]])[order]
+            self._dirty = True
+        return result[inverse.ravel()]
+
+    def locate(self, lat: np.ndarray, lon: np.ndarray) -> dict[str, np.ndarray]:
+        """Nome do polígono de cada ponto por coluna (None fora de todos)."""
+        owners = self.owners(lat, lon)
+        labels = {}
+        for j, layer in enumerate(self.layers):
+            names = np.append(layer.names, None)
+            labels[layer.column] = names[owners[:, j]]
+        return labels
+
+
+def _normalize_labels(labels: np.ndarray) -> np.ndarray:
+    """Mesma normalização dos campos de texto na limpeza (strip + title)."""
+    values, inverse = np.unique(labels.astype(str), return_inverse=True)
+    return pd.Index(values).str.strip().str.title().to_numpy(object)[inverse]
+
+
+def backfill_missing(
+    df: pd.DataFrame,
+    lookup: BoundaryLookup,
+    missing: Sequence[str] = MISSING_VALUES,
+) -> tuple[pd.DataFrame, dict[str, int]]:
+    """Preenche as colunas das camadas onde o valor está ausente.
+
+    Só as linhas com coordenada e algum campo ausente são consultadas;
+    valores existentes nunca são trocados. Retorna o DataFrame e quantas
+    linhas de cada coluna foram preenchidas. O cache em disco só é gravado
+    por `lookup.save_cache()` (uma vez por execução, não por bloco).
+    """
+    columns = [column for column in lookup.columns if column in df.columns]
+    absent = {column: df[column].isna().to_numpy() | df[column].isin(missing).to_numpy() for column in columns}
+    rows = np.zeros(len(df), dtype=bool)
+    for mask in absent.values():
+        rows |= mask
+    rows &= df["lat"].notna().to_numpy() & df["lon"].notna().to_numpy()
+    positions = np.flatnonzero(rows)
+    filled = {column: 0 for column in columns}
+    if not len(positions):
+        return df, filled
+
+    labels = lookup.locate(df["lat"].to_numpy()[positions], df["lon"].to_numpy()[positions])
+    for column in columns:
+        found = absent[column][positions] & pd.notna(labels[column])
+        if not found.any():
+            continue
+        target = positions[found]
+        values = _normalize_labels(labels[column][found])
+        series = df[column]
+        if not isinstance(series.dtype, pd.CategoricalDtype):
+            series = series.astype("category")
+        series = series.cat.add_categories(pd.Index(np.unique(values)).difference(series.cat.categories))
+        codes = series.cat.codes.to_numpy().copy()
+        codes[target] = series.cat.categories.get_indexer(values)
+        # Categorias em ordem alfabética, como em `normalize_categorical`
+        merged = pd.Categorical.from_codes(codes, categories=series.cat.categories).remove_unused_categories()
+        df[column] = pd.Series(merged.reorder_categories(sorted(merged.categories)), index=df.index, name=column)
+        filled[column] = int(found.sum())
+    return df, filled
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Preenche bioma/UF/município dos focos pelos limites em GeoJSON")
+    parser.add_argument(
+        "--limites", type=Path, default=BOUNDARIES_DIR,
+        help=f"Diretório com {', '.join(name for name, _ in DEFAULT_LAYERS.values())} (padrão: {BOUNDARIES_DIR})",
+    )
+    parser.add_argument(
+        "--celula", type=float, default=DEFAULT_CELL_DEG,
+        help=f"Tamanho da célula da grade de arestas em graus (padrão: {DEFAULT_CELL_DEG})",
+    )
+    parser.add_argument("--workers", type=int, default=1, help="Processos para testar as coordenadas novas")
+    parser.add_argument("--sem-cache", action="store_true", help="Ignora o cache de coordenadas")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Execução principal: mede o preenchimento sobre os focos processados."""
+    args = parse_args(argv)
+    print("=== Preenchimento geográfico (bioma, UF, município) ===\n")
+    try:
+        start = time.perf_counter()
+        lookup = BoundaryLookup.from_dir(
+            args.limites, cell_deg=args.celula, workers=args.workers,
+            cache_path=None if args.sem_cache else CACHE_PATH,
+        )
+        for layer in lookup.layers:
+            print(f"  ✓ {layer.column}: {len(layer.names):,} polígonos, {len(layer.edges):,} arestas")
+        print(f"Limites indexados em {time.perf_counter() - start:.1f}s")
+
+        df = load_focos(["lat", "lon", *lookup.columns], PROCESSED_DIR)
+        before = {column: int(df[column].isin(MISSING_VALUES).sum()) for column in lookup.columns}
+        start = time.perf_counter()
+        df, filled = backfill_missing(df, lookup)
+        elapsed = time.perf_counter() - start
+        lookup.save_cache()
+        print(f"\n{len(df):,} focos em {elapsed:.1f}s ({len(lookup):,} coordenadas em cache):")
+        for column in lookup.columns:
+            print(f"  {column:<10} ausentes: {before[column]:>10,}  preenchíveis: {filled[column]:>10,}")
+        print("\nPara gravar o resultado: python -m src.pipeline_ingestao --limites")
+        return 0
+
+    except Exception as e:
+        print(f"\n✗ Erro: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,459 @@
+"""
+Instrumentação por etapa - Tempo, CPU, memória e linhas de cada etapa
+
+Este módulo:
+- Mede etapas nomeadas com `stage()` (gerenciador de contexto) ou
+  `@instrumented` (decorador): tempo de parede, tempo de CPU do processo,
+  RSS no início, pico de RSS durante a etapa e linhas de entrada/saída
+- Aceita etapas aninhadas (ex.: `limpeza` > `limpeza.datas`), registrando a
+  etapa-mãe; etapas repetidas (blocos do streaming) são somadas no resumo
+- Amostra o RSS em uma única thread por execução, a cada
+  `SAMPLE_INTERVAL_S`, lendo `/proc/self/statm` (sem custo por linha)
+- Grava o relatório da execução em JSON (etapas em ordem + resumo por nome)
+  e, opcionalmente, um trace no formato Chrome (chrome://tracing, Perfetto)
+- Opcionalmente roda cProfile nas etapas escolhidas (`.prof` ao lado do
+  relatório e as funções mais custosas no JSON)
+
+Fora de um `RunReport` ativo, `stage()` e `@instrumented` não medem nada,
+então as funções instrumentadas podem ser chamadas de qualquer lugar. Pools
+de processos usam `detach_report` como `initializer`: no fork, o filho
+herdaria uma cópia do relatório do pai (sem a thread de amostragem e talvez
+com o lock preso), e o que fosse medido nela se perderia.
+
+Uso:
+    from src.instrumentation import RunReport, instrumented, stage
+
+    with RunReport("pipeline_ingestao", cprofile_stages=["limpeza"]) as report:
+        with stage("leitura") as current:
+            raw = load()
+            current.rows_out = len(raw)
+    report.write_json(REPORTS_DIR / "pipeline_ingestao.json")
+"""
+
+from __future__ import annotations
+
+import argparse
+import cProfile
+import functools
+import json
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional, Sequence
+
+from src.utils import DATA_DIR
+
+REPORTS_DIR = DATA_DIR / "relatorios"
+
+# Intervalo de amostragem do RSS (uma leitura de /proc por amostra)
+SAMPLE_INTERVAL_S = 0.02
+# Amostras de RSS no trace só quando o valor muda pelo menos isso
+TRACE_RSS_STEP_MB = 1.0
+# Funções listadas no relatório para cada etapa com cProfile
+CPROFILE_TOP = 20
+
+
+def current_rss_mb() -> Optional[float]:
+    """RSS atual do processo em MB (Linux); None se indisponível."""
+    try:
+        with open("/proc/self/statm") as fh:
+            resident_pages = int(fh.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return resident_pages * os.sysconf("SC_PAGE_SIZE") / 1024**2
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Pico de RSS do processo em MB; None se indisponível."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss é em bytes no macOS e em KB no Linux
+    return peak / 1024**2 if sys.platform == "darwin" else peak / 1024
+
+
+def count_rows(value: Any) -> Optional[int]:
+    """Linhas de um DataFrame, Series, tabela Arrow ou array; None para o resto."""
+    if hasattr(value, "shape") and hasattr(value, "__len__"):
+        return len(value)
+    if hasattr(value, "num_rows"):
+        return value.num_rows
+    return None
+
+
+@dataclass
+class StageRecord:
+    """Uma execução de uma etapa (tempos em segundos, memória em MB)."""
+
+    etapa: str
+    mae: Optional[str]
+    nivel: int
+    inicio_s: float
+    detalhe: Optional[str] = None
+    segundos: float = 0.0
+    cpu_segundos: float = 0.0
+    rss_inicio_mb: Optional[float] = None
+    rss_pico_mb: Optional[float] = None
+    linhas_entrada: Optional[int] = None
+    linhas_saida: Optional[int] = None
+    thread: int = 0
+    erro: Optional[str] = None
+
+    @property
+    def rows_in(self) -> Optional[int]:
+        return self.linhas_entrada
+
+    @rows_in.setter
+    def rows_in(self, value: Any) -> None:
+        self.linhas_entrada = value if value is None or isinstance(value, int) else count_rows(value)
+
+    @property
+    def rows_out(self) -> Optional[int]:
+        return self.linhas_saida
+
+    @rows_out.setter
+    def rows_out(self, value: Any) -> None:
+        self.linhas_saida = value if value is None or isinstance(value, int) else count_rows(value)
+
+
+class _NullStage:
+    """Etapa fora de um relatório ativo: aceita `rows_in`/`rows_out` e ignora."""
+
+    rows_in = rows_out = None
+
+
+_NULL_STAGE = _NullStage()
+_active: Optional["RunReport"] = None
+
+
+@dataclass
+class _Profiled:
+    profile: cProfile.Profile = field(default_factory=cProfile.Profile)
+    calls: int = 0
+
+
+class RunReport:
+    """Relatório de uma execução; ativo dentro do bloco `with`.
+
+    `cprofile_stages` são nomes de etapas perfiladas com cProfile (todas as
+    ocorrências somadas; uma etapa perfilada por vez, sem aninhamento).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        cprofile_stages: Sequence[str] = (),
+        sample_interval: float = SAMPLE_INTERVAL_S,
+    ):
+        self.name = name
+        self.cprofile_stages = set(cprofile_stages)
+        self.sample_interval = sample_interval
+        self.records: list[StageRecord] = []
+        self.rss_samples: list[tuple[float, float]] = []
+        self.started_at: Optional[datetime] = None
+        self.seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.rss_peak_mb: Optional[float] = None
+        self.error: Optional[str] = None
+        self._profiles: dict[str, _Profiled] = {}
+        self._profiling = False
+        self._open: list[StageRecord] = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self._previous: Optional[RunReport] = None
+        self._t0 = self._cpu0 = 0.0
+
+    # Ciclo de vida -------------------------------------------------------
+
+    def __enter__(self) -> "RunReport":
+        global _active
+        self._previous, _active = _active, self
+        self.started_at = datetime.now()
+        self._t0, self._cpu0 = time.perf_counter(), time.process_time()
+        self._sample()
+        self._stop.clear()
+        self._sampler = threading.Thread(target=self._run_sampler, name="rss-sampler", daemon=True)
+        self._sampler.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        global _active
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+        self._sample()
+        self.seconds = time.perf_counter() - self._t0
+        self.cpu_seconds = time.process_time() - self._cpu0
+        if exc is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        _active = self._previous
+
+    def _run_sampler(self) -> None:
+        while not self._stop.wait(self.sample_interval):
+            self._sample()
+
+    def _sample(self) -> Optional[float]:
+        rss = current_rss_mb()
+        if rss is None:
+            return None
+        with self._lock:
+            if self.rss_peak_mb is None or rss > self.rss_peak_mb:
+                self.rss_peak_mb = rss
+            for record in self._open:
+                if record.rss_pico_mb is None or rss > record.rss_pico_mb:
+                    record.rss_pico_mb = rss
+            if not self.rss_samples or abs(rss - self.rss_samples[-1][1]) >= TRACE_RSS_STEP_MB:
+                self.rss_samples.append((time.perf_counter() - self._t0, rss))
+        return rss
+
+    # Etapas --------------------------------------------------------------
+
+    @contextmanager
+    def stage(self, name: str, rows_in: Any = None, detail: Optional[str] = None) -> Iterator[StageRecord]:
+        """Mede o bloco como a etapa `name`; `rows_out` pode ser atribuído dentro.
+
+        `detail` distingue ocorrências da mesma etapa (ex.: o arquivo lido).
+        """
+        stack = self._local.__dict__.setdefault("stack", [])
+        record = StageRecord(
+            etapa=name,
+            mae=stack[-1].etapa if stack else None,
+            nivel=len(stack),
+            inicio_s=time.perf_counter() - self._t0,
+            detalhe=detail,
+            thread=threading.get_ident(),
+        )
+        record.rows_in = rows_in
+        with self._lock:
+            self.records.append(record)
+            self._open.append(record)
+        stack.append(record)
+        record.rss_inicio_mb = self._sample()
+
+        profiled = None
+        if name in self.cprofile_stages and not self._profiling:
+            profiled = self._profiles.setdefault(name, _Profiled())
+            self._profiling = True
+            profiled.calls += 1
+            profiled.profile.enable()
+
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield record
+        except BaseException as exc:
+            record.erro = f"{type(exc).__name__}: {exc}"
+            raise
+        finally:
+            record.segundos = time.perf_counter() - wall
+            record.cpu_segundos = time.process_time() - cpu
+            if profiled is not None:
+                profiled.profile.disable()
+                self._profiling = False
+            stack.pop()
+            self._sample()
+            with self._lock:
+                self._open.remove(record)
+
+    # Relatório -----------------------------------------------------------
+
+    def summary(self) -> list[dict]:
+        """Totais por nome de etapa, na ordem da primeira ocorrência."""
+        by_name: dict[str, dict] = {}
+        for record in self.records:
+            entry = by_name.setdefault(record.etapa, {
+                "etapa": record.etapa, "mae": record.mae, "ocorrencias": 0,
+                "segundos": 0.0, "cpu_segundos": 0.0, "rss_pico_mb": None,
+                "linhas_entrada": None, "linhas_saida": None,
+            })
+            entry["ocorrencias"] += 1
+            entry["segundos"] += record.segundos
+            entry["cpu_segundos"] += record.cpu_segundos
+            if record.rss_pico_mb is not None:
+                entry["rss_pico_mb"] = max(entry["rss_pico_mb"] or 0.0, record.rss_pico_mb)
+            for key in ("linhas_entrada", "linhas_saida"):
+                if record.__dict__[key] is not None:
+                    entry[key] = (entry[key] or 0) + record.__dict__[key]
+        for entry in by_name.values():
+            entry["segundos"] = round(entry["segundos"], 4)
+            entry["cpu_segundos"] = round(entry["cpu_segundos"], 4)
+            entry["rss_pico_mb"] = _round_mb(entry["rss_pico_mb"])
+        return list(by_name.values())
+
+    def profile_top(self, name: str, limit: int = CPROFILE_TOP) -> list[dict]:
+        """Funções com maior tempo acumulado na etapa perfilada `name`."""
+        stats = pstats.Stats(self._profiles[name].profile)
+        rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+        return [
+            {
+                "funcao": pstats.func_std_string(func),
+                "chamadas": n_calls,
+                "tempo_proprio_s": round(own, 4),
+                "tempo_acumulado_s": round(cumulative, 4),
+            }
+            for func, (_, n_calls, own, cumulative, _) in rows
+        ]
+
+    def to_dict(self) -> dict:
+        records = []
+        for record in self.records:
+            entry = asdict(record)
+            for key in ("inicio_s", "segundos", "cpu_segundos"):
+                entry[key] = round(entry[key], 4)
+            for key in ("rss_inicio_mb", "rss_pico_mb"):
+                entry[key] = _round_mb(entry[key])
+            records.append(entry)
+        return {
+            "execucao": self.name,
+            "inicio": self.started_at.isoformat(timespec="seconds") if self.started_at else None,
+            "pid": os.getpid(),
+            "argv": sys.argv,
+            "segundos": round(self.seconds, 4),
+            "cpu_segundos": round(self.cpu_seconds, 4),
+            "rss_pico_mb": _round_mb(self.rss_peak_mb),
+            "erro": self.error,
+            "resumo": self.summary(),
+            "etapas": records,
+            "cprofile": {
+                name: {"ocorrencias": profiled.calls, "funcoes": self.profile_top(name)}
+                for name, profiled in self._profiles.items()
+            },
+        }
+
+    def write_json(self, path: Path) -> Path:
+        """Grava o relatório; com etapas perfiladas, também `<relatório>.<etapa>.prof`."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        for name, profiled in self._profiles.items():
+            profiled.profile.dump_stats(str(path.with_suffix(f".{_slug(name)}.prof")))
+        path.write_text(json.dumps(self.to_dict(), indent=2, ensure_ascii=False), encoding="utf-8")
+        return path
+
+    def write_chrome_trace(self, path: Path) -> Path:
+        """Trace no formato Chrome: uma barra por etapa e o RSS como contador."""
+        pid = os.getpid()
+        events: list[dict] = [
+            {"name": "process_name", "ph": "M", "pid": pid, "args": {"name": self.name}},
+        ]
+        for record in self.records:
+            events.append({
+                "name": record.etapa,
+                "cat": record.mae or self.name,
+                "ph": "X",
+                "ts": round(record.inicio_s * 1e6, 1),
+                "dur": round(record.segundos * 1e6, 1),
+                "pid": pid,
+                "tid": record.thread,
+                "args": {
+                    "detalhe": record.detalhe,
+                    "cpu_s": round(record.cpu_segundos, 4),
+                    "rss_inicio_mb": _round_mb(record.rss_inicio_mb),
+                    "rss_pico_mb": _round_mb(record.rss_pico_mb),
+                    "linhas_entrada": record.linhas_entrada,
+                    "linhas_saida": record.linhas_saida,
+                },
+            })
+        for elapsed, rss in self.rss_samples:
+            events.append({
+                "name": "RSS (MB)", "ph": "C", "ts": round(elapsed * 1e6, 1), "pid": pid,
+                "args": {"rss": round(rss, 1)},
+            })
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}), encoding="utf-8")
+        return path
+
+
+def _round_mb(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value, 1)
+
+
+def _slug(name: str) -> str:
+    return re.sub(r"[^\w.-]+", "_", name)
+
+
+def active_report() -> Optional[RunReport]:
+    """Relatório ativo na execução atual (None fora de `with RunReport(...)`)."""
+    return _active
+
+
+def detach_report() -> None:
+    """Descarta o relatório herdado do pai (`initializer` de pools de processos)."""
+    global _active
+    _active = None
+
+
+@contextmanager
+def stage(name: str, rows_in: Any = None, detail: Optional[str] = None) -> Iterator[Any]:
+    """Mede o bloco no relatório ativo; sem relatório, não faz nada."""
+    report = _active
+    if report is None:
+        yield _NULL_STAGE
+        return
+    with report.stage(name, rows_in, detail) as record:
+        yield record
+
+
+def instrumented(name: Optional[str] = None) -> Callable[[Callable], Callable]:
+    """Decorador: mede cada chamada como a etapa `name` (padrão: nome da função).
+
+    As linhas de entrada vêm do primeiro argumento com linhas (DataFrame,
+    tabela Arrow, ...) e as de saída, do valor retornado.
+    """
+    def decorate(func: Callable) -> Callable:
+        stage_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _active is None:
+                return func(*args, **kwargs)
+            rows_in = next((n for n in map(count_rows, args) if n is not None), None)
+            with _active.stage(stage_name, rows_in) as record:
+                result = func(*args, **kwargs)
+                record.rows_out = result
+            return result
+
+        return wrapper
+
+    return decorate
+
+
+def add_report_arguments(parser: argparse.ArgumentParser, name: str) -> None:
+    """Opções de relatório comuns aos scripts (`--relatorio`, `--trace`, `--cprofile`)."""
+    parser.add_argument(
+        "--relatorio", type=Path, default=REPORTS_DIR / f"{name}.json",
+        help=f"Relatório JSON da execução, por etapa (padrão: data/relatorios/{name}.json)",
+    )
+    parser.add_argument(
+        "--trace", type=Path, default=None,
+        help="Grava também um trace no formato Chrome (chrome://tracing, Perfetto)",
+    )
+    parser.add_argument(
+        "--cprofile", nargs="+", default=[], metavar="ETAPA",
+        help="Roda cProfile nestas etapas (ex.: limpeza); .prof ao lado do relatório",
+    )
+
+
+def write_reports(report: RunReport, json_path: Optional[Path], trace_path: Optional[Path] = None) -> None:
+    """Grava o relatório (e o trace) sem interromper o script se a gravação falhar."""
+    try:
+        if json_path is not None:
+            print(f"Relatório de execução: {report.write_json(json_path)}")
+        if trace_path is not None:
+            print(f"Trace: {report.write_chrome_trace(trace_path)}")
+    except OSError as e:
+        print(f"  ⚠ Relatório não gravado: {e}", file=sys.stderr)
+
+
+__all__ = [
+    "REPORTS_DIR", "RunReport", "StageRecord", "active_report", "add_report_arguments",
+    "count_rows", "detach_report", "current_rss_mb", "instrumented", "peak_rss_mb", "stage", "write_reports",
+]
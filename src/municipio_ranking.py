@@ -0,0 +1,147 @@
+"""
+Ranking de criticidade dos municípios - Por UF × município, vetorizado
+
+Municípios homônimos existem em UFs diferentes (ex.: "Bom Jesus" no PI, RS,
+SC, ...), então a chave é sempre (estado, municipio). Este módulo:
+- Conta os focos por município e ano em uma agregação só (cubo diário ou
+  dados por foco, via `count_by`) e monta a matriz município × ano
+- Calcula total, bioma predominante (contagem por bioma + primeira linha
+  de cada grupo após ordenar), tendência anual (inclinação de mínimos
+  quadrados sobre os anos, em uma multiplicação de matriz) e percentil
+- Seleciona o top-k por seleção parcial (`np.argpartition`), ordenando só
+  os k escolhidos
+- Exporta a tabela completa em `ranking_municipios.csv`
+
+Uso:
+    python -m src.municipio_ranking
+    python -m src.municipio_ranking --top 20 --uf Pará "Mato Grosso"
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from src.daily_cube import COUNT_COL, count_by, drop_missing
+from src.eda_utils import load_counts
+from src.focos_loader import MISSING_BIOMAS
+from src.utils import PROCESSED_DIR
+
+RANKING_NAME = "ranking_municipios.csv"
+RANKING_KEYS = ["estado", "municipio"]
+
+
+def rank_municipios(data: pd.DataFrame) -> pd.DataFrame:
+    """Tabela de criticidade, uma linha por (estado, municipio).
+
+    Aceita o cubo diário ou os dados por foco. Colunas: chaves,
+    `total_focos`, `posicao` (1 = mais focos), `percentil` (% dos municípios
+    com total menor ou igual), `bioma` predominante e sua `pct_bioma`,
+    `focos_<ano>` por ano, `tendencia_anual` (focos/ano) e `tendencia_pct`
+    (tendência sobre a média anual). Linhas na ordem das chaves.
+    """
+    data = drop_missing(data, "municipio")
+    by_year = count_by(data, [*RANKING_KEYS, "year"])
+    by_year_matrix = by_year.pivot_table(
+        index=RANKING_KEYS, columns="year", values=COUNT_COL,
+        aggfunc="sum", fill_value=0, observed=True,
+    )
+    years = by_year_matrix.columns.to_numpy(dtype=np.float64)
+    matrix = by_year_matrix.to_numpy(dtype=np.float64)
+    total = matrix.sum(axis=1)
+
+    ranking = by_year_matrix.index.to_frame(index=False)
+    ranking["total_focos"] = total.astype(np.int64)
+    ranking["posicao"] = ranking["total_focos"].rank(method="min", ascending=False).astype(np.int32)
+    ranking["percentil"] = (ranking["total_focos"].rank(method="max", pct=True) * 100).round(2)
+
+    # Bioma predominante: maior contagem entre os biomas conhecidos ("Nan" não
+    # conta); empates ficam com o primeiro bioma
+    by_bioma = count_by(drop_missing(data, "bioma", MISSING_BIOMAS), [*RANKING_KEYS, "bioma"])
+    dominant = (
+        by_bioma.sort_values(COUNT_COL, ascending=False, kind="stable")
+        .drop_duplicates(RANKING_KEYS)
+        .rename(columns={COUNT_COL: "focos_bioma"})
+    )
+    ranking = ranking.merge(dominant, on=RANKING_KEYS, how="left")
+    ranking["pct_bioma"] = (ranking.pop("focos_bioma") / ranking["total_focos"] * 100).round(2)
+
+    for j, year in enumerate(by_year_matrix.columns):
+        ranking[f"focos_{year}"] = matrix[:, j].astype(np.int64)
+
+    # Inclinação de mínimos quadrados de focos × ano, todos os municípios de uma vez
+    centered = years - years.mean()
+    denominator = np.sum(centered**2)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        slope = matrix @ centered / denominator if denominator > 0 else np.full(len(matrix), np.nan)
+        mean_per_year = total / len(years)
+        ranking["tendencia_anual"] = slope.round(2)
+        ranking["tendencia_pct"] = np.where(mean_per_year > 0, slope / mean_per_year * 100, np.nan).round(2)
+    return ranking[["posicao", *ranking.columns.drop("posicao")]]
+
+
+def top_k(ranking: pd.DataFrame, k: int, column: str = "total_focos") -> pd.DataFrame:
+    """As `k` linhas com maior `column`, em ordem decrescente.
+
+    Seleção parcial: `argpartition` acha os k maiores em O(n) e só eles são
+    ordenados. Empates no corte e na ordem ficam com a linha que vem antes
+    na tabela (ordem das chaves).
+    """
+    values = ranking[column].to_numpy()
+    k = min(k, len(values))
+    if k == 0:
+        return ranking.iloc[:0]
+    if k < len(values):
+        kth = values[np.argpartition(-values, k - 1)[k - 1]]
+        candidates = np.flatnonzero(values >= kth)
+    else:
+        candidates = np.arange(len(values))
+    order = candidates[np.lexsort((candidates, -values[candidates]))][:k]
+    return ranking.iloc[order]
+
+
+def write_ranking(ranking: pd.DataFrame, processed_dir: Path = PROCESSED_DIR) -> Path:
+    """Grava a tabela completa, da posição 1 em diante."""
+    output_path = processed_dir / RANKING_NAME
+    ranking.sort_values(["posicao", *RANKING_KEYS], kind="stable").to_csv(output_path, index=False)
+    return output_path
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Ranking de criticidade dos municípios (UF × município)")
+    parser.add_argument("--top", type=int, default=15, help="Municípios exibidos (padrão: 15)")
+    parser.add_argument("--uf", nargs="+", default=None, help="Restringe o ranking a estas UFs")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Execução principal."""
+    args = parse_args(argv)
+    print("=== Ranking de criticidade dos municípios ===\n")
+    try:
+        counts = load_counts(PROCESSED_DIR)
+        if args.uf:
+            counts = counts[counts["estado"].isin(args.uf)]
+        ranking = rank_municipios(counts)
+        output_path = write_ranking(ranking, PROCESSED_DIR)
+        print(f"✓ {output_path.name} ({len(ranking):,} municípios)\n")
+
+        columns = ["posicao", *RANKING_KEYS, "total_focos", "percentil", "bioma", "tendencia_pct"]
+        with pd.option_context("display.width", 120):
+            print(top_k(ranking, args.top)[columns].to_string(index=False))
+        return 0
+
+    except Exception as e:
+        print(f"\n✗ Erro: {e}", file=sys.stderr)
+        import traceback
+        traceback.print_exc()
+        return 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -3,24 +3,75 @@ Pipeline de Ingestão e Consolidação - Focos de Queimadas (2019-2024)
 
 Este script:
 - Carrega CSVs anuais de data/raw/queimadas/
-- Normaliza encoding (UTF-8/latin1 fallback)
+- Normaliza encoding (UTF-8/latin1 detectado por amostra; ver csv_readers)
+- Lê só as colunas usadas, com dtypes compactos (ver schema)
 - Limpa e padroniza colunas (estado, município, bioma, datas)
+- Opcionalmente (`--pais`), descarta na leitura os focos de outros países
+  (os arquivos AMS cobrem a América do Sul), antes de qualquer limpeza
 - Valida coordenadas geográficas
+- Opcionalmente (`--limites`), preenche bioma/UF/município ausentes pela
+  posição, com os limites em GeoJSON de data/limites/ (ver geo_backfill)
 - Gera campos derivados (dia, semana, mês, ano)
 - Exporta para Parquet consolidado em data/processed/
+- Gera o cubo diário (dia × bioma × UF × município) para as análises
+- Gera o índice espacial em grade (consultas por área, raio e vizinhos)
+- Opcionalmente (`--perfil`), gera o perfil das colunas (resumo_colunas.csv)
+- Mede cada etapa (tempo, CPU, pico de RSS, linhas) e grava o relatório da
+  execução em data/relatorios/ (ver instrumentation)
+
+Modo streaming (memória limitada): lê cada CSV em blocos, limpa e deriva
+campos por bloco e grava row groups incrementalmente no mesmo Parquet.
+
+Modo paralelo: cada arquivo anual é lido, normalizado e limpo em um processo
+separado; os resultados são concatenados na ordem dos arquivos.
+
+Modo incremental: mantém um manifesto dos CSVs de origem (tamanho, mtime,
+hash, linhas, schema) e um dataset Parquet particionado por ano; apenas
+arquivos novos ou alterados são reprocessados.
 
 Uso:
     python -m src.pipeline_ingestao
+    python -m src.pipeline_ingestao --streaming --memoria-max-mb 512
+    python -m src.pipeline_ingestao --streaming --perfil
+    python -m src.pipeline_ingestao --workers 8
+    python -m src.pipeline_ingestao --incremental
+    python -m src.pipeline_ingestao --limites --workers 4
+    python -m src.pipeline_ingestao --pais --incremental
+    python -m src.pipeline_ingestao --trace trace.json --cprofile limpeza
 """
 
 from __future__ import annotations
 
+import argparse
+import hashlib
+import json
+import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional, Sequence
 
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pandas.api.types import union_categoricals
+
+from src.column_profiler import ColumnProfiler, profile_focos, write_summary
+from src.csv_readers import (
+    BACKENDS, COUNTRY_COLUMN, DEFAULT_BACKEND, country_columns, country_key, filter_countries,
+    pandas_read_kwargs, read_csv, sniff_encoding,
+)
+from src.daily_cube import CUBE_DIMENSIONS, CUBE_NAME, build_cube, combine_cubes, write_cube
+from src.focos_loader import DATASET_NAME, MANIFEST_NAME, PARQUET_NAME, ROW_GROUP_SIZE, read_processed
+from src.geo_backfill import BOUNDARIES_DIR, BoundaryLookup, backfill_missing
+from src.instrumentation import (
+    RunReport, add_report_arguments, current_rss_mb, detach_report, instrumented, peak_rss_mb, stage,
+    write_reports,
+)
+from src.schema import DEFAULT_COLUMNS, EXTRA_ARROW_TYPE, SCHEMA_BY_NAME, aliases
+from src.spatial_index import INDEX_COLUMNS, INDEX_NAME, Grid, build_index, write_index
 
 # Configurações
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
@@ -32,38 +83,74 @@ PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
 # Validações para território brasileiro (aproximado)
 LAT_MIN, LAT_MAX = -33.8, 5.3
 LON_MIN, LON_MAX = -74.1, -32.4
+# País mantido por `--pais` sem argumentos (o recorte acima não separa os vizinhos)
+DEFAULT_COUNTRY = "Brasil"
 
+# Grade do índice espacial: mesmo recorte da validação de coordenadas
+SPATIAL_GRID = Grid.covering(LAT_MIN, LAT_MAX, LON_MIN, LON_MAX)
 
-def read_csv_with_fallback(file_path: Path) -> pd.DataFrame:
-    """Lê CSV com fallback de encoding (UTF-8 -> latin1)."""
-    try:
-        df = pd.read_csv(file_path, encoding="utf-8", low_memory=False)
-        print(f"  ✓ {file_path.name} (UTF-8)")
-        return df
-    except UnicodeDecodeError:
-        df = pd.read_csv(file_path, encoding="latin1", low_memory=False)
-        print(f"  ✓ {file_path.name} (latin1 fallback)")
-        return df
+# Versão do layout de saída; mudanças invalidam o dataset incremental
+OUTPUT_VERSION = 3
 
+# Modo streaming
+DEFAULT_CHUNKSIZE = 200_000
+PROBE_ROWS = 10_000
+# Cópias simultâneas de um bloco durante a limpeza (bruto, filtros, Arrow)
+CHUNK_COPIES = 4
 
-def load_and_concatenate() -> pd.DataFrame:
-    """Carrega todos os CSVs de RAW_DIR e concatena."""
+
+def read_csv_with_fallback(
+    file_path: Path,
+    backend: str = DEFAULT_BACKEND,
+    columns: Optional[Sequence[str]] = DEFAULT_COLUMNS,
+    countries: Optional[Sequence[str]] = None,
+) -> tuple[pd.DataFrame, int]:
+    """Lê CSV com encoding detectado por amostra (UTF-8 ou latin1).
+
+    Só as colunas `columns` do schema são lidas, já nos dtypes declarados;
+    `columns=None` lê todas. Com `countries`, só os focos desses países.
+    Retorna o DataFrame e as linhas lidas do arquivo (antes do filtro).
+    """
+    with stage("leitura.arquivo", detail=file_path.name) as current:
+        df, encoding, n_read = read_csv(file_path, backend=backend, columns=columns, countries=countries)
+        current.rows_out = df
+    label = "UTF-8" if encoding == "utf-8" else "latin1"
+    print(f"  ✓ {file_path.name} ({label}, {backend})")
+    return df, n_read
+
+
+def list_raw_files() -> list[Path]:
+    """Lista os CSVs de RAW_DIR em ordem."""
     csv_files = sorted(RAW_DIR.glob("*.csv"))
     if not csv_files:
         raise FileNotFoundError(
             f"Nenhum CSV encontrado em {RAW_DIR}. "
-            "Coloque os arquivos focos_ams_ref_YYYY.csv e reexecute."
+            "Baixe os arquivos focos_ams_ref_YYYY.csv (python -m src.download) e reexecute."
         )
+    return csv_files
+
+
+@instrumented("leitura")
+def load_and_concatenate(
+    backend: str = DEFAULT_BACKEND,
+    columns: Optional[Sequence[str]] = DEFAULT_COLUMNS,
+    countries: Optional[Sequence[str]] = None,
+) -> pd.DataFrame:
+    """Carrega todos os CSVs de RAW_DIR e concatena."""
+    csv_files = list_raw_files()
     
     print(f"Carregando {len(csv_files)} arquivo(s):")
     frames = []
+    rows_in = 0
     for path in csv_files:
-        df = read_csv_with_fallback(path)
+        df, n_read = read_csv_with_fallback(path, backend, columns, countries)
         df["_source_file"] = path.name
         frames.append(df)
+        rows_in += n_read
     
-    raw = pd.concat(frames, ignore_index=True)
-    print(f"Total de linhas: {len(raw):,}")
+    with stage("leitura.concatenacao"):
+        raw = pd.concat(frames, ignore_index=True)
+    print(f"Total de linhas: {rows_in:,}")
     return raw
 
 
@@ -81,76 +168,746 @@ def find_column(df: pd.DataFrame, candidates: list[str]) -> Optional[str]:
     return None
 
 
-def clean_and_standardize(df: pd.DataFrame) -> pd.DataFrame:
+def normalize_categorical(values: pd.Series) -> pd.Series:
+    """Aplica strip + title aos valores distintos e devolve `category`.
+
+    A normalização roda sobre os valores únicos (algumas dezenas de UFs,
+    ~6 mil municípios) em vez de uma vez por linha; os códigos mapeiam o
+    resultado de volta. Nulos viram "Nan", como no `astype(str)` anterior,
+    e variantes que convergem (ex.: "ACRE" e "Acre") viram uma só categoria.
+    """
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    normalized = pd.Index(uniques, dtype=object).fillna("nan").astype(str).str.strip().str.title()
+    merged_codes, categories = pd.factorize(normalized, sort=True)
+    return pd.Series(
+        pd.Categorical.from_codes(merged_codes[codes], categories=categories),
+        index=values.index,
+        name=values.name,
+    )
+
+
+def combine_categoricals(left: pd.Series, right: pd.Series, sep: str = "_") -> pd.Series:
+    """Concatena duas colunas `category` ("bioma_UF") a partir dos códigos.
+
+    Só as combinações presentes são convertidas em texto; as linhas recebem
+    apenas o código da combinação.
+    """
+    n_right = len(right.cat.categories)
+    pair = left.cat.codes.to_numpy(np.int64) * n_right + right.cat.codes.to_numpy(np.int64)
+    codes, uniques = pd.factorize(pair, sort=True)
+    labels = (
+        left.cat.categories.to_numpy(object)[uniques // n_right]
+        + sep
+        + right.cat.categories.to_numpy(object)[uniques % n_right]
+    )
+    return pd.Series(
+        pd.Categorical.from_codes(codes, categories=pd.Index(labels, dtype=object)),
+        index=left.index,
+    )
+
+
+def concat_cleaned(frames: list[pd.DataFrame]) -> pd.DataFrame:
+    """Concatena DataFrames já limpos mantendo as colunas `category`.
+
+    Cada arquivo limpo tem as próprias categorias, e o `pd.concat` cairia
+    para texto. As categorias passam à união ordenada antes do concat (as
+    mesmas da limpeza em memória, que também ordena), e `bioma_uf` é
+    recombinado para ter a mesma ordem de categorias do modo em memória.
+    """
+    if not frames:
+        return pd.DataFrame()
+    for col in frames[0].columns:
+        if not all(isinstance(frame[col].dtype, pd.CategoricalDtype) for frame in frames):
+            continue
+        categories = union_categoricals([frame[col] for frame in frames], sort_categories=True).categories
+        for frame in frames:
+            frame[col] = frame[col].cat.set_categories(categories)
+    clean = pd.concat(frames, ignore_index=True)
+    if "bioma_uf" in clean.columns:
+        clean["bioma_uf"] = combine_categoricals(clean["bioma"], clean["estado"])
+    return clean
+
+
+def arrow_schema(df: pd.DataFrame) -> pa.Schema:
+    """Schema Arrow do DataFrame com índices de dicionário fixos em int32.
+
+    O pandas escolhe int8/int16 para os códigos conforme o número de
+    categorias de cada bloco; fixar int32 mantém o schema estável entre
+    blocos e arquivos.
+    """
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    for i, field in enumerate(schema):
+        if pa.types.is_dictionary(field.type):
+            schema = schema.set(i, field.with_type(pa.dictionary(pa.int32(), field.type.value_type)))
+    return schema
+
+
+def output_schema(df: pd.DataFrame) -> pa.Schema:
+    """Schema de gravação que não depende do conteúdo de um bloco ou arquivo.
+
+    As colunas do layout INPE recebem o tipo declarado em `src.schema` e
+    as demais colunas lidas ficam como texto, mesmo quando vêm todas
+    vazias (o pandas as inferiria como `double`). Os campos derivados da
+    limpeza já têm tipo fixo.
+    """
+    schema = arrow_schema(df)
+    for i, field in enumerate(schema):
+        spec = SCHEMA_BY_NAME.get(field.name)
+        if spec is not None:
+            schema = schema.set(i, field.with_type(spec.arrow_type))
+        elif pa.types.is_null(field.type):
+            schema = schema.set(i, field.with_type(EXTRA_ARROW_TYPE))
+    return schema
+
+
+def day_ordinal(day: pd.Series) -> pd.Series:
+    """Dias desde 1970-01-01 como int32 (chave inteira compacta por dia)."""
+    ordinal = day.to_numpy().astype("datetime64[D]").astype(np.int64).astype(np.int32)
+    return pd.Series(ordinal, index=day.index)
+
+
+@instrumented("limpeza")
+def clean_and_standardize(df: pd.DataFrame, verbose: bool = True) -> pd.DataFrame:
     """Limpa e padroniza campos principais."""
     # Identificar colunas
-    date_col = find_column(df, ["data_pas", "data", "dt", "datetime"])
-    lat_col = find_column(df, ["lat", "latitude"])
-    lon_col = find_column(df, ["lon", "longitude"])
-    estado_col = find_column(df, ["estado", "uf"])
-    municipio_col = find_column(df, ["municipio", "município", "munic"])
-    bioma_col = find_column(df, ["bioma"])
+    date_col = find_column(df, aliases("data_pas"))
+    lat_col = find_column(df, aliases("lat"))
+    lon_col = find_column(df, aliases("lon"))
+    estado_col = find_column(df, aliases("estado"))
+    municipio_col = find_column(df, aliases("municipio"))
+    bioma_col = find_column(df, aliases("bioma"))
     
     if not date_col:
         raise ValueError("Coluna de data não encontrada (ex.: data_pas)")
     
     # Converter data
-    df["date"] = pd.to_datetime(df[date_col], errors="coerce")
-    invalid_dates = df["date"].isna().sum()
-    if invalid_dates > 0:
-        print(f"  ⚠ {invalid_dates:,} datas inválidas removidas")
-        df = df[df["date"].notna()].copy()
+    with stage("limpeza.datas", df) as current:
+        df["date"] = pd.to_datetime(df[date_col], errors="coerce")
+        invalid_dates = df["date"].isna().sum()
+        if invalid_dates > 0:
+            if verbose:
+                print(f"  ⚠ {invalid_dates:,} datas inválidas removidas")
+            df = df[df["date"].notna()].copy()
+        current.rows_out = df
     
     # Validar coordenadas (se existirem)
     if lat_col and lon_col:
-        df["lat"] = pd.to_numeric(df[lat_col], errors="coerce")
-        df["lon"] = pd.to_numeric(df[lon_col], errors="coerce")
+        with stage("limpeza.coordenadas", df) as current:
+            df["lat"] = pd.to_numeric(df[lat_col], errors="coerce")
+            df["lon"] = pd.to_numeric(df[lon_col], errors="coerce")
         
-        invalid_coords = (
-            (df["lat"] < LAT_MIN) | (df["lat"] > LAT_MAX) |
-            (df["lon"] < LON_MIN) | (df["lon"] > LON_MAX)
-        )
-        n_invalid = invalid_coords.sum()
-        if n_invalid > 0:
-            print(f"  ⚠ {n_invalid:,} coordenadas fora do território BR removidas")
-            df = df[~invalid_coords].copy()
-    
-    # Padronizar campos de texto
-    for col in [estado_col, municipio_col, bioma_col]:
-        if col and col in df.columns:
-            df[col] = df[col].astype(str).str.strip().str.title()
+            # Limites no mesmo dtype das colunas (float32 do schema): 5.3 em float32
+            # é maior que 5.3 em float64 e descartaria pontos exatamente na borda
+            lat_type, lon_type = df["lat"].dtype.type, df["lon"].dtype.type
+            invalid_coords = (
+                (df["lat"] < lat_type(LAT_MIN)) | (df["lat"] > lat_type(LAT_MAX)) |
+                (df["lon"] < lon_type(LON_MIN)) | (df["lon"] > lon_type(LON_MAX))
+            )
+            n_invalid = invalid_coords.sum()
+            if n_invalid > 0:
+                if verbose:
+                    print(f"  ⚠ {n_invalid:,} coordenadas fora do território BR removidas")
+                df = df[~invalid_coords].copy()
+            current.rows_out = df
     
-    # Campos derivados
-    df["year"] = df["date"].dt.year
-    df["month"] = df["date"].dt.month
-    df["week_iso"] = df["date"].dt.isocalendar().week
-    df["day"] = df["date"].dt.date
+    # Padronizar campos de texto (uma vez por valor distinto, saída category)
+    with stage("limpeza.texto", df):
+        for col in [estado_col, municipio_col, bioma_col]:
+            if col and col in df.columns:
+                df[col] = normalize_categorical(df[col])
     
-    # Chave composta (opcional)
-    if bioma_col and estado_col:
-        df["bioma_uf"] = df[bioma_col] + "_" + df[estado_col]
+    # Campos derivados (tipos nativos; nada de objetos `date` por linha)
+    with stage("limpeza.derivados", df):
+        df["year"] = df["date"].dt.year.astype(np.int32)
+        df["month"] = df["date"].dt.month.astype(np.int8)
+        df["week_iso"] = df["date"].dt.isocalendar().week.astype(np.int8)
+        df["day"] = df["date"].dt.floor("D").astype("datetime64[s]")
+        df["day_idx"] = day_ordinal(df["day"])
+        
+        # Chave composta (opcional), montada sobre os códigos das categorias
+        if bioma_col and estado_col:
+            df["bioma_uf"] = combine_categoricals(df[bioma_col], df[estado_col])
     
-    print(f"Linhas após limpeza: {len(df):,}")
+    if verbose:
+        print(f"Linhas após limpeza: {len(df):,}")
     return df
 
 
+@instrumented("enriquecimento")
+def backfill_boundaries(
+    df: pd.DataFrame,
+    lookup: Optional[BoundaryLookup],
+    verbose: bool = True,
+) -> pd.DataFrame:
+    """Preenche bioma/UF/município ausentes pela posição (sem `lookup`, nada muda)."""
+    if lookup is None or df.empty:
+        return df
+    df, filled = backfill_missing(df, lookup)
+    if any(filled.values()) and "bioma_uf" in df.columns:
+        df["bioma_uf"] = combine_categoricals(df["bioma"], df["estado"])
+    if verbose:
+        print("Preenchidos pelos limites: " + ", ".join(f"{column} {n:,}" for column, n in filled.items()))
+    return df
+
+
+@instrumented("exportacao_parquet")
 def export_parquet(df: pd.DataFrame) -> None:
     """Exporta para Parquet com compressão."""
-    output_path = PROCESSED_DIR / "focos_2019_2024.parquet"
-    df.to_parquet(output_path, engine="pyarrow", compression="snappy", index=False)
+    output_path = PROCESSED_DIR / PARQUET_NAME
+    df.to_parquet(
+        output_path, engine="pyarrow", compression="snappy", index=False,
+        row_group_size=ROW_GROUP_SIZE,
+    )
     print(f"Exportado: {output_path}")
     print(f"  Tamanho: {output_path.stat().st_size / 1024**2:.1f} MB")
 
 
-def main() -> int:
+@instrumented("cubo_diario")
+def write_daily_cube(df: pd.DataFrame) -> None:
+    """Grava o cubo diário (dia × bioma × UF × município) dos focos limpos."""
+    write_cube(build_cube(df), PROCESSED_DIR)
+
+
+@instrumented("indice_espacial")
+def write_spatial_index(points: pd.DataFrame) -> None:
+    """Grava o índice espacial em grade dos focos limpos."""
+    write_index(build_index(points, SPATIAL_GRID), PROCESSED_DIR)
+
+
+def iter_csv_chunks(
+    file_path: Path,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    max_memory_mb: Optional[float] = None,
+    columns: Optional[Sequence[str]] = DEFAULT_COLUMNS,
+    countries: Optional[Sequence[str]] = None,
+) -> Iterator[tuple[pd.DataFrame, int]]:
+    """Lê um CSV em blocos, já com colunas normalizadas e `_source_file`.
+
+    Produz cada bloco com as linhas lidas para ele. Com `countries`, o
+    bloco perde os focos de outros países logo após a leitura (ver
+    `filter_countries`), e as linhas lidas contam os descartados. Com `max_memory_mb`, o tamanho do bloco é estimado a partir de um bloco
+    de sondagem (bytes por linha × CHUNK_COPIES) e reduzido pela metade
+    sempre que o RSS ultrapassa o teto.
+    """
+    # Verificação completa: o encoding não pode mudar no meio do streaming
+    encoding = sniff_encoding(file_path, sample_bytes=None)
+    print(f"  ✓ {file_path.name} ({encoding}, streaming)")
+    kwargs = pandas_read_kwargs(file_path, encoding, country_columns(columns, countries))
+    keep_country = columns is None or COUNTRY_COLUMN in columns
+    with pd.read_csv(file_path, encoding=encoding, iterator=True, low_memory=False, **kwargs) as reader:
+        rows = min(PROBE_ROWS, chunksize) if max_memory_mb else chunksize
+        while True:
+            with stage("leitura.bloco", detail=file_path.name) as current:
+                try:
+                    chunk = reader.get_chunk(rows)
+                except StopIteration:
+                    return
+                n_read = len(chunk)
+                if countries:
+                    chunk = filter_countries(chunk, countries, keep_country)
+                current.rows_out = chunk
+            chunk["_source_file"] = file_path.name
+            if max_memory_mb:
+                bytes_per_row = chunk.memory_usage(deep=True).sum() / max(len(chunk), 1)
+                budget_rows = int(max_memory_mb * 1024**2 / (bytes_per_row * CHUNK_COPIES))
+                rows = max(1_000, min(chunksize, budget_rows))
+                rss = current_rss_mb()
+                if rss is not None and rss > max_memory_mb:
+                    rows = max(1_000, rows // 2)
+            yield normalize_columns(chunk), n_read
+
+
+def parquet_read_schema(schema: pa.Schema) -> pa.Schema:
+    """Schema como o Parquet devolve na leitura (não há timestamp em segundos: vira ms)."""
+    for i, field in enumerate(schema):
+        if pa.types.is_timestamp(field.type) and field.type.unit == "s":
+            schema = schema.set(i, field.with_type(pa.timestamp("ms", field.type.tz)))
+    return schema
+
+
+def _write_chunk(writer: pq.ParquetWriter, df: pd.DataFrame) -> pa.Table:
+    table = pa.Table.from_pandas(df, schema=writer.schema, preserve_index=False)
+    writer.write_table(table, row_group_size=ROW_GROUP_SIZE)
+    return table
+
+
+def run_streaming(
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    max_memory_mb: Optional[float] = None,
+    columns: Optional[Sequence[str]] = DEFAULT_COLUMNS,
+    profile: bool = False,
+    lookup: Optional[BoundaryLookup] = None,
+    countries: Optional[Sequence[str]] = None,
+) -> dict:
+    """Ingestão em blocos com gravação incremental do Parquet consolidado.
+
+    O resultado é idêntico, linha a linha, ao do modo em memória: cada bloco
+    passa por `clean_and_standardize()` na ordem dos arquivos e das linhas.
+    O arquivo é gravado em um temporário e renomeado ao final. Com
+    `profile=True`, o perfil das colunas (`resumo_colunas.csv`) é acumulado
+    bloco a bloco, sem reler o Parquet.
+    """
+    csv_files = list_raw_files()
+
+    output_path = PROCESSED_DIR / PARQUET_NAME
+    tmp_path = output_path.with_suffix(".parquet.tmp")
+    writer: Optional[pq.ParquetWriter] = None
+    profiler: Optional[ColumnProfiler] = None
+    rows_in = rows_out = n_chunks = 0
+    cubes = []
+
+    print(f"Carregando {len(csv_files)} arquivo(s) em blocos:")
+    try:
+        for path in csv_files:
+            for chunk, n_read in iter_csv_chunks(path, chunksize, max_memory_mb, columns, countries):
+                rows_in += n_read
+                with stage("bloco", chunk, detail=path.name) as current:
+                    clean = clean_and_standardize(chunk, verbose=False)
+                    clean = backfill_boundaries(clean, lookup, verbose=False)
+                    del chunk
+                    current.rows_out = clean
+                    if clean.empty:
+                        continue
+                    if writer is None:
+                        schema = output_schema(clean)
+                        writer = pq.ParquetWriter(tmp_path, schema, compression="snappy")
+                        if profile:
+                            profiler = ColumnProfiler(parquet_read_schema(schema))
+                    with stage("bloco.gravacao", clean):
+                        table = _write_chunk(writer, clean)
+                    if profiler is not None:
+                        with stage("bloco.perfil", table):
+                            profiler.update(table)
+                    del table
+                    with stage("bloco.cubo", clean):
+                        cubes.append(build_cube(clean))
+                rows_out += len(clean)
+                n_chunks += 1
+    finally:
+        if writer is not None:
+            writer.close()
+
+    if writer is None:
+        raise ValueError("Nenhuma linha válida após a limpeza.")
+    os.replace(tmp_path, output_path)
+    with stage("cubo_diario"):
+        write_cube(combine_cubes(cubes), PROCESSED_DIR)
+    write_spatial_index(read_processed(PROCESSED_DIR, columns=INDEX_COLUMNS))
+    if profiler is not None:
+        print(f"Perfil das colunas: {write_summary(profiler, PROCESSED_DIR).name}")
+
+    stats = {
+        "linhas_lidas": rows_in,
+        "linhas_limpas": rows_out,
+        "blocos": n_chunks,
+        "pico_rss_mb": peak_rss_mb(),
+    }
+    print(f"Total de linhas: {rows_in:,}")
+    print(f"Linhas após limpeza: {rows_out:,} ({n_chunks} blocos)")
+    print(f"Exportado: {output_path}")
+    print(f"  Tamanho: {output_path.stat().st_size / 1024**2:.1f} MB")
+    if stats["pico_rss_mb"] is not None:
+        print(f"  Pico de memória (RSS): {stats['pico_rss_mb']:.0f} MB")
+    return stats
+
+
+def process_file(
+    file_path: Path,
+    backend: str = DEFAULT_BACKEND,
+    columns: Optional[Sequence[str]] = DEFAULT_COLUMNS,
+    countries: Optional[Sequence[str]] = None,
+) -> tuple[pd.DataFrame, int, int]:
+    """Lê, normaliza e limpa um único CSV (executado em processo separado).
+
+    O encoding é detectado antes da leitura, então cada arquivo é
+    interpretado uma única vez. Retorna o DataFrame limpo, o total lido e
+    o total que passou pelo filtro de `countries`. Nos processos do pool
+    não há relatório ativo (`detach_report`), então o pai registra a etapa
+    do filtro com esses totais (`record_country_filter`).
+    """
+    df, _, n_read = read_csv(file_path, backend=backend, columns=columns, countries=countries)
+    n_kept = len(df)
+    df["_source_file"] = file_path.name
+    df = normalize_columns(df)
+    return clean_and_standardize(df, verbose=False), n_read, n_kept
+
+
+def record_country_filter(path: Path, n_read: int, n_kept: int, countries: Optional[Sequence[str]]) -> None:
+    """Registra no relatório ativo o filtro de países feito por `process_file` em um pool."""
+    if countries:
+        with stage("leitura.filtro_pais", n_read, detail=path.name) as current:
+            current.rows_out = n_kept
+
+
+def run_parallel(
+    workers: int,
+    backend: str = DEFAULT_BACKEND,
+    columns: Optional[Sequence[str]] = DEFAULT_COLUMNS,
+    countries: Optional[Sequence[str]] = None,
+) -> pd.DataFrame:
+    """Processa os CSVs anuais em paralelo e concatena na ordem dos arquivos."""
+    csv_files = list_raw_files()
+    workers = max(1, min(workers, len(csv_files)))
+    print(f"Carregando {len(csv_files)} arquivo(s) com {workers} processo(s):")
+
+    frames = []
+    rows_in = 0
+    # Os processos filhos não são instrumentados: a etapa mede a espera pelo pool
+    with stage("leitura_limpeza_paralela") as current:
+        with ProcessPoolExecutor(max_workers=workers, initializer=detach_report) as executor:
+            # map() devolve os resultados na ordem de entrada (determinístico)
+            read = partial(process_file, backend=backend, columns=columns, countries=countries)
+            for path, (df, n_read, n_kept) in zip(csv_files, executor.map(read, csv_files)):
+                record_country_filter(path, n_read, n_kept, countries)
+                print(f"  ✓ {path.name} ({n_read:,} → {len(df):,} linhas)")
+                frames.append(df)
+                rows_in += n_read
+
+        clean = concat_cleaned(frames)
+        current.rows_in = rows_in
+        current.rows_out = clean
+    print(f"Total de linhas: {rows_in:,}")
+    print(f"Linhas após limpeza: {len(clean):,}")
+    return clean
+
+
+def file_sha256(file_path: Path, block_size: int = 1 << 20) -> str:
+    """Hash SHA-256 do conteúdo do arquivo, lido em blocos."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as fh:
+        while block := fh.read(block_size):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_manifest() -> dict:
+    """Carrega o manifesto do dataset incremental (vazio se inexistente)."""
+    manifest_path = PROCESSED_DIR / MANIFEST_NAME
+    if not manifest_path.exists():
+        return {"arquivos": {}}
+    with open(manifest_path, encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def save_manifest(manifest: dict) -> None:
+    """Grava o manifesto de forma atômica (temporário + rename)."""
+    manifest_path = PROCESSED_DIR / MANIFEST_NAME
+    tmp_path = manifest_path.with_suffix(".json.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, manifest_path)
+
+
+def source_changed(file_path: Path, entry: Optional[dict]) -> bool:
+    """Indica se o CSV mudou desde a última ingestão.
+
+    Tamanho e mtime iguais bastam para considerar o arquivo inalterado; o
+    hash só é calculado quando eles diferem (ex.: arquivo copiado de novo).
+    """
+    if entry is None:
+        return True
+    stat = file_path.stat()
+    if stat.st_size == entry["size"] and stat.st_mtime_ns == entry["mtime_ns"]:
+        return False
+    if stat.st_size == entry["size"] and file_sha256(file_path) == entry["sha256"]:
+        entry["mtime_ns"] = stat.st_mtime_ns
+        return False
+    return True
+
+
+def write_partitions(df: pd.DataFrame, file_path: Path) -> list[str]:
+    """Grava as linhas de um CSV em `year=YYYY/<arquivo>.parquet`.
+
+    Cada partição é escrita em um temporário e renomeada, então leitores
+    nunca veem um arquivo pela metade. Todas usam `output_schema()`: o
+    dataset toma o schema do primeiro fragmento, e uma coluna inferida de
+    outro tipo em outro ano quebraria a leitura. Retorna os caminhos
+    relativos.
+    """
+    dataset_dir = PROCESSED_DIR / DATASET_NAME
+    schema = output_schema(df)
+    outputs = []
+    for year, part in df.groupby("year", sort=True):
+        part_dir = dataset_dir / f"year={int(year)}"
+        part_dir.mkdir(parents=True, exist_ok=True)
+        part_path = part_dir / f"{file_path.stem}.parquet"
+        tmp_path = part_dir / f".{file_path.stem}.parquet.tmp"
+        table = pa.Table.from_pandas(part, schema=schema, preserve_index=False)
+        pq.write_table(table, tmp_path, compression="snappy", row_group_size=ROW_GROUP_SIZE)
+        os.replace(tmp_path, part_path)
+        outputs.append(part_path.relative_to(dataset_dir).as_posix())
+    return outputs
+
+
+def remove_outputs(outputs: list[str]) -> None:
+    dataset_dir = PROCESSED_DIR / DATASET_NAME
+    for rel in outputs:
+        (dataset_dir / rel).unlink(missing_ok=True)
+
+
+def country_filter(countries: Optional[Sequence[str]]) -> Optional[list[str]]:
+    """Filtro de países como gravado no manifesto (nomes comparáveis, ordenados)."""
+    return sorted({country_key(country) for country in countries}) if countries else None
+
+
+def boundary_fingerprint(lookup: Optional[BoundaryLookup]) -> Optional[str]:
+    """Limites usados no preenchimento, como gravados no manifesto.
+
+    Hash da impressão digital da `BoundaryLookup` (arquivos GeoJSON com
+    tamanho e mtime, propriedades lidas); None sem `--limites`.
+    """
+    if lookup is None:
+        return None
+    return hashlib.sha256(lookup.fingerprint.encode()).hexdigest()
+
+
+def layout_changed(
+    manifest: dict,
+    projection: Optional[list[str]],
+    countries: Optional[list[str]] = None,
+    boundaries: Optional[str] = None,
+) -> bool:
+    """Projeção, filtro de países, limites ou layout diferentes dos usados no dataset: tudo precisa ser refeito.
+
+    Um manifesto sem `colunas` (anterior à projeção) não diz o que foi lido
+    e também conta como mudança.
+    """
+    return bool(manifest["arquivos"]) and (
+        "colunas" not in manifest
+        or manifest["colunas"] != projection
+        or manifest.get("paises") != countries
+        or manifest.get("limites") != boundaries
+        or manifest.get("versao", 1) != OUTPUT_VERSION
+    )
+
+
+def record_partitions(entries: dict, path: Path, df: pd.DataFrame, n_read: int) -> list[str]:
+    """Grava as partições de um CSV já limpo e atualiza sua entrada no manifesto."""
+    with stage("particoes", df, detail=path.name):
+        outputs = write_partitions(df, path)
+    old = entries.get(path.name)
+    if old is not None:
+        remove_outputs([rel for rel in old["outputs"] if rel not in outputs])
+    stat = path.stat()
+    schema = output_schema(df)
+    entries[path.name] = {
+        "path": str(path),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": file_sha256(path),
+        "rows_read": n_read,
+        "rows": len(df),
+        "schema": [[field.name, str(field.type)] for field in schema],
+        "outputs": outputs,
+    }
+    return outputs
+
+
+def ingest_file(
+    path: Path,
+    backend: str = DEFAULT_BACKEND,
+    columns: Optional[Sequence[str]] = DEFAULT_COLUMNS,
+    lookup: Optional[BoundaryLookup] = None,
+    countries: Optional[Sequence[str]] = None,
+) -> bool:
+    """Ingere um único CSV no dataset incremental assim que ele fica disponível.
+
+    Usado pelo download (`python -m src.download --ingerir`) para ler e
+    limpar cada arquivo enquanto os demais ainda estão chegando. Cubo e
+    índice não são refeitos aqui: `run_incremental()` ao final os atualiza.
+    Retorna False, sem ingerir, se o arquivo não mudou ou se o dataset
+    precisa ser refeito por inteiro (colunas, países, limites ou layout
+    mudaram).
+    """
+    manifest = load_manifest()
+    entries: dict = manifest["arquivos"]
+    projection = None if columns is None else list(columns)
+    paises = country_filter(countries)
+    limites = boundary_fingerprint(lookup)
+    if layout_changed(manifest, projection, paises, limites) or not source_changed(path, entries.get(path.name)):
+        return False
+    manifest["colunas"] = projection
+    manifest["paises"] = paises
+    manifest["limites"] = limites
+    manifest["versao"] = OUTPUT_VERSION
+    # No próprio processo: o filtro de países já entra no relatório ativo
+    df, n_read, _ = process_file(path, backend, columns, countries)
+    df = backfill_boundaries(df, lookup, verbose=False)
+    outputs = record_partitions(entries, path, df, n_read)
+    save_manifest(manifest)
+    print(f"  ✓ {path.name} ingerido ({n_read:,} → {len(df):,} linhas, {len(outputs)} partição(ões))")
+    return True
+
+
+def run_incremental(
+    workers: int = 1,
+    backend: str = DEFAULT_BACKEND,
+    columns: Optional[Sequence[str]] = DEFAULT_COLUMNS,
+    lookup: Optional[BoundaryLookup] = None,
+    countries: Optional[Sequence[str]] = None,
+) -> dict:
+    """Reingere apenas os CSVs novos ou alterados no dataset particionado."""
+    csv_files = list_raw_files()
+    manifest = load_manifest()
+    entries: dict = manifest["arquivos"]
+    projection = None if columns is None else list(columns)
+    paises = country_filter(countries)
+    limites = boundary_fingerprint(lookup)
+    force = layout_changed(manifest, projection, paises, limites)
+    if force:
+        print("  ⚠ Colunas, países, limites ou layout de saída mudaram, reprocessando todos os arquivos")
+    manifest["colunas"] = projection
+    manifest["paises"] = paises
+    manifest["limites"] = limites
+    manifest["versao"] = OUTPUT_VERSION
+    snapshot = json.dumps(manifest, sort_keys=True)
+
+    removed = sorted(set(entries) - {path.name for path in csv_files})
+    for name in removed:
+        remove_outputs(entries.pop(name)["outputs"])
+        print(f"  ✗ {name} removido da origem")
+
+    pending = [
+        path for path in csv_files if force or source_changed(path, entries.get(path.name))
+    ]
+    print(f"{len(csv_files)} arquivo(s) na origem, {len(pending)} novo(s)/alterado(s)")
+
+    if pending:
+        workers = max(1, min(workers, len(pending)))
+        with ProcessPoolExecutor(max_workers=workers, initializer=detach_report) as executor:
+            read = partial(process_file, backend=backend, columns=columns, countries=countries)
+            for path, (df, n_read, n_kept) in zip(pending, executor.map(read, pending)):
+                record_country_filter(path, n_read, n_kept, countries)
+                df = backfill_boundaries(df, lookup, verbose=False)
+                outputs = record_partitions(entries, path, df, n_read)
+                # Manifesto salvo a cada arquivo: uma falha no meio não perde o progresso
+                save_manifest(manifest)
+                print(f"  ✓ {path.name} ({n_read:,} → {len(df):,} linhas, {len(outputs)} partição(ões))")
+
+    # Também persiste mtimes atualizados de arquivos com o mesmo hash
+    manifest_changed = json.dumps(manifest, sort_keys=True) != snapshot
+    if manifest_changed or not (PROCESSED_DIR / MANIFEST_NAME).exists():
+        save_manifest(manifest)
+
+    cube_path = PROCESSED_DIR / CUBE_NAME
+    index_path = PROCESSED_DIR / INDEX_NAME
+    if pending or removed or not cube_path.exists() or not index_path.exists():
+        write_daily_cube(read_processed(PROCESSED_DIR, columns=CUBE_DIMENSIONS))
+        write_spatial_index(read_processed(PROCESSED_DIR, columns=INDEX_COLUMNS))
+    elif manifest_changed:
+        # Só mtimes mudaram: cubo e índice continuam válidos, mas não podem parecer mais velhos
+        os.utime(cube_path)
+        os.utime(index_path)
+    total = sum(entry["rows"] for entry in entries.values())
+    print(f"Dataset: {PROCESSED_DIR / DATASET_NAME} ({total:,} linhas)")
+    return {"reprocessados": [path.name for path in pending], "removidos": removed, "linhas": total}
+
+
+def print_country_filter(report: RunReport) -> None:
+    """Linhas descartadas pelo filtro de países, somadas em todos os arquivos."""
+    for entry in report.summary():
+        if entry["etapa"] == "leitura.filtro_pais":
+            rows_in, rows_out = entry["linhas_entrada"], entry["linhas_saida"]
+            print(f"Filtro de países: {rows_in - rows_out:,} de {rows_in:,} linhas descartadas na leitura")
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Pipeline de ingestão de focos de queimadas")
+    parser.add_argument(
+        "--streaming", action="store_true",
+        help="Lê os CSVs em blocos e grava o Parquet incrementalmente",
+    )
+    parser.add_argument(
+        "--chunksize", type=int, default=DEFAULT_CHUNKSIZE,
+        help=f"Linhas por bloco no modo streaming (padrão: {DEFAULT_CHUNKSIZE:,})",
+    )
+    parser.add_argument(
+        "--memoria-max-mb", type=float, default=None,
+        help="Teto de memória para dimensionar os blocos no modo streaming",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1,
+        help="Processos para ler e limpar os arquivos anuais em paralelo",
+    )
+    parser.add_argument(
+        "--leitor", choices=sorted(BACKENDS), default=DEFAULT_BACKEND,
+        help="Backend de leitura dos CSVs (pandas ou pyarrow multithread; --streaming lê sempre com o pandas)",
+    )
+    parser.add_argument(
+        "--todas-colunas", action="store_true",
+        help="Lê todas as colunas do CSV (padrão: só as usadas na análise)",
+    )
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="Reprocessa só CSVs novos/alterados no dataset particionado por ano",
+    )
+    parser.add_argument(
+        "--perfil", action="store_true",
+        help="Gera resumo_colunas.csv (no modo streaming, durante a leitura dos blocos)",
+    )
+    parser.add_argument(
+        "--limites", type=Path, nargs="?", const=BOUNDARIES_DIR, default=None,
+        help=f"Preenche bioma/UF/município ausentes com os GeoJSON deste diretório (padrão: {BOUNDARIES_DIR})",
+    )
+    parser.add_argument(
+        "--pais", nargs="*", default=None, metavar="NOME",
+        help=f"Mantém só os focos destes países, filtrados na leitura (sem nomes: {DEFAULT_COUNTRY})",
+    )
+    add_report_arguments(parser, "pipeline_ingestao")
+    args = parser.parse_args(argv)
+    if args.pais == []:
+        args.pais = [DEFAULT_COUNTRY]
+    if args.streaming and args.incremental:
+        parser.error("--streaming e --incremental não podem ser combinados")
+    if args.streaming and args.workers > 1:
+        parser.error("--streaming e --workers > 1 não podem ser combinados")
+    if args.streaming and args.leitor != "pandas":
+        parser.error(f"--streaming lê os blocos com o pandas; não combine com --leitor {args.leitor}")
+    return args
+
+
+def main(argv: Optional[list[str]] = None) -> int:
     """Execução principal."""
+    args = parse_args(argv)
     print("=== Pipeline de Ingestão - Focos de Queimadas ===\n")
     
+    columns = None if args.todas_colunas else DEFAULT_COLUMNS
+    report = RunReport("pipeline_ingestao", cprofile_stages=args.cprofile)
     try:
-        raw = load_and_concatenate()
-        raw = normalize_columns(raw)
-        clean = clean_and_standardize(raw)
-        export_parquet(clean)
+        with report:
+            lookup = None
+            if args.limites is not None:
+                with stage("limites"):
+                    lookup = BoundaryLookup.from_dir(args.limites, workers=args.workers)
+                print(f"Limites: {', '.join(lookup.columns)} ({args.limites})")
+            if args.pais:
+                print(f"Países: {', '.join(args.pais)} (demais descartados na leitura)")
+            if args.streaming:
+                run_streaming(args.chunksize, args.memoria_max_mb, columns, args.perfil, lookup, args.pais)
+            elif args.incremental:
+                run_incremental(args.workers, args.leitor, columns, lookup, args.pais)
+            elif args.workers > 1:
+                clean = run_parallel(args.workers, args.leitor, columns, args.pais)
+                clean = backfill_boundaries(clean, lookup)
+                export_parquet(clean)
+                write_daily_cube(clean)
+                write_spatial_index(clean)
+            else:
+                raw = load_and_concatenate(args.leitor, columns, args.pais)
+                raw = normalize_columns(raw)
+                clean = clean_and_standardize(raw)
+                clean = backfill_boundaries(clean, lookup)
+                export_parquet(clean)
+                write_daily_cube(clean)
+                write_spatial_index(clean)
+            if lookup is not None:
+                lookup.save_cache()
+            if args.pais:
+                print_country_filter(report)
+            if args.perfil and not args.streaming:
+                with stage("perfil_colunas"):
+                    summary_path = write_summary(profile_focos(PROCESSED_DIR), PROCESSED_DIR)
+                print(f"Perfil das colunas: {summary_path.name}")
         
         print("\n✓ Pipeline concluído com sucesso!")
         return 0
@@ -158,6 +915,9 @@ def main() -> int:
     except Exception as e:
         print(f"\n✗ Erro: {e}", file=sys.stderr)
         return 1
+    
+    finally:
+        write_reports(report, args.relatorio, args.trace)
 
 
 if __name__ == "__main__":
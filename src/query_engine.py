@@ -0,0 +1,274 @@
+"""
+Motor de consultas DuckDB - Agregações fora da memória sobre o Parquet
+
+As análises (`eda_utils`, `storytelling_viz`, `municipio_ranking`) só
+precisam de contagens: todas passam por `daily_cube.count_by()` e
+`daily_cube.drop_missing()`. Este módulo oferece `FocosQuery`, uma consulta
+preguiçosa sobre a saída da ingestão que essas duas funções aceitam no
+lugar de um DataFrame:
+- `count_by(keys)` vira um `GROUP BY` no DuckDB, executado em paralelo
+  direto sobre o Parquet (ou o dataset particionado), com memória limitada
+  e derramamento em disco; só o resultado agregado chega ao pandas
+- `drop_missing(...)` acrescenta um predicado `WHERE` (nada é lido)
+- Chaves de tempo (`year`, `month`, `year_month`) são derivadas de `day`,
+  como no cubo, e o resultado tem os mesmos nomes e tipos do caminho pandas
+  (dimensões `category`, `year_month` Period mensal)
+
+O DuckDB é opcional (`pip install duckdb`); sem ele, só o motor pandas.
+`--paridade` roda as agregações das figuras nos dois motores e compara.
+
+Uso:
+    from src.query_engine import FocosQuery
+    by_day_bioma = count_by(FocosQuery(PROCESSED_DIR), ["day", "bioma"])
+
+    python -m src.query_engine --paridade
+    python -m src.query_engine --chaves year_month bioma --memoria 2GB
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Callable, Iterable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.daily_cube import COUNT_COL
+from src.focos_loader import focos_source, open_focos
+from src.utils import PROCESSED_DIR
+
+ENGINES = ("pandas", "duckdb")
+DEFAULT_ENGINE = "pandas"
+
+# Chaves de tempo derivadas de `day` (mesma regra de `daily_cube.count_by`)
+TIME_KEYS = {
+    "year": "CAST(year(day) AS INTEGER)",
+    "month": "CAST(month(day) AS INTEGER)",
+    "year_month": "date_trunc('month', day)",
+}
+# Colunas textuais devolvidas como `category`, como no cubo
+CATEGORY_KEYS = ("bioma", "estado", "municipio", "pais", "bioma_uf")
+
+
+def _connect(threads: Optional[int], memory_limit: Optional[str], temp_dir: Optional[Path]):
+    try:
+        import duckdb
+    except ImportError as e:
+        raise ImportError("O motor duckdb requer o pacote duckdb (pip install duckdb)") from e
+    con = duckdb.connect(":memory:")
+    if threads:
+        con.execute(f"SET threads = {int(threads)}")
+    if memory_limit:
+        con.execute(f"SET memory_limit = {_literal(memory_limit)}")
+    if temp_dir is not None:
+        con.execute(f"SET temp_directory = {_literal(str(temp_dir))}")
+    con.execute("SET preserve_insertion_order = false")
+    return con
+
+
+def _literal(value) -> str:
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+    return repr(value)
+
+
+def _identifier(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+@dataclass(frozen=True)
+class FocosQuery:
+    """Consulta preguiçosa sobre os focos processados, executada no DuckDB.
+
+    `threads=None` usa todos os núcleos; `memory_limit` (ex.: "2GB") limita a
+    memória do motor, que derrama em `temp_dir` o que não couber.
+    """
+
+    processed_dir: Path = PROCESSED_DIR
+    where: tuple[str, ...] = ()
+    threads: Optional[int] = None
+    memory_limit: Optional[str] = None
+    temp_dir: Optional[Path] = None
+
+    @property
+    def columns(self) -> pd.Index:
+        """Colunas disponíveis (schema do Parquet, sem ler dados)."""
+        return pd.Index(open_focos(self.processed_dir).schema.names)
+
+    def source_sql(self) -> str:
+        source = focos_source(self.processed_dir)
+        if source.is_dir():
+            # `year` já está nos arquivos; o caminho hive não é usado
+            pattern = str(source / "**" / "*.parquet")
+            return f"read_parquet({_literal(pattern)}, hive_partitioning = false)"
+        return f"read_parquet({_literal(str(source))})"
+
+    def drop_missing(self, column: str, missing: Iterable[str] = ()) -> "FocosQuery":
+        """Nova consulta sem as linhas com `column` nulo ou em `missing`."""
+        predicate = f"{_identifier(column)} IS NOT NULL"
+        missing = list(missing)
+        if missing:
+            predicate += f" AND {_identifier(column)} NOT IN ({', '.join(map(_literal, missing))})"
+        return replace(self, where=self.where + (predicate,))
+
+    def sql(self, keys: Sequence[str]) -> str:
+        """`GROUP BY` de `keys` com contagem de focos; chaves nulas ficam de fora."""
+        select, predicates = [], list(self.where)
+        for key in keys:
+            expression = TIME_KEYS.get(key, _identifier(key))
+            select.append(f"{expression} AS {_identifier(key)}")
+            predicates.append(f"{'day' if key in TIME_KEYS else _identifier(key)} IS NOT NULL")
+        where = f"WHERE {' AND '.join(predicates)}" if predicates else ""
+        group = f"GROUP BY {', '.join(map(str, range(1, len(keys) + 1)))}" if keys else ""
+        order = f"ORDER BY {', '.join(map(str, range(1, len(keys) + 1)))}" if keys else ""
+        return (
+            f"SELECT {', '.join([*select, f'count(*) AS {COUNT_COL}'])} "
+            f"FROM {self.source_sql()} {where} {group} {order}"
+        )
+
+    def count_by(self, keys: Sequence[str]) -> pd.DataFrame:
+        """Mesmo resultado de `daily_cube.count_by(dados, keys)`, calculado no DuckDB."""
+        keys = list(keys)
+        con = _connect(self.threads, self.memory_limit, self.temp_dir)
+        try:
+            result = con.execute(self.sql(keys)).to_arrow_table().to_pandas()
+        finally:
+            con.close()
+        return _as_pandas_counts(result, keys)
+
+
+def _as_pandas_counts(result: pd.DataFrame, keys: Sequence[str]) -> pd.DataFrame:
+    """Tipos do resultado iguais aos de `count_by` sobre o cubo."""
+    for key in keys:
+        if key == "year_month":
+            result[key] = pd.to_datetime(result[key]).dt.to_period("M")
+        elif key == "day":
+            result[key] = pd.to_datetime(result[key]).astype("datetime64[ms]")
+        elif key in CATEGORY_KEYS:
+            result[key] = result[key].astype("category")
+    result[COUNT_COL] = result[COUNT_COL].astype(np.int64)
+    return result.reset_index(drop=True)
+
+
+def open_counts(
+    engine: str,
+    load_counts: Callable[[], pd.DataFrame],
+    processed_dir: Path = PROCESSED_DIR,
+    **options,
+):
+    """Fonte das contagens: o cubo/dados em pandas (`load_counts()`) ou uma `FocosQuery`."""
+    if engine == "pandas":
+        return load_counts()
+    if engine == "duckdb":
+        return FocosQuery(processed_dir, **options)
+    raise ValueError(f"Motor desconhecido: {engine!r} (opções: {', '.join(ENGINES)})")
+
+
+# Paridade -----------------------------------------------------------------
+
+def _comparable(frame: pd.DataFrame) -> pd.DataFrame:
+    """Normaliza tipos para comparar os dois motores (categorias e larguras)."""
+    frame = frame.reset_index(drop=isinstance(frame.index, pd.RangeIndex))
+    out = {}
+    for col in frame.columns:
+        values = frame[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            values = values.astype(object).astype(str)
+        elif pd.api.types.is_integer_dtype(values) or pd.api.types.is_bool_dtype(values):
+            values = values.astype(np.int64)
+        elif pd.api.types.is_float_dtype(values):
+            values = values.astype(np.float64)
+        elif pd.api.types.is_datetime64_dtype(values):
+            values = values.astype("datetime64[ns]")
+        out[str(col)] = values.to_numpy()
+    return pd.DataFrame(out)
+
+
+def parity_checks() -> dict[str, Callable]:
+    """Agregações das análises, cada uma recebendo a fonte das contagens."""
+    from src import eda_utils, municipio_ranking, storytelling_viz
+    from src.daily_cube import count_by
+
+    return {
+        "contagem diária": lambda data: count_by(data, ["day"]),
+        "mês × bioma": lambda data: count_by(data, ["year_month", "bioma"]),
+        "mês × UF": lambda data: count_by(data, ["year_month", "estado"]),
+        "dia × bioma (EDA)": lambda data: eda_utils.daily_by_bioma(data, "bioma"),
+        "top 10 UFs": lambda data: eda_utils.top_ufs(data, "estado"),
+        "linha do tempo": lambda data: storytelling_viz.timeline_scores(data),
+        "envelope mês × bioma": lambda data: storytelling_viz.monthly_by_bioma(storytelling_viz.valid_biomas(data)),
+        "heatmap mês × ano": lambda data: storytelling_viz.heatmap_by_month_year(storytelling_viz.valid_biomas(data)),
+        "anomalias por bioma": lambda data: storytelling_viz.bioma_scores(storytelling_viz.valid_biomas(data)),
+        "ranking de municípios": municipio_ranking.rank_municipios,
+    }
+
+
+def check_parity(pandas_data: pd.DataFrame, query: FocosQuery) -> list[str]:
+    """Roda cada agregação nos dois motores; retorna as que divergiram."""
+    failures = []
+    for name, aggregate in parity_checks().items():
+        start = time.perf_counter()
+        expected = aggregate(pandas_data)
+        pandas_s = time.perf_counter() - start
+        start = time.perf_counter()
+        actual = aggregate(query)
+        duckdb_s = time.perf_counter() - start
+        try:
+            pd.testing.assert_frame_equal(_comparable(actual), _comparable(expected), check_exact=False)
+            status = "✓"
+        except AssertionError as e:
+            status = "✗"
+            failures.append(name)
+            print(f"    {str(e).splitlines()[0]}")
+        print(f"  {status} {name:<24} pandas {pandas_s:6.2f}s   duckdb {duckdb_s:6.2f}s   ({len(expected):,} linhas)")
+    return failures
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Agregações dos focos no DuckDB, direto sobre o Parquet")
+    parser.add_argument("--chaves", nargs="+", default=["day"], help="Chaves da contagem (padrão: day)")
+    parser.add_argument("--threads", type=int, default=None, help="Threads do DuckDB (padrão: todos os núcleos)")
+    parser.add_argument("--memoria", default=None, help="Limite de memória do DuckDB (ex.: 2GB)")
+    parser.add_argument("--temp", type=Path, default=None, help="Pasta para derramar em disco")
+    parser.add_argument(
+        "--paridade", action="store_true",
+        help="Compara as agregações das análises entre os motores pandas e duckdb",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Execução principal."""
+    args = parse_args(argv)
+    print("=== Motor de consultas DuckDB ===\n")
+    try:
+        query = FocosQuery(PROCESSED_DIR, threads=args.threads, memory_limit=args.memoria, temp_dir=args.temp)
+        if args.paridade:
+            from src.eda_utils import load_counts
+
+            failures = check_parity(load_counts(PROCESSED_DIR), query)
+            if failures:
+                print(f"\n✗ {len(failures)} agregação(ões) divergente(s): {', '.join(failures)}", file=sys.stderr)
+                return 1
+            print("\n✓ Motores equivalentes")
+            return 0
+
+        from src.daily_cube import count_by
+
+        start = time.perf_counter()
+        counts = count_by(query, args.chaves)
+        print(counts.to_string(index=False, max_rows=30))
+        print(f"\n{len(counts):,} linhas em {time.perf_counter() - start:.2f}s")
+        return 0
+
+    except Exception as e:
+        print(f"\n✗ Erro: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
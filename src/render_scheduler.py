@@ -0,0 +1,180 @@
+"""
+Agendador de figuras - Renderização paralela com reaproveitamento
+
+Este módulo:
+- Recebe as figuras como tarefas (`FigureJob`): nome do PNG, função de
+  renderização (nível de módulo) e os agregados já calculados
+- Pula figuras cujo PNG existe e cujos agregados e código de renderização
+  não mudaram desde a última execução (hash guardado em
+  `.render_manifest.json` na pasta das figuras). O código é o arquivo
+  inteiro do módulo da função (estilos em `plt.rcParams`, funções
+  auxiliares) mais os módulos `src` que ele importa
+- Renderiza as demais em um pool de processos com o backend Agg
+
+Os scripts calculam os agregados compartilhados uma vez (`figure_jobs()`
+em `eda_utils` e `storytelling_viz`) e só então chamam `render_figures`.
+
+Uso:
+    from src.render_scheduler import FigureJob, render_figures
+    render_figures([FigureJob("top10_uf.png", render_top_uf, {"top_uf": top_uf})], FIGS_DIR)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import inspect
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.artifact_cache import module_source_hash
+from src.instrumentation import detach_report, stage
+
+MANIFEST_NAME = ".render_manifest.json"
+
+# Mudanças no agendador que afetam as figuras invalidam todas
+RENDER_VERSION = 1
+
+
+@dataclass(frozen=True)
+class FigureJob:
+    """Uma figura: `render(output_path, **data)` grava `name` na pasta de saída."""
+
+    name: str
+    render: Callable[..., None]
+    data: dict[str, Any] = field(default_factory=dict)
+
+
+def _hash_value(digest: "hashlib._Hash", value: Any) -> None:
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        digest.update(repr((type(value).__name__, value.shape)).encode())
+        frame = value.to_frame() if isinstance(value, pd.Series) else value
+        digest.update(repr([(str(col), str(dtype)) for col, dtype in frame.dtypes.items()]).encode())
+        digest.update(repr(list(map(str, frame.index.names))).encode())
+        digest.update(pd.util.hash_pandas_object(frame, index=True).to_numpy().tobytes())
+    elif isinstance(value, np.ndarray):
+        digest.update(repr((value.dtype.str, value.shape)).encode())
+        digest.update(np.ascontiguousarray(value).tobytes())
+    else:
+        digest.update(repr(value).encode())
+
+
+def data_hash(data: dict[str, Any]) -> str:
+    """Hash dos agregados de entrada de uma figura."""
+    digest = hashlib.sha256()
+    for key in sorted(data):
+        digest.update(key.encode())
+        _hash_value(digest, data[key])
+    return digest.hexdigest()
+
+
+def render_modules(render: Callable[..., None]) -> list[str]:
+    """Módulo que define `render` e os módulos `src` que ele importa."""
+    names = {render.__module__}
+    for value in vars(sys.modules[render.__module__]).values():
+        name = value.__name__ if inspect.ismodule(value) else getattr(value, "__module__", None)
+        if isinstance(name, str) and name.split(".")[0] == "src":
+            names.add(name)
+    return sorted(names)
+
+
+def code_hash(render: Callable[..., None]) -> str:
+    """Versão do código de renderização: fontes de `render_modules()` + `RENDER_VERSION`.
+
+    Só a fonte da função não basta: estilos no nível do módulo e funções
+    auxiliares também mudam a figura.
+    """
+    source = module_source_hash(render_modules(render))
+    return hashlib.sha256(f"{RENDER_VERSION}\n{render.__qualname__}\n{source}".encode()).hexdigest()
+
+
+def _load_manifest(figs_dir: Path) -> dict:
+    path = figs_dir / MANIFEST_NAME
+    if not path.exists():
+        return {}
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def _save_manifest(figs_dir: Path, manifest: dict) -> None:
+    path = figs_dir / MANIFEST_NAME
+    tmp_path = path.with_suffix(".json.tmp")
+    tmp_path.write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def _init_worker() -> None:
+    import matplotlib
+
+    detach_report()
+    matplotlib.use("Agg")
+
+
+def _render(job: FigureJob, output_path: Path) -> str:
+    import matplotlib.pyplot as plt
+
+    # Só medida quando a figura é renderizada no próprio processo (workers=1)
+    with stage("figura", detail=job.name):
+        job.render(output_path, **job.data)
+    plt.close("all")
+    return job.name
+
+
+def render_figures(
+    jobs: list[FigureJob],
+    figs_dir: Path,
+    workers: Optional[int] = None,
+    force: bool = False,
+) -> dict[str, list[str]]:
+    """Renderiza as figuras alteradas; retorna {"renderizadas": [...], "puladas": [...]}.
+
+    `workers=None` usa um processo por figura pendente (até o número de
+    CPUs); `workers=1` renderiza no próprio processo.
+    """
+    figs_dir.mkdir(parents=True, exist_ok=True)
+    manifest = _load_manifest(figs_dir)
+    pending, skipped, keys = [], [], {}
+    for job in jobs:
+        keys[job.name] = {"dados": data_hash(job.data), "codigo": code_hash(job.render)}
+        if not force and manifest.get(job.name) == keys[job.name] and (figs_dir / job.name).exists():
+            skipped.append(job.name)
+        else:
+            pending.append(job)
+
+    for name in skipped:
+        print(f"= {name} (sem mudanças)")
+
+    if workers is None:
+        workers = min(len(pending), os.cpu_count() or 1)
+    rendered = []
+    try:
+        if workers <= 1 or len(pending) <= 1:
+            for job in pending:
+                rendered.append(_render(job, figs_dir / job.name))
+                manifest[job.name] = keys[job.name]
+                print(f"✓ {job.name}")
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+                futures = [pool.submit(_render, job, figs_dir / job.name) for job in pending]
+                for future in as_completed(futures):
+                    name = future.result()
+                    rendered.append(name)
+                    manifest[name] = keys[name]
+                    print(f"✓ {name}")
+    finally:
+        # Figuras concluídas ficam registradas mesmo se outra falhar
+        if rendered:
+            _save_manifest(figs_dir, manifest)
+    return {"renderizadas": rendered, "puladas": skipped}
+
+
+__all__ = ["FigureJob", "code_hash", "data_hash", "render_figures", "render_modules"]
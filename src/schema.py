@@ -0,0 +1,108 @@
+"""
+Schema declarado do layout INPE de focos (AMS_sat_ref)
+
+Este módulo define, para cada coluna do CSV:
+- o nome canônico e os aliases aceitos (mesmos candidatos de `find_column()`)
+- o dtype compacto no pandas (float32, category, int64)
+- o tipo Arrow equivalente, usado pelo leitor pyarrow
+
+Os leitores usam o schema para projetar colunas (`usecols`) e fixar tipos
+(`dtype`) já na leitura, sem inferência nem colunas de objetos Python.
+Colunas fora do schema (só com `columns=None`) são lidas como texto: um
+bloco ou arquivo em que a coluna vem toda vazia tem o mesmo tipo dos demais.
+
+Uso:
+    from src.schema import DEFAULT_COLUMNS, resolve_columns
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+import pyarrow as pa
+
+
+@dataclass(frozen=True)
+class ColumnSpec:
+    """Coluna do layout INPE: nome canônico, aliases e tipos."""
+
+    name: str
+    aliases: tuple[str, ...]
+    dtype: str
+    arrow_type: pa.DataType
+
+
+_DICT = pa.dictionary(pa.int32(), pa.string())
+
+FOCOS_SCHEMA: tuple[ColumnSpec, ...] = (
+    ColumnSpec("id_bdq", ("id_bdq",), "int64", pa.int64()),
+    ColumnSpec("foco_id", ("foco_id",), "string", pa.string()),
+    ColumnSpec("lat", ("lat", "latitude"), "float32", pa.float32()),
+    ColumnSpec("lon", ("lon", "longitude"), "float32", pa.float32()),
+    ColumnSpec("data_pas", ("data_pas", "data", "dt", "datetime"), "string", pa.string()),
+    ColumnSpec("pais", ("pais", "país"), "category", _DICT),
+    ColumnSpec("estado", ("estado", "uf"), "category", _DICT),
+    ColumnSpec("municipio", ("municipio", "município", "munic"), "category", _DICT),
+    ColumnSpec("bioma", ("bioma",), "category", _DICT),
+)
+
+SCHEMA_BY_NAME: dict[str, ColumnSpec] = {spec.name: spec for spec in FOCOS_SCHEMA}
+
+# Tipos das colunas fora do schema (texto, sem inferência)
+EXTRA_DTYPE = "string"
+EXTRA_ARROW_TYPE = pa.string()
+
+# Colunas usadas pela análise (id_bdq é a chave dos focos)
+DEFAULT_COLUMNS: tuple[str, ...] = ("id_bdq", "data_pas", "lat", "lon", "estado", "municipio", "bioma")
+
+
+def aliases(name: str) -> list[str]:
+    """Candidatos aceitos para a coluna canônica `name`."""
+    return list(SCHEMA_BY_NAME[name].aliases)
+
+
+def normalize_name(name: str) -> str:
+    """Mesma normalização de `normalize_columns()` (minúsculas, sem espaços)."""
+    return name.strip().lower().replace(" ", "_")
+
+
+def resolve_columns(
+    header: Iterable[str],
+    columns: Optional[Iterable[str]] = DEFAULT_COLUMNS,
+) -> dict[str, Optional[ColumnSpec]]:
+    """Mapeia os nomes reais do cabeçalho para as colunas do schema.
+
+    Para cada coluna canônica pedida, vale o primeiro alias presente (na
+    ordem de prioridade de `find_column()`). Com `columns=None`, todas as
+    colunas do arquivo são mantidas; as fora do schema recebem `None`
+    (lidas como texto: `EXTRA_DTYPE`/`EXTRA_ARROW_TYPE`).
+    """
+    by_normalized = {}
+    for actual in header:
+        by_normalized.setdefault(normalize_name(actual), actual)
+
+    resolved: dict[str, Optional[ColumnSpec]] = {}
+    wanted = FOCOS_SCHEMA if columns is None else [SCHEMA_BY_NAME[name] for name in columns]
+    for spec in wanted:
+        for alias in spec.aliases:
+            if alias in by_normalized:
+                resolved[by_normalized[alias]] = spec
+                break
+    if columns is None:
+        ordered = {actual: resolved.get(actual) for actual in header}
+        return ordered
+    return {actual: resolved[actual] for actual in header if actual in resolved}
+
+
+__all__ = [
+    "ColumnSpec",
+    "FOCOS_SCHEMA",
+    "SCHEMA_BY_NAME",
+    "EXTRA_DTYPE",
+    "EXTRA_ARROW_TYPE",
+    "DEFAULT_COLUMNS",
+    "aliases",
+    "normalize_name",
+    "resolve_columns",
+]
@@ -0,0 +1,363 @@
+"""
+Índice espacial em grade - Consultas por área, raio e vizinhos
+
+Este módulo:
+- Divide o recorte do Brasil em uma grade uniforme (0,25° por padrão) e
+  ordena os focos por célula, com offsets acumulados por célula (layout
+  CSR): os focos de uma faixa de células vizinhas formam um bloco contíguo
+- Persiste o índice (`focos_grid_index.npz`) ao lado do Parquet na
+  ingestão, com as coordenadas, o `day_idx` e o `id_bdq` já na ordem das
+  células, então as consultas não releem o Parquet
+- Responde bounding box, raio (haversine) e k vizinhos mais próximos,
+  opcionalmente restritos a um intervalo de dias, olhando só as células
+  que tocam a área pedida
+
+O campo `row` das respostas é a posição do foco na saída da ingestão;
+`load_rows()` busca as demais colunas só dessas linhas.
+
+Uso:
+    python -m src.spatial_index --lat -9.97 --lon -67.81 --raio 50 --dias 7
+    python -m src.spatial_index --lat -9.97 --lon -67.81 --vizinhos 10
+
+    from src.spatial_index import load_index
+    index = load_index()
+    perto = index.radius(-9.97, -67.81, 50, days=("2024-09-01", "2024-09-07"))
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.focos_loader import MANIFEST_NAME, PARQUET_NAME, open_focos, read_processed
+from src.utils import PROCESSED_DIR
+
+INDEX_NAME = "focos_grid_index.npz"
+INDEX_COLUMNS = ("id_bdq", "lat", "lon", "day", "day_idx")
+DEFAULT_CELL_DEG = 0.25
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEG_LAT = np.pi * EARTH_RADIUS_KM / 180
+
+
+def haversine_km(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """Distância em km pela fórmula de haversine (vetorizada)."""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def _day_ordinal(value) -> int:
+    return int(np.datetime64(pd.Timestamp(value).date(), "D").astype(np.int64))
+
+
+@dataclass(frozen=True)
+class Grid:
+    """Grade uniforme em graus, ancorada no canto sudoeste."""
+
+    lat_min: float
+    lon_min: float
+    cell_deg: float
+    n_lat: int
+    n_lon: int
+
+    @classmethod
+    def covering(
+        cls,
+        lat_min: float,
+        lat_max: float,
+        lon_min: float,
+        lon_max: float,
+        cell_deg: float = DEFAULT_CELL_DEG,
+    ) -> "Grid":
+        n_lat = max(1, int(np.ceil((lat_max - lat_min) / cell_deg)))
+        n_lon = max(1, int(np.ceil((lon_max - lon_min) / cell_deg)))
+        return cls(float(lat_min), float(lon_min), float(cell_deg), n_lat, n_lon)
+
+    @property
+    def n_cells(self) -> int:
+        return self.n_lat * self.n_lon
+
+    def rows(self, lat) -> np.ndarray:
+        """Linha da grade de cada latitude (pontos fora vão para a borda)."""
+        rows = np.floor((np.asarray(lat, dtype=np.float64) - self.lat_min) / self.cell_deg)
+        return np.clip(rows, 0, self.n_lat - 1).astype(np.int32)
+
+    def cols(self, lon) -> np.ndarray:
+        cols = np.floor((np.asarray(lon, dtype=np.float64) - self.lon_min) / self.cell_deg)
+        return np.clip(cols, 0, self.n_lon - 1).astype(np.int32)
+
+    def cell_ids(self, lat, lon) -> np.ndarray:
+        """Id da célula (linha × n_lon + coluna) de cada ponto, em int32."""
+        return self.rows(lat) * np.int32(self.n_lon) + self.cols(lon)
+
+
+class GridIndex:
+    """Focos ordenados por célula da grade, com offsets por célula."""
+
+    def __init__(
+        self,
+        grid: Grid,
+        offsets: np.ndarray,
+        rows: np.ndarray,
+        lat: np.ndarray,
+        lon: np.ndarray,
+        day_idx: Optional[np.ndarray] = None,
+        id_bdq: Optional[np.ndarray] = None,
+    ):
+        self.grid = grid
+        self.offsets = offsets
+        self.rows = rows
+        self.lat = lat
+        self.lon = lon
+        self.day_idx = day_idx
+        self.id_bdq = id_bdq
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def save(self, path: Path) -> None:
+        """Grava o índice (temporário + rename)."""
+        arrays = {
+            "grid": np.array([self.grid.lat_min, self.grid.lon_min, self.grid.cell_deg]),
+            "shape": np.array([self.grid.n_lat, self.grid.n_lon], dtype=np.int64),
+            "offsets": self.offsets,
+            "rows": self.rows,
+            "lat": self.lat,
+            "lon": self.lon,
+        }
+        if self.day_idx is not None:
+            arrays["day_idx"] = self.day_idx
+        if self.id_bdq is not None:
+            arrays["id_bdq"] = self.id_bdq
+        tmp_path = Path(path).with_suffix(".tmp.npz")
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Path) -> "GridIndex":
+        with np.load(path) as data:
+            lat_min, lon_min, cell_deg = data["grid"].tolist()
+            n_lat, n_lon = data["shape"].tolist()
+            return cls(
+                Grid(lat_min, lon_min, cell_deg, n_lat, n_lon),
+                data["offsets"], data["rows"], data["lat"], data["lon"],
+                data["day_idx"] if "day_idx" in data else None,
+                data["id_bdq"] if "id_bdq" in data else None,
+            )
+
+    def _block(self, lat_lo: float, lat_hi: float, lon_lo: float, lon_hi: float) -> np.ndarray:
+        """Posições (na ordem do índice) dos focos das células que tocam a área.
+
+        Em cada linha da grade, as colunas pedidas são contíguas; cada linha
+        vira uma fatia `offsets[início]:offsets[fim]`.
+        """
+        grid = self.grid
+        row_lo, row_hi = grid.rows([lat_lo, lat_hi])
+        col_lo, col_hi = grid.cols([lon_lo, lon_hi])
+        base = np.arange(row_lo, row_hi + 1, dtype=np.int64) * grid.n_lon
+        starts = self.offsets[base + col_lo]
+        ends = self.offsets[base + col_hi + 1]
+        sizes = ends - starts
+        total = int(sizes.sum())
+        if not total:
+            return np.empty(0, dtype=np.int64)
+        # Concatena as fatias sem laço: início de cada fatia + deslocamento interno
+        shift = np.repeat(starts - (np.cumsum(sizes) - sizes), sizes)
+        return np.arange(total, dtype=np.int64) + shift
+
+    def _filter_days(self, positions: np.ndarray, days) -> np.ndarray:
+        if days is None:
+            return positions
+        if self.day_idx is None:
+            raise ValueError("Índice sem day_idx: refaça a ingestão para filtrar por dia")
+        start, end = (_day_ordinal(value) for value in days)
+        day_idx = self.day_idx[positions]
+        return positions[(day_idx >= start) & (day_idx <= end)]
+
+    def _frame(self, positions: np.ndarray, distances: Optional[np.ndarray] = None) -> pd.DataFrame:
+        frame = {"row": self.rows[positions]}
+        if self.id_bdq is not None:
+            frame["id_bdq"] = self.id_bdq[positions]
+        frame["lat"] = self.lat[positions]
+        frame["lon"] = self.lon[positions]
+        if self.day_idx is not None:
+            frame["day"] = self.day_idx[positions].astype("datetime64[D]").astype("datetime64[s]")
+        if distances is not None:
+            frame["distance_km"] = distances
+        return pd.DataFrame(frame)
+
+    def bbox(
+        self,
+        lon_min: float,
+        lat_min: float,
+        lon_max: float,
+        lat_max: float,
+        days: Optional[tuple] = None,
+    ) -> pd.DataFrame:
+        """Focos dentro da bounding box (mesma ordem de `build_filter`).
+
+        `days` é um intervalo inclusivo (início, fim) de datas.
+        """
+        positions = self._block(lat_min, lat_max, lon_min, lon_max)
+        lat, lon = self.lat[positions], self.lon[positions]
+        inside = (lat >= lat_min) & (lat <= lat_max) & (lon >= lon_min) & (lon <= lon_max)
+        positions = self._filter_days(positions[inside], days)
+        return self._frame(positions[np.argsort(self.rows[positions])])
+
+    def _within(self, lat: float, lon: float, radius_km: float, days) -> tuple[np.ndarray, np.ndarray]:
+        dlat = radius_km / KM_PER_DEG_LAT
+        # Perto dos polos a caixa cobre todas as longitudes
+        cos_lat = np.cos(np.radians(min(abs(lat) + dlat, 90.0)))
+        dlon = 180.0 if cos_lat < 1e-9 else radius_km / (KM_PER_DEG_LAT * cos_lat)
+        positions = self._filter_days(self._block(lat - dlat, lat + dlat, lon - dlon, lon + dlon), days)
+        distances = haversine_km(lat, lon, self.lat[positions], self.lon[positions])
+        inside = distances <= radius_km
+        return positions[inside], distances[inside]
+
+    def radius(self, lat: float, lon: float, radius_km: float, days: Optional[tuple] = None) -> pd.DataFrame:
+        """Focos a até `radius_km` do ponto, do mais próximo ao mais distante."""
+        positions, distances = self._within(lat, lon, radius_km, days)
+        order = np.lexsort((self.rows[positions], distances))
+        return self._frame(positions[order], distances[order])
+
+    def nearest(self, lat: float, lon: float, k: int, days: Optional[tuple] = None) -> pd.DataFrame:
+        """Os `k` focos mais próximos do ponto (raio de busca dobrado até bastar)."""
+        if k < 1:
+            raise ValueError("k precisa ser positivo")
+        radius_km = self.grid.cell_deg * KM_PER_DEG_LAT
+        max_km = np.pi * EARTH_RADIUS_KM
+        while True:
+            positions, distances = self._within(lat, lon, radius_km, days)
+            if len(positions) >= k or radius_km >= max_km:
+                break
+            radius_km *= 2
+        if len(positions) > k:
+            top = np.argpartition(distances, k - 1)[:k]
+            positions, distances = positions[top], distances[top]
+        order = np.lexsort((self.rows[positions], distances))
+        return self._frame(positions[order], distances[order])
+
+
+def build_index(df: pd.DataFrame, grid: Optional[Grid] = None) -> GridIndex:
+    """Ordena os focos por célula e monta os offsets.
+
+    Sem `grid`, a grade cobre a extensão dos dados com `DEFAULT_CELL_DEG`.
+    Focos sem coordenadas (lat/lon nulos) ficam fora do índice: não têm
+    célula e nenhuma consulta por área os encontraria.
+    """
+    lat = df["lat"].to_numpy(dtype=np.float32)
+    lon = df["lon"].to_numpy(dtype=np.float32)
+    valid = np.flatnonzero(np.isfinite(lat) & np.isfinite(lon))
+    if grid is None:
+        grid = Grid.covering(
+            float(lat[valid].min()), float(lat[valid].max()), float(lon[valid].min()), float(lon[valid].max())
+        ) if len(valid) else Grid(0.0, 0.0, DEFAULT_CELL_DEG, 1, 1)
+    cells = grid.cell_ids(lat[valid], lon[valid])
+    order = valid[np.argsort(cells, kind="stable")]
+    offsets = np.zeros(grid.n_cells + 1, dtype=np.int64)
+    np.cumsum(np.bincount(cells, minlength=grid.n_cells), out=offsets[1:])
+
+    if "day_idx" in df.columns:
+        day_idx = df["day_idx"].to_numpy(dtype=np.int32)[order]
+    elif "day" in df.columns:
+        day_idx = pd.to_datetime(df["day"]).to_numpy().astype("datetime64[D]").astype(np.int32)[order]
+    else:
+        day_idx = None
+    id_bdq = df["id_bdq"].to_numpy(dtype=np.int64)[order] if "id_bdq" in df.columns else None
+    return GridIndex(grid, offsets, order.astype(np.int32), lat[order], lon[order], day_idx, id_bdq)
+
+
+def write_index(index: GridIndex, processed_dir: Path) -> Path:
+    """Grava o índice ao lado do Parquet e retorna o caminho."""
+    output_path = processed_dir / INDEX_NAME
+    index.save(output_path)
+    print(f"Índice espacial: {output_path.name} ({len(index):,} focos, {index.grid.n_cells:,} células)")
+    return output_path
+
+
+def load_index(processed_dir: Path = PROCESSED_DIR) -> GridIndex:
+    """Carrega o índice; se faltar ou estiver desatualizado, monta a partir dos dados."""
+    index_path = processed_dir / INDEX_NAME
+    sources = [processed_dir / PARQUET_NAME, processed_dir / MANIFEST_NAME]
+    if index_path.exists():
+        index_mtime = index_path.stat().st_mtime_ns
+        if not any(path.exists() and path.stat().st_mtime_ns > index_mtime for path in sources):
+            return GridIndex.load(index_path)
+        print(f"  ⚠ {index_path.name} desatualizado, montando o índice a partir dos dados")
+    return build_index(read_processed(processed_dir, columns=INDEX_COLUMNS))
+
+
+def load_rows(
+    rows: Sequence[int],
+    columns: Optional[Sequence[str]] = None,
+    processed_dir: Path = PROCESSED_DIR,
+) -> pd.DataFrame:
+    """Lê só as linhas `rows` (campo `row` das consultas) da saída da ingestão."""
+    dataset = open_focos(processed_dir)
+    if columns is not None:
+        columns = [col for col in columns if col in dataset.schema.names]
+    return dataset.take(np.asarray(rows, dtype=np.int64), columns=columns).to_pandas()
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Consultas espaciais sobre os focos")
+    parser.add_argument("--lat", type=float, help="Latitude do ponto de referência")
+    parser.add_argument("--lon", type=float, help="Longitude do ponto de referência")
+    parser.add_argument("--raio", type=float, help="Raio em km ao redor do ponto")
+    parser.add_argument("--vizinhos", type=int, help="Quantidade de focos mais próximos do ponto")
+    parser.add_argument(
+        "--bbox", type=float, nargs=4, metavar=("LON_MIN", "LAT_MIN", "LON_MAX", "LAT_MAX"),
+        help="Bounding box",
+    )
+    parser.add_argument(
+        "--dias", type=int, default=None,
+        help="Só os últimos N dias do índice (ex.: 7)",
+    )
+    args = parser.parse_args(argv)
+    modes = [args.raio is not None, args.vizinhos is not None, args.bbox is not None]
+    if sum(modes) != 1:
+        parser.error("use exatamente uma consulta: --raio, --vizinhos ou --bbox")
+    if (args.raio is not None or args.vizinhos is not None) and (args.lat is None or args.lon is None):
+        parser.error("--raio e --vizinhos precisam de --lat e --lon")
+    return args
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Execução principal."""
+    args = parse_args(argv)
+    try:
+        index = load_index()
+        days = None
+        if args.dias is not None:
+            last = pd.Timestamp(np.datetime64(int(index.day_idx.max()), "D"))
+            days = (last - pd.Timedelta(days=args.dias - 1), last)
+            print(f"Período: {days[0].date()} a {days[1].date()}")
+
+        if args.raio is not None:
+            result = index.radius(args.lat, args.lon, args.raio, days)
+            print(f"{len(result):,} foco(s) a até {args.raio:g} km de ({args.lat}, {args.lon})")
+        elif args.vizinhos is not None:
+            result = index.nearest(args.lat, args.lon, args.vizinhos, days)
+            print(f"{len(result):,} foco(s) mais próximos de ({args.lat}, {args.lon})")
+        else:
+            result = index.bbox(*args.bbox, days=days)
+            print(f"{len(result):,} foco(s) na bounding box")
+        if len(result):
+            print(result.head(20).to_string(index=False))
+        return 0
+
+    except Exception as e:
+        print(f"\n✗ Erro: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -5,17 +5,31 @@ Este script gera visualizações específicas para a apresentação de storytell
 - Linha do tempo de picos anômalos (2020 e 2024)
 - Séries temporais com envelopes sazonais
 - Heatmap temporal (calor por mês/ano)
-- Ranking de criticidade por município/UF/bioma
+- Ranking de criticidade por UF × município, com bioma predominante
 - Gráficos de anomalias com destaque visual
 
+Os agregados de cada figura são calculados uma vez (`figure_jobs`) e as
+figuras são renderizadas em paralelo, pulando as que não mudaram
+(`src.render_scheduler`). Sem mudanças nas saídas da ingestão, as figuras
+são restauradas do cache de artefatos (`src.artifact_cache`). Cada etapa é
+medida e o relatório da execução vai para data/relatorios/ (ver
+`src.instrumentation`).
+
 Uso:
     python -m src.storytelling_viz
+    python -m src.storytelling_viz --workers 4
+    python -m src.storytelling_viz --forcar
+    python -m src.storytelling_viz --sem-cache
+    python -m src.storytelling_viz --motor duckdb
 """
 
 from __future__ import annotations
 
+import argparse
+import functools
 import sys
 from pathlib import Path
+from typing import Optional, Sequence
 
 import pandas as pd
 import numpy as np
@@ -24,6 +38,18 @@ import matplotlib.dates as mdates
 import seaborn as sns
 from datetime import datetime
 
+from src.anomalies import score_anomalies
+from src.artifact_cache import ArtifactCache, cached, input_fingerprint
+from src.daily_cube import CUBE_NAME, count_by, drop_missing
+from src.eda_utils import load_counts
+from src.focos_loader import (
+    DATASET_NAME, MANIFEST_NAME, MISSING_BIOMAS, PARQUET_NAME, focos_source, load_focos,
+)
+from src.query_engine import DEFAULT_ENGINE, ENGINES, open_counts
+from src.instrumentation import RunReport, add_report_arguments, instrumented, stage, write_reports
+from src.municipio_ranking import rank_municipios, top_k
+from src.render_scheduler import FigureJob, render_figures
+
 # Configurações
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 DATA_DIR = PROJECT_ROOT / "data"
@@ -36,39 +62,74 @@ plt.rcParams["font.size"] = 11
 sns.set_style("whitegrid")
 sns.set_palette("husl")
 
+# Biomas das séries com envelope sazonal
+ENVELOPE_BIOMAS = ['Amazônia', 'Cerrado', 'Caatinga', 'Mata Atlântica']
+
+FIGURE_NAMES = (
+    "timeline_anomalies.png",
+    "series_envelope_bioma.png",
+    "heatmap_temporal.png",
+    "ranking_criticidade_municipios.png",
+    "anomalies_by_bioma.png",
+)
+
+# Módulos cujo código também define as figuras (versão no cache)
+CACHE_MODULES = (
+    "src.anomalies", "src.daily_cube", "src.focos_loader", "src.municipio_ranking", "src.query_engine",
+    "src.render_scheduler",
+)
+
 
-def load_data() -> pd.DataFrame:
-    """Carrega Parquet consolidado."""
+def load_data(columns: Optional[Sequence[str]] = None, **filters) -> pd.DataFrame:
+    """Carrega Parquet consolidado.
+
+    `columns` e os filtros de `focos_loader.build_filter` (anos, biomas,
+    UFs, bbox) são aplicados na leitura, antes de materializar em pandas.
+    """
     # Tentar primeiro em processed, depois em interim
-    parquet_path = PROCESSED_DIR / "focos_2019_2024.parquet"
-    if not parquet_path.exists():
-        interim_path = DATA_DIR / "interim" / "focos_2019_2024.parquet"
-        if interim_path.exists():
-            parquet_path = interim_path
-        else:
+    source_dir = PROCESSED_DIR
+    try:
+        source = focos_source(PROCESSED_DIR)
+    except FileNotFoundError:
+        interim_path = DATA_DIR / "interim" / PARQUET_NAME
+        if not interim_path.exists():
             raise FileNotFoundError(
                 f"Arquivo não encontrado em {PROCESSED_DIR} nem em {interim_path}. "
                 "Execute pipeline_ingestao.py primeiro."
             )
+        source_dir, source = interim_path.parent, interim_path
     
-    df = pd.read_parquet(parquet_path)
-    df['date'] = pd.to_datetime(df['date'])
-    print(f"Carregados {len(df):,} registros de {parquet_path.name}")
+    df = load_focos(columns, source_dir, **filters)
+    if 'date' in df.columns:
+        df['date'] = pd.to_datetime(df['date'])
+    print(f"Carregados {len(df):,} registros de {source.name}")
     return df
 
 
-def plot_timeline_anomalies(df: pd.DataFrame) -> None:
-    """Linha do tempo destacando picos anômalos de 2020 e 2024."""
-    # Agregar por dia
-    by_day = df.groupby('day').size().reset_index(name='focos')
-    by_day['day'] = pd.to_datetime(by_day['day'])
-    by_day = by_day.sort_values('day')
-    
-    # Detectar anomalias
-    median_focos = by_day['focos'].median()
-    mad = (by_day['focos'] - median_focos).abs().median()
-    by_day['z_score'] = (by_day['focos'] - median_focos) / (1.4826 * mad)
-    by_day['anomalia'] = by_day['z_score'].abs() >= 3
+def input_paths() -> list[Path]:
+    """Saídas da ingestão de que as figuras dependem (chave do cache)."""
+    names = (PARQUET_NAME, DATASET_NAME, MANIFEST_NAME, CUBE_NAME)
+    return [PROCESSED_DIR / name for name in names] + [DATA_DIR / "interim" / PARQUET_NAME]
+
+
+@instrumented()
+def valid_biomas(df: pd.DataFrame) -> pd.DataFrame:
+    """Linhas com bioma preenchido (descarta nulos e o texto 'Nan')."""
+    return drop_missing(df, 'bioma', MISSING_BIOMAS)
+
+
+@instrumented()
+def timeline_scores(df: pd.DataFrame, scores: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """Focos por dia com z-score robusto (MAD) da série total."""
+    by_day = score_anomalies(df) if scores is None else scores
+    return by_day[['day', 'focos', 'baseline', 'mad', 'anomalia']]
+
+
+def render_timeline_anomalies(output_path: Path, by_day: pd.DataFrame) -> None:
+    """Desenha a linha do tempo a partir de `timeline_scores()`."""
+    by_day = by_day.copy()
+    median_focos = by_day['baseline'].iloc[0]
+    mad = by_day['mad'].iloc[0]
     
     # Filtrar anos críticos
     by_day['year'] = by_day['day'].dt.year
@@ -111,26 +172,37 @@ def plot_timeline_anomalies(df: pd.DataFrame) -> None:
     plt.xticks(rotation=45)
     plt.tight_layout()
     
-    output_path = FIGS_DIR / "timeline_anomalies.png"
     plt.savefig(output_path, dpi=150, bbox_inches='tight')
     plt.close()
+
+
+def plot_timeline_anomalies(df: pd.DataFrame, scores: Optional[pd.DataFrame] = None) -> None:
+    """Linha do tempo destacando picos anômalos de 2020 e 2024.
+
+    `scores` reaproveita uma pontuação já feita com `score_anomalies(df)`.
+    """
+    output_path = FIGS_DIR / "timeline_anomalies.png"
+    render_timeline_anomalies(output_path, timeline_scores(df, scores))
     print(f"✓ {output_path.name}")
 
 
-def plot_series_with_envelope(df: pd.DataFrame) -> None:
-    """Série temporal mensal com envelope sazonal por bioma."""
-    # Filtrar biomas válidos
-    df_filtered = df[df['bioma'].notna() & (df['bioma'] != 'Nan') & (df['bioma'] != 'nan')].copy()
-    
+@instrumented()
+def monthly_by_bioma(df_filtered: pd.DataFrame) -> pd.DataFrame:
+    """Focos por mês × bioma dos principais biomas (`df_filtered`: saída de `valid_biomas`)."""
     # Agregar por mês e bioma
-    df_filtered['year_month'] = df_filtered['date'].dt.to_period('M')
-    by_month_bioma = df_filtered.groupby(['year_month', 'bioma']).size().reset_index(name='focos')
+    by_month_bioma = count_by(df_filtered, ['year_month', 'bioma'])
     by_month_bioma['year_month'] = by_month_bioma['year_month'].astype(str)
     by_month_bioma['date'] = pd.to_datetime(by_month_bioma['year_month'])
     
     # Focar nos principais biomas
-    top_biomas = ['Amazônia', 'Cerrado', 'Caatinga', 'Mata Atlântica']
+    top_biomas = ENVELOPE_BIOMAS
     by_month_bioma = by_month_bioma[by_month_bioma['bioma'].isin(top_biomas)]
+    return by_month_bioma
+
+
+def render_series_with_envelope(output_path: Path, by_month_bioma: pd.DataFrame) -> None:
+    """Desenha as séries mensais com envelope a partir de `monthly_by_bioma()`."""
+    top_biomas = ENVELOPE_BIOMAS
     
     fig, axes = plt.subplots(2, 2, figsize=(16, 10))
     axes = axes.flatten()
@@ -178,24 +250,29 @@ def plot_series_with_envelope(df: pd.DataFrame) -> None:
                  fontsize=14, fontweight='bold', y=0.995)
     plt.tight_layout()
     
-    output_path = FIGS_DIR / "series_envelope_bioma.png"
     plt.savefig(output_path, dpi=150, bbox_inches='tight')
     plt.close()
+
+
+def plot_series_with_envelope(df: pd.DataFrame) -> None:
+    """Série temporal mensal com envelope sazonal por bioma."""
+    output_path = FIGS_DIR / "series_envelope_bioma.png"
+    render_series_with_envelope(output_path, monthly_by_bioma(valid_biomas(df)))
     print(f"✓ {output_path.name}")
 
 
-def plot_heatmap_temporal(df: pd.DataFrame) -> None:
-    """Heatmap temporal: focos por mês e ano."""
-    df_filtered = df[df['bioma'].notna() & (df['bioma'] != 'Nan') & (df['bioma'] != 'nan')].copy()
-    
+@instrumented()
+def heatmap_by_month_year(df_filtered: pd.DataFrame) -> pd.DataFrame:
+    """Tabela mês × ano de focos (`df_filtered`: saída de `valid_biomas`)."""
     # Agregar por ano e mês
-    df_filtered['year'] = df_filtered['date'].dt.year
-    df_filtered['month'] = df_filtered['date'].dt.month
-    
-    heatmap_data = df_filtered.groupby(['year', 'month']).size().reset_index(name='focos')
+    heatmap_data = count_by(df_filtered, ['year', 'month'])
     heatmap_pivot = heatmap_data.pivot(index='month', columns='year', values='focos')
     heatmap_pivot = heatmap_pivot.fillna(0)
-    
+    return heatmap_pivot
+
+
+def render_heatmap_temporal(output_path: Path, heatmap_pivot: pd.DataFrame) -> None:
+    """Desenha o heatmap a partir de `heatmap_by_month_year()`."""
     fig, ax = plt.subplots(figsize=(12, 6))
     
     sns.heatmap(heatmap_pivot, annot=True, fmt='.0f', cmap='YlOrRd', 
@@ -214,27 +291,30 @@ def plot_heatmap_temporal(df: pd.DataFrame) -> None:
     
     plt.tight_layout()
     
-    output_path = FIGS_DIR / "heatmap_temporal.png"
     plt.savefig(output_path, dpi=150, bbox_inches='tight')
     plt.close()
+
+
+def plot_heatmap_temporal(df: pd.DataFrame) -> None:
+    """Heatmap temporal: focos por mês e ano."""
+    output_path = FIGS_DIR / "heatmap_temporal.png"
+    render_heatmap_temporal(output_path, heatmap_by_month_year(valid_biomas(df)))
     print(f"✓ {output_path.name}")
 
 
-def plot_ranking_criticidade(df: pd.DataFrame) -> None:
-    """Ranking de criticidade: Top 15 municípios por número de focos."""
-    df_filtered = df[df['municipio'].notna()].copy()
-    
-    # Agregar por município (contar registros)
-    by_municipio = df_filtered.groupby('municipio').agg({
-        'estado': 'first',
-        'bioma': lambda x: x.mode()[0] if len(x.mode()) > 0 else 'N/A'
-    }).reset_index()
-    counts = df_filtered.groupby('municipio').size().reset_index(name='total_focos')
-    by_municipio = by_municipio.merge(counts, on='municipio')
-    
-    # Top 15
-    top15 = by_municipio.nlargest(15, 'total_focos')
-    
+@instrumented()
+def top_municipios(df: pd.DataFrame) -> pd.DataFrame:
+    """Top 15 municípios por focos, com bioma predominante.
+
+    A chave é UF × município (homônimos de UFs diferentes não se somam);
+    ver `src.municipio_ranking`.
+    """
+    top15 = top_k(rank_municipios(df), 15)
+    return top15[['municipio', 'estado', 'bioma', 'total_focos']].reset_index(drop=True)
+
+
+def render_ranking_criticidade(output_path: Path, top15: pd.DataFrame) -> None:
+    """Desenha o ranking a partir de `top_municipios()`."""
     fig, ax = plt.subplots(figsize=(12, 8))
     
     # Criar rótulos com município e UF
@@ -260,34 +340,36 @@ def plot_ranking_criticidade(df: pd.DataFrame) -> None:
     
     plt.tight_layout()
     
-    output_path = FIGS_DIR / "ranking_criticidade_municipios.png"
     plt.savefig(output_path, dpi=150, bbox_inches='tight')
     plt.close()
+
+
+def plot_ranking_criticidade(df: pd.DataFrame) -> None:
+    """Ranking de criticidade: Top 15 municípios por número de focos."""
+    output_path = FIGS_DIR / "ranking_criticidade_municipios.png"
+    render_ranking_criticidade(output_path, top_municipios(df))
     print(f"✓ {output_path.name}")
 
 
-def plot_anomalies_by_bioma(df: pd.DataFrame) -> None:
-    """Gráfico de anomalias por bioma: distribuição de z-scores."""
-    df_filtered = df[df['bioma'].notna() & (df['bioma'] != 'Nan') & (df['bioma'] != 'nan')].copy()
-    
-    # Agregar por dia e bioma
-    by_day_bioma = df_filtered.groupby(['day', 'bioma']).size().reset_index(name='focos')
-    by_day_bioma['day'] = pd.to_datetime(by_day_bioma['day'])
-    
-    # Calcular z-score robusto por bioma
-    anomalies_list = []
-    for bioma in by_day_bioma['bioma'].unique():
-        bioma_data = by_day_bioma[by_day_bioma['bioma'] == bioma]['focos']
-        median_val = bioma_data.median()
-        mad = (bioma_data - median_val).abs().median()
-        
-        if mad > 0:
-            z_scores = (bioma_data - median_val) / (1.4826 * mad)
-            anomalies_list.append({
-                'bioma': bioma,
-                'z_score': z_scores.values,
-                'focos': bioma_data.values
-            })
+@instrumented()
+def bioma_scores(df_filtered: pd.DataFrame, seasonal: bool = False) -> pd.DataFrame:
+    """Focos diários por bioma com z-score robusto (`df_filtered`: saída de `valid_biomas`)."""
+    # Z-score robusto de todos os biomas de uma vez (biomas com MAD = 0 ficam de fora)
+    by_day_bioma = score_anomalies(df_filtered, ['bioma'], seasonal=seasonal)
+    by_day_bioma = by_day_bioma[by_day_bioma['z_score_robust'].notna()]
+    return by_day_bioma[['bioma', 'focos', 'z_score_robust']]
+
+
+def render_anomalies_by_bioma(output_path: Path, by_day_bioma: pd.DataFrame) -> None:
+    """Desenha a distribuição de z-scores a partir de `bioma_scores()`."""
+    anomalies_list = [
+        {
+            'bioma': bioma,
+            'z_score': group['z_score_robust'].to_numpy(),
+            'focos': group['focos'].to_numpy(),
+        }
+        for bioma, group in by_day_bioma.groupby('bioma', observed=True, sort=False)
+    ]
     
     # Plotar
     fig, axes = plt.subplots(2, 3, figsize=(16, 10))
@@ -330,25 +412,85 @@ def plot_anomalies_by_bioma(df: pd.DataFrame) -> None:
                  fontsize=14, fontweight='bold')
     plt.tight_layout()
     
-    output_path = FIGS_DIR / "anomalies_by_bioma.png"
     plt.savefig(output_path, dpi=150, bbox_inches='tight')
     plt.close()
+
+
+def plot_anomalies_by_bioma(df: pd.DataFrame, seasonal: bool = False) -> None:
+    """Gráfico de anomalias por bioma: distribuição de z-scores.
+
+    Com `seasonal=True`, cada dia é comparado ao mesmo mês do seu bioma.
+    """
+    output_path = FIGS_DIR / "anomalies_by_bioma.png"
+    render_anomalies_by_bioma(output_path, bioma_scores(valid_biomas(df), seasonal))
     print(f"✓ {output_path.name}")
 
 
-def main() -> int:
+@instrumented("agregacoes")
+def figure_jobs(df: pd.DataFrame) -> list[FigureJob]:
+    """Figuras de storytelling com os agregados calculados uma vez (o filtro
+    de biomas válidos é feito uma só vez e compartilhado)."""
+    valid = valid_biomas(df)
+    return [
+        FigureJob("timeline_anomalies.png", render_timeline_anomalies,
+                  {"by_day": timeline_scores(df)}),
+        FigureJob("series_envelope_bioma.png", render_series_with_envelope,
+                  {"by_month_bioma": monthly_by_bioma(valid)}),
+        FigureJob("heatmap_temporal.png", render_heatmap_temporal,
+                  {"heatmap_pivot": heatmap_by_month_year(valid)}),
+        FigureJob("ranking_criticidade_municipios.png", render_ranking_criticidade,
+                  {"top15": top_municipios(df)}),
+        FigureJob("anomalies_by_bioma.png", render_anomalies_by_bioma,
+                  {"by_day_bioma": bioma_scores(valid)}),
+    ]
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Visualizações de storytelling")
+    parser.add_argument(
+        "--workers", type=int, default=None,
+        help="Processos para renderizar as figuras (padrão: um por figura, até o nº de CPUs)",
+    )
+    parser.add_argument(
+        "--forcar", action="store_true",
+        help="Renderiza todas as figuras, mesmo sem mudanças nos agregados",
+    )
+    parser.add_argument(
+        "--sem-cache", action="store_true",
+        help="Recalcula tudo sem consultar nem alimentar o cache de artefatos",
+    )
+    parser.add_argument(
+        "--motor", choices=ENGINES, default=DEFAULT_ENGINE,
+        help="Motor das agregações: cubo em pandas ou DuckDB direto sobre o Parquet (fora da memória)",
+    )
+    add_report_arguments(parser, "storytelling_viz")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
     """Execução principal."""
+    args = parse_args(argv)
     print("=== Storytelling Visualizations ===\n")
     
+    report = RunReport("storytelling_viz", cprofile_stages=args.cprofile)
     try:
-        df = load_data()
-        
-        print("\nGerando visualizações de storytelling:")
-        plot_timeline_anomalies(df)
-        plot_series_with_envelope(df)
-        plot_heatmap_temporal(df)
-        plot_ranking_criticidade(df)
-        plot_anomalies_by_bioma(df)
+        with report:
+            # Sem mudanças na ingestão as figuras vêm do cache, sem carregar dados;
+            # caso contrário só precisam de contagens: usam o cubo diário
+            cache = None if args.sem_cache else ArtifactCache()
+            # Sem cubo, os dados por foco podem vir também de data/interim (load_data)
+            counts_loader = functools.partial(load_counts, PROCESSED_DIR, load_data)
+            print("Gerando visualizações de storytelling:")
+            with stage("figuras_storytelling"):
+                cached(
+                    "figuras_storytelling", [FIGS_DIR / name for name in FIGURE_NAMES],
+                    lambda: render_figures(
+                        figure_jobs(open_counts(args.motor, counts_loader, PROCESSED_DIR)),
+                        FIGS_DIR, args.workers, args.forcar,
+                    ),
+                    fingerprint=input_fingerprint(input_paths()), params={"motor": args.motor},
+                    cache=cache, refresh=args.forcar, modules=CACHE_MODULES,
+                )
         
         print("\n✓ Visualizações de storytelling concluídas!")
         print(f"Artefatos salvos em: {FIGS_DIR}")
@@ -359,6 +501,9 @@ def main() -> int:
         import traceback
         traceback.print_exc()
         return 1
+    
+    finally:
+        write_reports(report, args.relatorio, args.trace)
 
 
 if __name__ == "__main__":
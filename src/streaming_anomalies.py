@@ -0,0 +1,371 @@
+"""
+Detecção de anomalias incremental - Janela deslizante por grupo
+
+Este módulo:
+- Mantém, por grupo (série total, bioma, UF, ...), uma janela deslizante
+  das contagens diárias em lista ordenada (`bisect`), com mediana em O(1)
+  e MAD em O(log² janela) por busca binária sobre os desvios, sem ordenar
+  a janela a cada dia
+- Ingere um dia novo de focos e devolve z-score robusto e alertas sem
+  recarregar o histórico; o estado é salvo/carregado em JSON entre execuções
+- Reproduz `focos_por_dia.csv` e confere o resultado com o cálculo em lote
+  (`src.anomalies.score_anomalies`, o mesmo de `detect_anomalies_simple()`)
+
+Como no lote, o dia ingerido faz parte da linha de base que o pontua, e
+grupos sem focos no dia não entram na janela.
+
+Uso:
+    python -m src.streaming_anomalies --verificar
+    python -m src.streaming_anomalies --janela 90 --verificar
+    python -m src.streaming_anomalies --arquivo novos_dias.csv --estado estado.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from bisect import bisect_left, insort
+from collections import deque
+from pathlib import Path
+from typing import Callable, Hashable, Mapping, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.anomalies import MAD_SCALE, Z_THRESHOLD, score_anomalies
+from src.daily_cube import COUNT_COL
+from src.utils import PROCESSED_DIR
+
+DAILY_CSV = PROCESSED_DIR / "focos_por_dia.csv"
+
+
+def _kth_smallest(
+    left: Callable[[int], float],
+    n_left: int,
+    right: Callable[[int], float],
+    n_right: int,
+    k: int,
+) -> float:
+    """k-ésimo menor (base 0) da união de duas sequências ordenadas.
+
+    As sequências são acessadas por índice, sem materializar a união.
+    """
+    lo, hi = max(0, k + 1 - n_right), min(k + 1, n_left)
+    while lo <= hi:
+        i = (lo + hi) // 2
+        j = k + 1 - i
+        if i > 0 and j < n_right and left(i - 1) > right(j):
+            hi = i - 1
+        elif j > 0 and i < n_left and right(j - 1) > left(i):
+            lo = i + 1
+        else:
+            candidates = []
+            if i > 0:
+                candidates.append(left(i - 1))
+            if j > 0:
+                candidates.append(right(j - 1))
+            return max(candidates)
+    raise ValueError(f"k={k} fora do intervalo para {n_left + n_right} valores")
+
+
+class RollingWindow:
+    """Janela deslizante de contagens com mediana e MAD incrementais.
+
+    `size=None` acumula todo o histórico (janela expansiva).
+    """
+
+    __slots__ = ("size", "values", "ordered")
+
+    def __init__(self, size: Optional[int] = None, values: Sequence[float] = ()):
+        self.size = size
+        self.values: deque[float] = deque()
+        self.ordered: list[float] = []
+        for value in values:
+            self.push(value)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def push(self, value: float) -> None:
+        """Acrescenta um valor, descartando o mais antigo se a janela encher."""
+        value = float(value)
+        self.values.append(value)
+        insort(self.ordered, value)
+        if self.size is not None and len(self.values) > self.size:
+            oldest = self.values.popleft()
+            del self.ordered[bisect_left(self.ordered, oldest)]
+
+    def median(self) -> float:
+        ordered, n = self.ordered, len(self.ordered)
+        if not n:
+            return np.nan
+        return (ordered[(n - 1) // 2] + ordered[n // 2]) / 2
+
+    def mad(self, median: Optional[float] = None) -> float:
+        """Mediana dos desvios absolutos, sem ordenar os desvios.
+
+        Os desvios abaixo e acima da mediana já formam duas sequências
+        ordenadas; a mediana da união sai por busca binária.
+        """
+        ordered, n = self.ordered, len(self.ordered)
+        if not n:
+            return np.nan
+        center = self.median() if median is None else median
+        split = bisect_left(ordered, center)
+        n_below, n_above = split, n - split
+
+        def below(i: int) -> float:
+            return center - ordered[split - 1 - i]
+
+        def above(i: int) -> float:
+            return ordered[split + i] - center
+
+        lower = _kth_smallest(below, n_below, above, n_above, (n - 1) // 2)
+        upper = _kth_smallest(below, n_below, above, n_above, n // 2)
+        return (lower + upper) / 2
+
+
+class StreamingAnomalyDetector:
+    """Z-score robusto incremental, uma janela deslizante por grupo.
+
+    `keys` nomeia as colunas que identificam o grupo (vazio = série total);
+    `window` é o tamanho da janela em dias com focos (None = expansiva).
+    """
+
+    def __init__(
+        self,
+        window: Optional[int] = None,
+        keys: Sequence[str] = (),
+        threshold: float = Z_THRESHOLD,
+    ):
+        self.window = window
+        self.keys = list(keys)
+        self.threshold = threshold
+        self.groups: dict[tuple, RollingWindow] = {}
+        self.last_day: Optional[pd.Timestamp] = None
+
+    def state(self, group: Hashable = ()) -> tuple[float, float]:
+        """Linha de base atual (mediana, MAD) de um grupo."""
+        window = self.groups[group]
+        median = window.median()
+        return median, window.mad(median)
+
+    def update(self, day, counts: Mapping[Hashable, int]) -> list[dict]:
+        """Ingere os focos de um dia (grupo → contagem) e pontua cada grupo.
+
+        Os dias precisam chegar em ordem crescente.
+        """
+        day = pd.Timestamp(day)
+        if self.last_day is not None and day <= self.last_day:
+            raise ValueError(f"Dia {day.date()} já ingerido (último: {self.last_day.date()})")
+        self.last_day = day
+
+        records = []
+        for group, count in counts.items():
+            group = group if isinstance(group, tuple) else (group,)
+            window = self.groups.get(group)
+            if window is None:
+                window = self.groups[group] = RollingWindow(self.window)
+            window.push(count)
+            median = window.median()
+            mad = window.mad(median)
+            z = (count - median) / (MAD_SCALE * mad) if mad > 0 else np.nan
+            records.append({
+                "day": day,
+                **dict(zip(self.keys, group)),
+                COUNT_COL: count,
+                "baseline": median,
+                "mad": mad,
+                "z_score_robust": z,
+                "anomalia": bool(abs(z) >= self.threshold),
+            })
+        return records
+
+    def update_frame(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """Ingere um frame `day`, `keys`, `focos` (um ou mais dias, em ordem)."""
+        frame = frame.assign(day=pd.to_datetime(frame["day"]))
+        records = []
+        for day, rows in frame.groupby("day", sort=True):
+            if self.keys:
+                groups = zip(*(rows[key] for key in self.keys))
+            else:
+                groups = [()] * len(rows)
+            records.extend(self.update(day, dict(zip(groups, rows[COUNT_COL].tolist()))))
+        columns = ["day", *self.keys, COUNT_COL, "baseline", "mad", "z_score_robust", "anomalia"]
+        return pd.DataFrame.from_records(records, columns=columns)
+
+    def save(self, path: Path) -> None:
+        """Grava o estado (janelas por grupo) em JSON, de forma atômica."""
+        payload = {
+            "janela": self.window,
+            "chaves": self.keys,
+            "limiar": self.threshold,
+            "ultimo_dia": None if self.last_day is None else self.last_day.date().isoformat(),
+            "grupos": [
+                {"grupo": list(group), "valores": list(window.values)}
+                for group, window in self.groups.items()
+            ],
+        }
+        tmp_path = Path(path).with_suffix(".json.tmp")
+        tmp_path.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Path) -> "StreamingAnomalyDetector":
+        payload = json.loads(Path(path).read_text(encoding="utf-8"))
+        detector = cls(payload["janela"], payload["chaves"], payload["limiar"])
+        if payload["ultimo_dia"] is not None:
+            detector.last_day = pd.Timestamp(payload["ultimo_dia"])
+        for entry in payload["grupos"]:
+            detector.groups[tuple(entry["grupo"])] = RollingWindow(detector.window, entry["valores"])
+        return detector
+
+
+def batch_rolling_reference(daily: pd.DataFrame, window: int, keys: Sequence[str] = ()) -> pd.DataFrame:
+    """Mediana/MAD móveis em lote (pandas `rolling`), para conferência."""
+    keys = list(keys)
+    daily = daily.sort_values([*keys, "day"], kind="stable")
+
+    def mad(values: np.ndarray) -> float:
+        return float(np.median(np.abs(values - np.median(values))))
+
+    grouped = daily.groupby(keys, observed=True, sort=False)[COUNT_COL] if keys else daily[COUNT_COL]
+    rolling = grouped.rolling(window, min_periods=1)
+    reference = daily[["day", *keys]].copy()
+    reference["baseline"] = rolling.median().to_numpy()
+    reference["mad"] = rolling.apply(mad, raw=True).to_numpy()
+    return reference
+
+
+def verify_replay(daily: pd.DataFrame, streamed: pd.DataFrame, detector: StreamingAnomalyDetector) -> bool:
+    """Confere a reprodução incremental com o cálculo em lote.
+
+    Janela expansiva: a linha de base final de cada grupo e os z-scores do
+    histórico inteiro devem bater com `score_anomalies` (o lote de
+    `detect_anomalies_simple`). Janela fixa: a mediana/MAD de cada dia
+    devem bater com o `rolling` do pandas.
+    """
+    keys = detector.keys
+    if detector.window is None:
+        batch = score_anomalies(daily, keys, threshold=detector.threshold)
+        groups = list(zip(*(batch[key] for key in keys))) if keys else [()] * len(batch)
+        final = np.array([detector.state(group) for group in groups]).reshape(-1, 2)
+        mad = final[:, 1]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            z = np.where(mad > 0, (batch[COUNT_COL] - final[:, 0]) / (MAD_SCALE * mad), np.nan)
+        checks = {
+            "mediana": np.allclose(final[:, 0], batch["baseline"]),
+            "MAD": np.allclose(mad, batch["mad"]),
+            "z-score": np.allclose(z, batch["z_score_robust"], equal_nan=True),
+            "anomalias": np.array_equal(np.abs(z) >= detector.threshold, batch["anomalia"]),
+        }
+    else:
+        reference = batch_rolling_reference(daily, detector.window, keys)
+        merged = streamed.merge(reference, on=["day", *keys], suffixes=("", "_lote"))
+        checks = {
+            "linhas": len(merged) == len(streamed) == len(reference),
+            "mediana": np.allclose(merged["baseline"], merged["baseline_lote"]),
+            "MAD": np.allclose(merged["mad"], merged["mad_lote"]),
+        }
+    for name, ok in checks.items():
+        print(f"  {'✓' if ok else '✗'} {name}")
+    return all(checks.values())
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Detecção incremental de anomalias em focos diários")
+    parser.add_argument(
+        "--arquivo", type=Path, default=DAILY_CSV,
+        help="CSV com day, focos (e colunas de grupo) a ingerir (padrão: focos_por_dia.csv)",
+    )
+    parser.add_argument(
+        "--janela", type=int, default=None,
+        help="Dias com focos na janela deslizante (padrão: histórico inteiro)",
+    )
+    parser.add_argument(
+        "--grupos", nargs="*", default=None,
+        help="Colunas que definem os grupos (ex.: bioma estado; padrão: nenhum)",
+    )
+    parser.add_argument(
+        "--limiar", type=float, default=None,
+        help=f"|z| mínimo para alerta (padrão: {Z_THRESHOLD:g})",
+    )
+    parser.add_argument(
+        "--estado", type=Path, default=None,
+        help="JSON com o estado das janelas: carregado se existir e regravado no fim",
+    )
+    parser.add_argument(
+        "--verificar", action="store_true",
+        help="Confere a reprodução com o cálculo em lote",
+    )
+    args = parser.parse_args(argv)
+    if args.verificar and args.estado is not None and args.estado.exists():
+        parser.error("--verificar reproduz o arquivo do zero; não use com um --estado existente")
+    return args
+
+
+def state_conflicts(detector: "StreamingAnomalyDetector", args: argparse.Namespace) -> list[str]:
+    """Parâmetros passados na linha de comando que diferem dos do estado salvo."""
+    conflicts = []
+    for flag, given, saved in (
+        ("--janela", args.janela, detector.window),
+        ("--grupos", args.grupos, detector.keys),
+        ("--limiar", args.limiar, detector.threshold),
+    ):
+        if given is not None and given != saved:
+            conflicts.append(f"{flag} {given} (estado: {saved})")
+    return conflicts
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Execução principal."""
+    args = parse_args(argv)
+    print("=== Detecção incremental de anomalias ===\n")
+
+    try:
+        if args.estado is not None and args.estado.exists():
+            detector = StreamingAnomalyDetector.load(args.estado)
+            conflicts = state_conflicts(detector, args)
+            if conflicts:
+                raise ValueError(
+                    f"{args.estado} foi gravado com outros parâmetros: {'; '.join(conflicts)}. "
+                    "Omita-os para continuar o estado ou use outro --estado"
+                )
+            last_day = "nenhum" if detector.last_day is None else detector.last_day.date()
+            print(f"Estado carregado: {len(detector.groups)} grupo(s), último dia {last_day}")
+        else:
+            threshold = Z_THRESHOLD if args.limiar is None else args.limiar
+            detector = StreamingAnomalyDetector(args.janela, args.grupos or [], threshold)
+
+        daily = pd.read_csv(args.arquivo, parse_dates=["day"])
+        if detector.last_day is not None:
+            daily = daily[daily["day"] > detector.last_day]
+        streamed = detector.update_frame(daily)
+        n_days = streamed["day"].nunique()
+        alerts = streamed[streamed["anomalia"]]
+        print(f"{n_days:,} dia(s) ingerido(s) de {args.arquivo.name}, {len(alerts):,} alerta(s)")
+        for row in alerts.tail(10).itertuples(index=False):
+            label = " ".join([str(row.day.date()), *(str(getattr(row, key)) for key in detector.keys)])
+            print(f"  ⚠ {label} focos={row.focos:,} z={row.z_score_robust:.1f}")
+
+        if args.estado is not None:
+            detector.save(args.estado)
+            print(f"Estado salvo em {args.estado}")
+
+        if args.verificar:
+            print("\nConferência com o cálculo em lote:")
+            if not verify_replay(daily, streamed, detector):
+                return 1
+        return 0
+
+    except Exception as e:
+        print(f"\n✗ Erro: {e}", file=sys.stderr)
+        import traceback
+        traceback.print_exc()
+        return 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())